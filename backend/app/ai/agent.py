@@ -2,12 +2,20 @@ from typing import List, Dict, Any, Optional, AsyncGenerator
 from datetime import datetime
 import os
 import json
+import anyio
+import openai
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
+from app.ai.telemetry import LLMCallTracker
+from app.core.config import settings
+
+# 未指定model_name时使用的模型
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
 # 简化的AI聊天实现
 def process_simple_request(input_text: str, chat_history: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -75,13 +83,17 @@ async def process_full_agent_request(
     Returns:
         包含响应和聊天历史的字典
     """
+    tracker = None
     try:
         # 根据模型名称确定模型类型和配置
         llm = None
         
         # 如果没有指定model_name，使用默认值
         if not model_name:
-            model_name = "gpt-3.5-turbo"  # 默认使用OpenAI模型
+            model_name = DEFAULT_MODEL  # 默认使用OpenAI模型
+        
+        # 记录本次调用的耗时和用量
+        tracker = LLMCallTracker(model_name, "invoke")
         
         # 根据模型名称确定模型类型和配置
         if model_name.startswith('gpt-'):
@@ -89,6 +101,7 @@ async def process_full_agent_request(
             llm = ChatOpenAI(
                 model=model_name,
                 api_key=api_key,
+                base_url=settings.LLM_BASE_URL,
                 temperature=0.7
             )
         elif model_name.startswith('deepseek-'):
@@ -96,7 +109,7 @@ async def process_full_agent_request(
             llm = ChatOpenAI(
                 model=model_name,
                 api_key=api_key,
-                base_url="https://api.deepseek.com/v1",
+                base_url=settings.LLM_BASE_URL or "https://api.deepseek.com/v1",
                 temperature=0.7
             )
         elif model_name.startswith('doubao-'):
@@ -104,7 +117,7 @@ async def process_full_agent_request(
             llm = ChatOpenAI(
                 model=model_name,
                 api_key=api_key,
-                base_url="https://ark.cn-beijing.volces.com/api/v3",
+                base_url=settings.LLM_BASE_URL or "https://ark.cn-beijing.volces.com/api/v3",
                 temperature=0.7
             )
         else:
@@ -112,6 +125,7 @@ async def process_full_agent_request(
             llm = ChatOpenAI(
                 model=model_name,
                 api_key=api_key,
+                base_url=settings.LLM_BASE_URL,
                 temperature=0.7
             )
         
@@ -145,7 +159,8 @@ async def process_full_agent_request(
         )
         
         # 执行对话链
-        response_content = await chain.ainvoke(messages)
+        response_content = await chain.ainvoke(messages, config={"callbacks": [tracker]})
+        await tracker.finish(response_content)
         
         # 更新聊天历史
         updated_history = chat_history.copy()
@@ -158,6 +173,8 @@ async def process_full_agent_request(
         }
     except Exception as e:
         print(f"AI模型调用失败: {str(e)}")
+        if tracker is not None:
+            await tracker.finish(error=e)
         # 如果AI模型调用失败，回退到简化响应
         return process_simple_request(input_text, chat_history)
 
@@ -182,49 +199,42 @@ async def process_streaming_request(
     Yields:
         流式响应的JSON字符串
     """
+    tracker = None
     try:
         # 根据模型名称确定模型类型和配置
         llm = None
         
         # 如果没有指定model_name，使用默认值
         if not model_name:
-            model_name = "gpt-3.5-turbo"  # 默认使用OpenAI模型
+            model_name = DEFAULT_MODEL  # 默认使用OpenAI模型
+        
+        # 记录本次调用的首token耗时、总耗时和用量
+        tracker = LLMCallTracker(model_name, "stream")
         
         # 根据模型名称确定模型类型和配置
         if model_name.startswith('gpt-'):
             # OpenAI模型
-            llm = ChatOpenAI(
-                model=model_name,
-                api_key=api_key,
-                temperature=0.7,
-                streaming=True
-            )
+            base_url = settings.LLM_BASE_URL
         elif model_name.startswith('deepseek-'):
             # DeepSeek模型
-            llm = ChatOpenAI(
-                model=model_name,
-                api_key=api_key,
-                base_url="https://api.deepseek.com/v1",
-                temperature=0.7,
-                streaming=True
-            )
+            base_url = settings.LLM_BASE_URL or "https://api.deepseek.com/v1"
         elif model_name.startswith('doubao-'):
             # 豆包模型
-            llm = ChatOpenAI(
-                model=model_name,
-                api_key=api_key,
-                base_url="https://ark.cn-beijing.volces.com/api/v3",
-                temperature=0.7,
-                streaming=True
-            )
+            base_url = settings.LLM_BASE_URL or "https://ark.cn-beijing.volces.com/api/v3"
         else:
             # 其他模型，尝试使用OpenAI兼容的API
-            llm = ChatOpenAI(
-                model=model_name,
-                api_key=api_key,
-                temperature=0.7,
-                streaming=True
-            )
+            base_url = settings.LLM_BASE_URL
+        
+        # 单独创建异步客户端，结束或被取消时关闭，断开到大模型服务的连接
+        client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url)
+        llm = ChatOpenAI(
+            model=model_name,
+            api_key=api_key,
+            base_url=base_url,
+            temperature=0.7,
+            streaming=True,
+            async_client=tracker.wrap_completions(client.chat.completions)
+        )
         
         # 准备聊天历史消息
         messages = []
@@ -260,14 +270,30 @@ async def process_streaming_request(
         updated_history.append({"role": "user", "content": input_text})
         
         # 流式获取响应
-        full_response = ""
-        async for chunk in chain.astream(messages):
-            full_response += chunk
-            # 生成包含当前片段的JSON
-            yield json.dumps({
-                "chunk": chunk,
-                "done": False
-            })
+        parts = []
+        try:
+            try:
+                async for chunk in chain.astream(messages, config={"callbacks": [tracker]}):
+                    parts.append(chunk)
+                    # 生成包含当前片段的JSON
+                    yield json.dumps({
+                        "chunk": chunk,
+                        "done": False
+                    })
+            finally:
+                # 调用方提前关闭生成器（客户端断开）时，LangChain和openai内部嵌套的流不会随之关闭，
+                # 关闭客户端才能断开上游连接，停止继续生成。
+                # 断开时所在的取消域已被取消，其中的await可能直接抛出CancelledError，屏蔽取消才能确保客户端被关闭
+                with anyio.CancelScope(shield=True):
+                    await client.close()
+        except (GeneratorExit, anyio.get_cancelled_exc_class()):
+            # 客户端断开：生成器被关闭（GeneratorExit）或等待上游时所在的任务被取消，记为取消的调用
+            with anyio.CancelScope(shield=True):
+                await tracker.finish("".join(parts), cancelled=True)
+            raise
+        full_response = "".join(parts)
+        
+        await tracker.finish(full_response)
         
         # 更新聊天历史（添加AI响应）
         updated_history.append({"role": "assistant", "content": full_response})
@@ -280,6 +306,8 @@ async def process_streaming_request(
         })
     except Exception as e:
         print(f"AI模型流式调用失败: {str(e)}")
+        if tracker is not None:
+            await tracker.finish(error=e)
         # 如果AI模型调用失败，回退到简化响应
         response = process_simple_request(input_text, chat_history)
         yield json.dumps({
@@ -0,0 +1,180 @@
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+
+
+# 流式调用的准入指标，随请求指标一起从/metrics导出
+llm_stream_active = metrics.Gauge("llm_stream_active", "正在进行的流式大模型调用数", ("provider",))
+llm_stream_queue_depth = metrics.Gauge("llm_stream_queue_depth", "等待并发名额的流式请求数", ("provider",))
+llm_stream_queue_wait = metrics.Histogram(
+    "llm_stream_queue_wait_seconds", "流式请求获得并发名额前的等待时间", metrics.LATENCY_BUCKETS, ("provider",)
+)
+llm_stream_rejected = metrics.CounterMetric(
+    "llm_stream_rejected_total", "队列已满或等待超时被拒绝的流式请求数", ("provider", "reason")
+)
+llm_stream_cancelled = metrics.CounterMetric(
+    "llm_stream_cancelled_total", "客户端断开后取消的上游流式调用数", ("provider",)
+)
+metrics.REGISTRY.extend([
+    llm_stream_active, llm_stream_queue_depth, llm_stream_queue_wait, llm_stream_rejected, llm_stream_cancelled
+])
+
+
+class StreamRejected(Exception):
+    """没有拿到并发名额，接口应返回429"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class StreamSlot:
+    """一个并发名额，release可以重复调用"""
+
+    def __init__(self, limiter: "StreamLimiter", provider: str):
+        self.limiter = limiter
+        self.provider = provider
+        self.started = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter._release(self.provider, time.perf_counter() - self.started)
+
+
+class StreamLimiter:
+    """
+    流式大模型调用的准入控制
+
+    全局和每个服务商各有并发上限，达到上限的请求按到达顺序排队；某个服务商已满时不挡住其他服务商的请求。
+    队列已满或排队超过queue_timeout时立即拒绝，由接口返回429和Retry-After，
+    避免突发请求同时打开大量上游连接并各自缓存完整回复。
+    只在事件循环中使用，不需要加锁；多进程部署时上限按worker分别计算。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        provider_concurrency: int,
+        provider_limits: Optional[Dict[str, int]] = None,
+        queue_size: int = 64,
+        queue_timeout: float = 10.0,
+        expected_seconds: float = 10.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.provider_concurrency = provider_concurrency
+        self.provider_limits = provider_limits or {}
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        # 调用时长的指数移动平均，用于估算Retry-After
+        self.average_seconds = expected_seconds
+
+        self._active: Counter = Counter()
+        self._active_total = 0
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+
+    def limit_of(self, provider: str) -> int:
+        return min(self.provider_limits.get(provider, self.provider_concurrency), self.max_concurrency)
+
+    def retry_after(self) -> int:
+        """按平均调用时长和排在前面的请求数估算可重试的秒数，至少1秒"""
+        return max(1, math.ceil(self.average_seconds * (len(self._waiters) + 1) / self.max_concurrency))
+
+    def status(self) -> Dict[str, Dict[str, int]]:
+        queued = Counter(provider for provider, _ in self._waiters)
+        return {
+            provider: {"active": self._active[provider], "queued": queued[provider], "limit": self.limit_of(provider)}
+            for provider in sorted(set(self._active) | set(queued))
+        }
+
+    async def acquire(self, provider: str) -> StreamSlot:
+        """
+        获取并发名额
+
+        Raises:
+            StreamRejected: 队列已满或排队超时
+        """
+        future = asyncio.get_running_loop().create_future()
+        entry = (provider, future)
+        self._waiters.append(entry)
+        self._dispatch()
+        if future.done():
+            return StreamSlot(self, provider)
+
+        if len(self._waiters) > self.queue_size:
+            self._waiters.remove(entry)
+            self._update_gauges()
+            llm_stream_rejected.inc(1, provider, "queue_full")
+            raise StreamRejected("queue_full", self.retry_after())
+
+        self._update_gauges()
+        began = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(entry)
+            llm_stream_rejected.inc(1, provider, "timeout")
+            raise StreamRejected("timeout", self.retry_after())
+        except asyncio.CancelledError:
+            # 排队期间客户端断开；名额可能刚好已经分配
+            if future.done() and not future.cancelled():
+                StreamSlot(self, provider).release()
+            else:
+                self._discard(entry)
+            raise
+        llm_stream_queue_wait.observe(time.perf_counter() - began, provider)
+        return StreamSlot(self, provider)
+
+    def _discard(self, entry: Tuple[str, asyncio.Future]) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+        self._update_gauges()
+
+    def _release(self, provider: str, seconds: float) -> None:
+        self._active[provider] -= 1
+        self._active_total -= 1
+        self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """按到达顺序分配空出的名额，跳过已满的服务商"""
+        full = set()
+        for entry in list(self._waiters):
+            if self._active_total >= self.max_concurrency:
+                break
+            provider, future = entry
+            if future.done():
+                self._waiters.remove(entry)
+                continue
+            if provider in full or self._active[provider] >= self.limit_of(provider):
+                full.add(provider)
+                continue
+            self._waiters.remove(entry)
+            self._active[provider] += 1
+            self._active_total += 1
+            future.set_result(None)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        for provider, item in self.status().items():
+            llm_stream_active.set(item["active"], provider)
+            llm_stream_queue_depth.set(item["queued"], provider)
+
+
+stream_limiter = StreamLimiter(
+    max_concurrency=settings.LLM_STREAM_MAX_CONCURRENCY,
+    provider_concurrency=settings.LLM_STREAM_PROVIDER_CONCURRENCY,
+    provider_limits=settings.LLM_STREAM_PROVIDER_LIMITS,
+    queue_size=settings.LLM_STREAM_QUEUE_SIZE,
+    queue_timeout=settings.LLM_STREAM_QUEUE_TIMEOUT,
+    expected_seconds=settings.LLM_STREAM_EXPECTED_SECONDS
+)
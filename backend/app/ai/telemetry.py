@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.llm_call import LLMCall
+
+
+logger = logging.getLogger(__name__)
+
+
+# 大模型调用的指标，随请求指标一起从/metrics导出
+LLM_LABELS = ("provider", "model", "mode", "status")
+
+llm_latency = metrics.Histogram(
+    "llm_call_duration_seconds", "大模型调用总耗时", metrics.LATENCY_BUCKETS + (30.0, 60.0), LLM_LABELS
+)
+llm_ttft = metrics.Histogram(
+    "llm_time_to_first_token_seconds", "流式调用收到首个token的耗时", metrics.LATENCY_BUCKETS, LLM_LABELS[:3]
+)
+llm_tokens = metrics.CounterMetric(
+    "llm_tokens_total", "大模型调用的token数", ("provider", "model", "kind")
+)
+llm_fallbacks = metrics.CounterMetric(
+    "llm_fallback_total", "大模型调用失败回退到简化响应的次数", ("provider", "model", "mode")
+)
+metrics.REGISTRY.extend([llm_latency, llm_ttft, llm_tokens, llm_fallbacks])
+
+
+def provider_of(model_name: str) -> str:
+    """按模型名前缀判断服务商，与agent中选择base_url的规则一致"""
+    if model_name.startswith("gpt-"):
+        return "openai"
+    if model_name.startswith("deepseek-"):
+        return "deepseek"
+    if model_name.startswith("doubao-"):
+        return "doubao"
+    return "openai-compatible"
+
+
+def estimate_cost(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> Optional[float]:
+    """按配置的每百万token单价估算费用"""
+    pricing = settings.LLM_PRICING.get(model)
+    if not pricing or prompt_tokens is None or completion_tokens is None:
+        return None
+    return round((prompt_tokens * pricing[0] + completion_tokens * pricing[1]) / 1_000_000, 6)
+
+
+class LLMCallTracker(AsyncCallbackHandler):
+    """
+    记录单次大模型调用的LangChain回调
+
+    作为callbacks传给chain，从回调中取得首个token的时间和接口返回的token用量；
+    调用结束后调用finish写入指标和llm_calls表。
+    """
+
+    def __init__(self, model: str, mode: str):
+        self.provider = provider_of(model)
+        self.model = model
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.usage: Dict[str, int] = {}
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.first_token_at is None and token:
+            self.first_token_at = time.perf_counter()
+
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        # 流式调用时LangChain不带llm_output，用量由UsageReportingCompletions从最后一个数据块取得
+        self.add_usage((response.llm_output or {}).get("token_usage") or {})
+
+    def add_usage(self, usage: Dict[str, Any]) -> None:
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if usage.get(key) is not None:
+                self.usage[key] = self.usage.get(key, 0) + int(usage[key])
+
+    def wrap_completions(self, completions: Any) -> "UsageReportingCompletions":
+        """包装openai客户端的chat.completions，作为ChatOpenAI的async_client，记录流式调用的用量"""
+        return UsageReportingCompletions(completions, self)
+
+    async def finish(
+        self, output: str = "", error: Optional[BaseException] = None, cancelled: bool = False
+    ) -> Dict[str, Any]:
+        """
+        结束计时并记录调用
+
+        Args:
+            output: 模型输出的文本，取消时为已收到的部分
+            error: 调用失败时的异常，此时记为回退到简化响应
+            cancelled: 客户端断开导致调用被取消
+        """
+        now = time.perf_counter()
+        status = "fallback" if error is not None else "cancelled" if cancelled else "ok"
+        prompt_tokens = self.usage.get("prompt_tokens")
+        completion_tokens = self.usage.get("completion_tokens")
+        record = {
+            "provider": self.provider,
+            "model": self.model,
+            "mode": self.mode,
+            "status": status,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": self.usage.get("total_tokens"),
+            "cost": estimate_cost(self.model, prompt_tokens, completion_tokens),
+            "ttft_ms": round((self.first_token_at - self.started) * 1000, 2)
+            if self.mode == "stream" and self.first_token_at is not None else None,
+            "latency_ms": round((now - self.started) * 1000, 2),
+            "output_chars": len(output or ""),
+            "fallback": error is not None,
+            "error": str(error)[:500] if error is not None else None,
+        }
+        await record_call(record)
+        return record
+
+
+class UsageReportingCompletions:
+    """
+    openai异步chat.completions的包装
+
+    LangChain的流式调用不会把用量传给回调，这里在流式请求中加上stream_options.include_usage，
+    接口在最后一个（不含choices的）数据块中返回用量，转发数据块时把用量记到tracker上。
+    """
+
+    def __init__(self, completions: Any, tracker: LLMCallTracker):
+        self.completions = completions
+        self.tracker = tracker
+
+    async def create(self, **params: Any) -> Any:
+        if not params.get("stream"):
+            return await self.completions.create(**params)
+        if settings.LLM_STREAM_USAGE:
+            params.setdefault("stream_options", {"include_usage": True})
+        return self._relay(await self.completions.create(**params))
+
+    async def _relay(self, stream: Any) -> Any:
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None:
+                self.tracker.add_usage(usage.model_dump())
+            yield chunk
+
+
+def _observe(record: Dict[str, Any]) -> None:
+    labels = (record["provider"], record["model"], record["mode"])
+    llm_latency.observe(record["latency_ms"] / 1000, *labels, record["status"])
+    if record["ttft_ms"] is not None:
+        llm_ttft.observe(record["ttft_ms"] / 1000, *labels)
+    for kind in ("prompt", "completion"):
+        tokens = record[f"{kind}_tokens"]
+        if tokens:
+            llm_tokens.inc(tokens, record["provider"], record["model"], kind)
+    if record["fallback"]:
+        llm_fallbacks.inc(1, *labels)
+
+
+def _persist(record: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        db.add(LLMCall(**record))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def record_call(record: Dict[str, Any]) -> None:
+    """写入指标，并在线程池中写入llm_calls表，写入失败不影响对话"""
+    if not settings.LLM_TELEMETRY_ENABLED:
+        return
+    _observe(record)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _persist, record)
+    except Exception as e:
+        logger.warning("大模型调用记录写入失败: %s", e)
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(int(round(q * (len(values) - 1))), len(values) - 1)
+    return round(values[index], 2)
+
+
+def summarize(db: Session, since: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """
+    按服务商、模型和调用方式汇总调用记录
+
+    Returns:
+        每组的调用数、回退数、取消数、耗时和首token耗时的均值与分位数、token和费用合计，按平均耗时升序
+    """
+    query = select(
+        LLMCall.provider, LLMCall.model, LLMCall.mode, LLMCall.status, LLMCall.fallback,
+        LLMCall.latency_ms, LLMCall.ttft_ms, LLMCall.prompt_tokens, LLMCall.completion_tokens, LLMCall.cost
+    )
+    if since is not None:
+        query = query.where(LLMCall.created_at >= since)
+
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for provider, model, mode, status, fallback, latency, ttft, prompt, completion, cost in db.execute(query):
+        group = groups.setdefault((provider, model, mode), {
+            "calls": 0, "fallbacks": 0, "cancelled": 0, "latency": [], "ttft": [],
+            "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0,
+        })
+        cancelled = status == "cancelled"
+        group["calls"] += 1
+        group["fallbacks"] += int(bool(fallback))
+        group["cancelled"] += int(cancelled)
+        if not fallback:
+            # 取消的调用只持续到客户端断开，总耗时不计入分布，首token耗时仍然有效
+            if not cancelled:
+                group["latency"].append(latency)
+            if ttft is not None:
+                group["ttft"].append(ttft)
+        group["prompt_tokens"] += prompt or 0
+        group["completion_tokens"] += completion or 0
+        group["cost"] += cost or 0.0
+
+    summary = []
+    for (provider, model, mode), group in groups.items():
+        latency, ttft = group["latency"], group["ttft"]
+        summary.append({
+            "provider": provider,
+            "model": model,
+            "mode": mode,
+            "calls": group["calls"],
+            "fallbacks": group["fallbacks"],
+            "cancelled": group["cancelled"],
+            "latency_ms_avg": round(sum(latency) / len(latency), 2) if latency else None,
+            "latency_ms_p50": _percentile(latency, 0.5),
+            "latency_ms_p95": _percentile(latency, 0.95),
+            "ttft_ms_avg": round(sum(ttft) / len(ttft), 2) if ttft else None,
+            "ttft_ms_p50": _percentile(ttft, 0.5),
+            "ttft_ms_p95": _percentile(ttft, 0.95),
+            "prompt_tokens": group["prompt_tokens"],
+            "completion_tokens": group["completion_tokens"],
+            "cost": round(group["cost"], 6),
+        })
+    summary.sort(key=lambda item: (item["latency_ms_avg"] is None, item["latency_ms_avg"] or 0))
+    return summary
@@ -1,9 +1,15 @@
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, AsyncGenerator
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
-from app.ai.agent import handle_agent_request, process_streaming_request
+from app.ai.agent import DEFAULT_MODEL, handle_agent_request, process_streaming_request
+from app.ai import telemetry
+from app.ai.limits import StreamRejected, llm_stream_cancelled, stream_limiter
+from app.core.database import get_db
 
 router = APIRouter()
 
@@ -49,11 +55,14 @@ async def chat_with_agent(request: AgentRequest):
         raise HTTPException(status_code=500, detail=f"AI Agent处理失败: {str(e)}")
 
 # AI Agent 流式聊天端点 - 异步实现
-@router.post("/chat/stream")
+@router.post("/chat/stream", responses={429: {"description": "流式调用已达并发上限且排队已满或超时，按Retry-After重试"}})
 async def stream_chat_with_agent(request: AgentRequest):
     """
     与AI Agent进行流式聊天，支持工具调用和多轮对话
     
+    全局和每个服务商的同时调用数有上限，超过时排队，排队已满或超时返回429；
+    客户端断开后取消上游的流式调用。
+    
     Args:
         input: 用户输入文本
         chat_history: 聊天历史记录，格式为[{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
@@ -64,33 +73,60 @@ async def stream_chat_with_agent(request: AgentRequest):
     Returns:
         流式SSE响应，包含AI的实时回复
     """
+    provider = telemetry.provider_of(request.model_name or DEFAULT_MODEL)
+    try:
+        slot = await stream_limiter.acquire(provider)
+    except StreamRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="AI服务繁忙，请稍后重试",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    # 调用流式处理函数
+    stream = process_streaming_request(
+        input_text=request.input,
+        chat_history=request.chat_history,
+        model=request.model,
+        model_name=request.model_name,
+        api_key=request.api_key
+    )
+    finished = False
     
     # 异步生成器，产生SSE格式数据
     async def event_generator() -> AsyncGenerator[str, None]:
+        nonlocal finished
         try:
-            # 调用流式处理函数
-            async for chunk in process_streaming_request(
-                input_text=request.input,
-                chat_history=request.chat_history,
-                model=request.model,
-                model_name=request.model_name,
-                api_key=request.api_key
-            ):
+            async for chunk in stream:
                 # 格式化为SSE格式
                 yield f"data: {chunk}\n\n"
         except Exception as e:
             # 发送错误信息
             yield f"data: {{\"error\": \"{str(e)}\", \"done\": true}}\n\n"
+        finally:
+            slot.release()
+        finished = True
+    
+    events = event_generator()
+    
+    async def close_stream():
+        # 客户端断开时发送被取消，生成器停在yield处，在这里关闭它以取消上游的流式调用
+        if not finished:
+            llm_stream_cancelled.inc(1, provider)
+        await events.aclose()
+        await stream.aclose()
+        slot.release()
     
     # 返回流式响应
     return StreamingResponse(
-        event_generator(),
+        events,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "Access-Control-Allow-Origin": "*",
-        }
+        },
+        background=BackgroundTask(close_stream)
     )
 
 # AI 工具列表端点
@@ -118,6 +154,30 @@ def get_agent_tools():
         "count": len(tools_info)
     }
 
+# 大模型调用统计端点
+@router.get("/telemetry")
+def get_llm_telemetry(
+    days: int = Query(7, ge=1, le=365, description="统计最近多少天的调用"),
+    db: Session = Depends(get_db)
+):
+    """
+    按服务商和模型汇总大模型调用的耗时、首token耗时、token用量和回退次数
+    
+    Args:
+        days: 统计的天数
+    
+    Returns:
+        按平均耗时升序排列的各模型统计
+    """
+    try:
+        since = datetime.utcnow() - timedelta(days=days)
+        return {
+            "days": days,
+            "models": telemetry.summarize(db, since=since)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
 # 健康检查端点
 @router.get("/health")
 def agent_health_check():
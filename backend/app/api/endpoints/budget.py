@@ -0,0 +1,128 @@
+import asyncio
+import re
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.cache import CachedRoute, cache_response
+from app.core.database import get_db
+from app.services import budgets as budget_service
+from app import crud, schemas
+
+router = APIRouter(route_class=CachedRoute)
+
+# SSE保活注释的间隔秒数
+KEEPALIVE_SECONDS = 15
+
+
+# 获取预算执行情况
+@router.get("/status")
+def read_budget_status(
+    month: Optional[str] = Query(None, description="月份，格式YYYY-MM，默认为当月"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取各子类别预算的月内执行情况
+
+    月内支出由财务记录写入时增量累计，这里只读取预算表和该月的累计行，
+    耗时与记录数量无关。
+
+    Args:
+        month: 月份，默认为当月
+
+    Returns:
+        每个预算的已支出、剩余、比例、推算月末支出和状态
+    """
+    if month is not None and not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", month):
+        raise HTTPException(status_code=400, detail="月份格式应为YYYY-MM")
+    try:
+        return budget_service.get_status(db, month=month)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+
+# 订阅预算通知
+@router.get("/events")
+async def stream_budget_events(
+    request: Request,
+    last_event_id: Optional[int] = Header(None, description="断线重连时补发该ID之后的通知")
+):
+    """
+    以SSE推送预算通知：某个子类别的月内支出越过预算的通知比例时发送一条budget_threshold事件
+
+    Returns:
+        流式SSE响应
+    """
+    queue, backlog = budget_service.notifier.subscribe(last_event_id)
+
+    async def event_generator():
+        try:
+            # 先发送重连间隔，让客户端立即收到响应头
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield budget_service.format_sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield budget_service.format_sse(event)
+        finally:
+            budget_service.notifier.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        # 压缩中间件原样转发text/event-stream，事件不会积压在压缩缓冲区中
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }
+    )
+
+
+# 创建预算
+@router.post("/", response_model=schemas.Budget)
+def create_budget(
+    budget: schemas.BudgetCreate,
+    db: Session = Depends(get_db)
+):
+    if crud.budget.get_by_subcategory(db=db, subcategory=budget.subcategory):
+        raise HTTPException(status_code=400, detail="该子类别已设置预算")
+    return crud.budget.create(db=db, obj_in=budget)
+
+
+# 获取预算列表
+@router.get("/", response_model=List[schemas.Budget])
+@cache_response("budgets")
+def read_budgets(
+    db: Session = Depends(get_db)
+):
+    return crud.budget.get_multi(db=db)
+
+
+# 更新预算
+@router.put("/{budget_id}", response_model=schemas.Budget)
+def update_budget(
+    budget_id: int,
+    budget: schemas.BudgetUpdate,
+    db: Session = Depends(get_db)
+):
+    db_budget = crud.budget.get(db=db, id=budget_id)
+    if db_budget is None:
+        raise HTTPException(status_code=404, detail="预算未找到")
+    return crud.budget.update(db=db, db_obj=db_budget, obj_in=budget)
+
+
+# 删除预算
+@router.delete("/{budget_id}", response_model=schemas.Budget)
+def delete_budget(
+    budget_id: int,
+    db: Session = Depends(get_db)
+):
+    db_budget = crud.budget.get(db=db, id=budget_id)
+    if db_budget is None:
+        raise HTTPException(status_code=404, detail="预算未找到")
+    return crud.budget.remove(db=db, id=budget_id)
@@ -1,11 +1,18 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
+from app.core.cache import CachedRoute, cache_response
+from app.core.columnar import COLUMNAR_RESPONSES, negotiate
 from app.core.database import get_db
+from app.core.serialization import RowSerializer, serialize
 from app import crud, schemas
+from app.models.data import EmotionEntry
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# 列表接口的快速序列化，输出与schemas.Emotion一致
+emotion_rows = RowSerializer(schemas.Emotion, EmotionEntry, categorical=("sentiment",))
 
 
 # 创建情感记录
@@ -18,22 +25,28 @@ def create_emotion(
 
 
 # 获取情感记录列表
-@router.get("/", response_model=List[schemas.Emotion])
+@router.get("/", response_model=List[schemas.Emotion], responses=COLUMNAR_RESPONSES)
+@cache_response("emotion_entries", "emotion_entries_tags")
 def read_emotions(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     start_date: Optional[str] = Query(None, description="开始日期，格式YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期，格式YYYY-MM-DD"),
+    tags: Optional[List[str]] = Query(None, description="标签过滤，需同时包含全部标签"),
     db: Session = Depends(get_db)
 ):
-    emotions = crud.emotion.get_multi(
+    return serialize(
+        emotion_rows,
+        crud.emotion.get_multi,
+        media_type=negotiate(request.headers.get("accept")),
         db=db,
         skip=skip,
         limit=limit,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        tags=tags
     )
-    return emotions
 
 
 # 获取单个情感记录
@@ -1,11 +1,18 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
+from app.core.cache import CachedRoute, cache_response
+from app.core.columnar import COLUMNAR_RESPONSES, negotiate
 from app.core.database import get_db
+from app.core.serialization import RowSerializer, serialize
 from app import crud, schemas
+from app.models.data import FinanceEntry
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# 列表接口的快速序列化，输出与schemas.Finance一致
+finance_rows = RowSerializer(schemas.Finance, FinanceEntry, categorical=("category", "subcategory"))
 
 
 # 创建财务记录
@@ -18,28 +25,32 @@ def create_finance(
 
 
 # 获取财务记录列表
-@router.get("/", response_model=List[schemas.Finance])
+@router.get("/", response_model=List[schemas.Finance], responses=COLUMNAR_RESPONSES)
+@cache_response("finance_entries", "finance_entries_tags")
 def read_finances(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     start_date: Optional[str] = Query(None, description="开始日期，格式YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期，格式YYYY-MM-DD"),
     category: Optional[str] = Query(None, description="财务类别：income或expense"),
+    tags: Optional[List[str]] = Query(None, description="标签过滤，需同时包含全部标签"),
+    anomalies_only: bool = Query(False, description="只返回写入时被标记为异常的记录"),
     db: Session = Depends(get_db)
 ):
-    finances = crud.finance.get_multi(
+    return serialize(
+        finance_rows,
+        crud.finance.get_multi,
+        media_type=negotiate(request.headers.get("accept")),
         db=db,
         skip=skip,
         limit=limit,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        category=category,
+        tags=tags,
+        anomalies_only=anomalies_only
     )
-    
-    # 类别过滤
-    if category:
-        finances = [f for f in finances if f.category == category]
-    
-    return finances
 
 
 # 获取单个财务记录
@@ -1,15 +1,35 @@
 from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, and_
 
+from app.core import columnar
+from app.core.cache import CachedRoute, cache_response
 from app.core.database import get_db
 from app.models.data import EmotionEntry, FinanceEntry, SkillEntry, LearningEntry
+from app.services import daily_data
+from app.services import series as series_service
+from app.services import correlations as correlations_service
+from app.services import recurring as recurring_service
+from app.services import skill_progress as skill_progress_service
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# 列式响应的列类型
+LEARNING_STATS_COLUMNS = {
+    "skill_id": "int64",
+    "skill_name": "string",
+    "total_duration": "int64",
+    "learning_count": "int64",
+    "first_date": "date",
+    "last_date": "date",
+}
+SERIES_COLUMNS = {"metric": "category", "x": "date", "y": "float64"}
 
 # 获取技能及其相关学习记录
 @router.get("/skills-with-learnings/{skill_id}")
+@cache_response("skill_entries", "learning_entries")
 def get_skill_with_learnings(
     skill_id: int,
     db: Session = Depends(get_db)
@@ -60,129 +80,277 @@ def get_skill_with_learnings(
 
 # 获取按日期关联的多域数据
 @router.get("/data-by-date")
+@cache_response("emotion_entries", "finance_entries", "learning_entries", "skill_entries")
 def get_data_by_date(
     start_date: str = Query(..., description="开始日期，格式YYYY-MM-DD"),
     end_date: str = Query(..., description="结束日期，格式YYYY-MM-DD"),
-    db: Session = Depends(get_db)
+    fields: Optional[List[str]] = Query(
+        None,
+        description="只返回指定字段，如finances.amount或tags（作用于所有域），可逗号分隔，id总是返回"
+    ),
+    summary_only: bool = Query(False, description="只返回每天各域的统计值，不返回记录")
 ):
     """
     获取指定日期范围内的多域关联数据（情感、财务、学习）
+
+    只查询需要的列（Core select，不创建ORM对象），三个域按日期有序查询后归并，
+    按天流式输出JSON，内存中只保留当天的数据。
+
+    Args:
+        start_date: 开始日期
+        end_date: 结束日期
+        fields: 字段投影，可选
+        summary_only: 是否只返回每日统计
+
+    Returns:
+        按日期分组的多域数据
+    """
+    try:
+        from datetime import datetime
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        selected_fields = daily_data.resolve_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"参数错误: {str(e)}")
+
+    return StreamingResponse(
+        daily_data.stream_json(
+            start_date,
+            end_date,
+            start,
+            end,
+            fields=selected_fields,
+            summary_only=summary_only
+        ),
+        media_type="application/json"
+    )
+
+# 获取学习与技能的关联统计
+@router.get("/learning-skill-stats", responses=columnar.COLUMNAR_RESPONSES)
+@cache_response("skill_entries", "learning_entries")
+def get_learning_skill_stats(
+    request: Request,
+    start_date: Optional[str] = Query(None, description="开始日期，格式YYYY-MM-DD，不传则不限"),
+    end_date: Optional[str] = Query(None, description="结束日期，格式YYYY-MM-DD，不传则不限"),
+    verify: bool = Query(False, description="同时直接连接学习记录重新计算并返回差异"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取学习与技能的关联统计数据
+    
+    不限日期时读取增量维护的技能累计表，限定日期时汇总每日预聚合表，
+    都不需要连接全部学习记录。
+    Accept为Arrow或MessagePack时按列返回stats，不含校验结果。
     
     Args:
         start_date: 开始日期
         end_date: 结束日期
+        verify: 是否校验，校验会做一次全量连接查询
     
     Returns:
-        按日期分组的多域数据
+        技能学习时长统计数据，verify为True时附带校验结果
     """
+    from datetime import datetime
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="日期格式应为YYYY-MM-DD")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+
+    try:
+        stats = skill_progress_service.learning_stats(db, start, end)
+        media_type = columnar.negotiate(request.headers.get("accept"))
+        if media_type:
+            return columnar.response(media_type, columnar.from_records(LEARNING_STATS_COLUMNS, stats))
+        response: Dict[str, Any] = {"stats": stats}
+        if verify:
+            mismatches = skill_progress_service.diff_learning_stats(
+                stats, skill_progress_service.recount_learning_stats(db, start, end)
+            )
+            response["verification"] = {"consistent": not mismatches, "mismatches": mismatches}
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+# 获取图表用的分桶聚合序列
+@router.get("/series", responses=columnar.COLUMNAR_RESPONSES)
+@cache_response("emotion_entries", "finance_entries", "learning_entries")
+def get_series(
+    request: Request,
+    start_date: str = Query(..., description="开始日期，格式YYYY-MM-DD"),
+    end_date: str = Query(..., description="结束日期，格式YYYY-MM-DD"),
+    metrics: List[str] = Query(
+        ["spend", "income", "learning_minutes", "sentiment"],
+        description="指标：spend, income, learning_minutes, sentiment"
+    ),
+    bucket: str = Query("day", description="分桶粒度：day, week, month"),
+    points: Optional[int] = Query(None, ge=3, le=5000, description="每个指标最多返回的点数，超出时降采样"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取按日/周/月分桶的聚合序列，聚合在数据库中完成，不返回原始记录
+
+    Args:
+        start_date: 开始日期
+        end_date: 结束日期
+        metrics: 指标列表
+        bucket: 分桶粒度
+        points: 每个指标最多返回的点数，使用LTTB算法降采样
+
+    Returns:
+        每个指标的x（分桶起始日期）和y（聚合值）数组；
+        Accept为Arrow或MessagePack时为metric、x、y三列的长表
+    """
+    if bucket not in series_service.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"不支持的分桶粒度: {bucket}")
+    unknown = [metric for metric in metrics if metric not in series_service.METRICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"不支持的指标: {', '.join(unknown)}")
+
     try:
-        # 转换日期格式
         from datetime import datetime
         start = datetime.strptime(start_date, "%Y-%m-%d").date()
         end = datetime.strptime(end_date, "%Y-%m-%d").date()
-        
-        # 查询所有数据
-        emotions = db.query(EmotionEntry).filter(
-            and_(EmotionEntry.date >= start, EmotionEntry.date <= end)
-        ).all()
-        
-        finances = db.query(FinanceEntry).filter(
-            and_(FinanceEntry.date >= start, FinanceEntry.date <= end)
-        ).all()
-        
-        learnings = db.query(LearningEntry).options(
-            joinedload(LearningEntry.skill)
-        ).filter(
-            and_(LearningEntry.date >= start, LearningEntry.date <= end)
-        ).all()
-        
-        # 按日期分组
-        date_groups: Dict[str, Dict[str, Any]] = {}
-        
-        # 添加情感数据
-        for emotion in emotions:
-            date_str = emotion.date.isoformat()
-            if date_str not in date_groups:
-                date_groups[date_str] = {"emotions": [], "finances": [], "learnings": []}
-            date_groups[date_str]["emotions"].append({
-                "id": emotion.id,
-                "content": emotion.content,
-                "sentiment": emotion.sentiment,
-                "sentiment_score": emotion.sentiment_score,
-                "tags": emotion.tags
-            })
-        
-        # 添加财务数据
-        for finance in finances:
-            date_str = finance.date.isoformat()
-            if date_str not in date_groups:
-                date_groups[date_str] = {"emotions": [], "finances": [], "learnings": []}
-            date_groups[date_str]["finances"].append({
-                "id": finance.id,
-                "amount": finance.amount,
-                "category": finance.category,
-                "subcategory": finance.subcategory,
-                "description": finance.description,
-                "tags": finance.tags
-            })
-        
-        # 添加学习数据
-        for learning in learnings:
-            date_str = learning.date.isoformat()
-            if date_str not in date_groups:
-                date_groups[date_str] = {"emotions": [], "finances": [], "learnings": []}
-            date_groups[date_str]["learnings"].append({
-                "id": learning.id,
-                "topic": learning.topic,
-                "duration": learning.duration,
-                "content": learning.content,
-                "skill_name": learning.skill.name if learning.skill else None,
-                "tags": learning.tags
-            })
-        
+
+        series = series_service.build_series(db, metrics, start, end, bucket=bucket, max_points=points)
+        media_type = columnar.negotiate(request.headers.get("accept"))
+        if media_type:
+            records = [
+                {"metric": metric, "x": x, "y": y}
+                for metric, values in series.items()
+                for x, y in zip(values["x"], values["y"])
+            ]
+            return columnar.response(media_type, columnar.from_records(SERIES_COLUMNS, records))
         return {
             "start_date": start_date,
             "end_date": end_date,
-            "data": date_groups
+            "bucket": bucket,
+            "series": series
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
 
-# 获取学习与技能的关联统计
-@router.get("/learning-skill-stats")
-def get_learning_skill_stats(
+# 获取跨域相关性分析
+@router.get("/correlations")
+@cache_response("emotion_entries", "finance_entries", "learning_entries", "skill_entries")
+def get_correlations(
+    start_date: str = Query(..., description="开始日期，格式YYYY-MM-DD"),
+    end_date: str = Query(..., description="结束日期，格式YYYY-MM-DD"),
+    target: str = Query("sentiment", description="目标指标：sentiment, spend, income, learning_minutes"),
+    max_lag: int = Query(7, ge=0, le=30, description="最大滞后天数"),
+    window: int = Query(30, ge=7, le=365, description="滑动相关的窗口天数"),
+    min_periods: int = Query(10, ge=3, description="计算相关系数所需的最少有效天数"),
+    top: int = Query(10, ge=1, le=50, description="返回相关性最强的特征数"),
     db: Session = Depends(get_db)
 ):
     """
-    获取学习与技能的关联统计数据
-    
+    分析目标指标与各域日序列（情绪、各子类别支出、各技能学习时长等）的相关性，
+    数据来自每日预聚合表，不扫描原始记录
+
+    Args:
+        start_date: 开始日期
+        end_date: 结束日期
+        target: 目标指标
+        max_lag: 最大滞后天数，正滞后表示特征领先目标
+        window: 滑动相关的窗口天数
+        min_periods: 计算相关系数所需的最少有效天数
+        top: 返回的特征数
+
     Returns:
-        技能学习时长统计数据
+        同日相关系数、最佳滞后效应和最强特征的滑动相关序列
     """
+    if target not in correlations_service.TARGETS:
+        raise HTTPException(status_code=400, detail=f"不支持的目标指标: {target}")
+
+    from datetime import datetime
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="日期格式应为YYYY-MM-DD")
+    if start > end:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+    if (end - start).days >= 3660:
+        raise HTTPException(status_code=400, detail="日期范围不能超过10年")
+
     try:
-        # 查询每个技能的总学习时长
-        result = db.query(
-            SkillEntry.name,
-            func.sum(LearningEntry.duration).label("total_duration"),
-            func.count(LearningEntry.id).label("learning_count")
-        ).join(
-            LearningEntry, LearningEntry.skill_id == SkillEntry.id,
-            isouter=True
-        ).group_by(
-            SkillEntry.id
-        ).all()
-        
-        # 构建响应
-        stats = [
-            {
-                "skill_name": row.name,
-                "total_duration": row.total_duration or 0,
-                "learning_count": row.learning_count or 0
-            } for row in result
-        ]
-        
         return {
-            "stats": stats
+            "start_date": start_date,
+            "end_date": end_date,
+            **correlations_service.analyze(
+                db, start, end,
+                target=target,
+                max_lag=max_lag,
+                window=window,
+                min_periods=min_periods,
+                top=top
+            )
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+# 获取周期性交易序列
+@router.get("/recurring")
+def get_recurring_series(
+    include_candidates: bool = Query(False, description="同时返回记录数不足或间隔不规律的分组"),
+    db: Session = Depends(get_db)
+):
+    """
+    获取识别出的周期性交易（订阅、工资等）
+
+    序列在财务记录写入时增量维护，这里只读取序列表。
+
+    Args:
+        include_candidates: 是否返回尚未判定为周期性的分组
+
+    Returns:
+        序列列表，包含典型金额、周期、下一次发生日期和置信度
+    """
+    try:
+        return {
+            "series": recurring_service.list_series(db, include_candidates=include_candidates)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+# 重建周期性交易序列
+@router.post("/recurring/rebuild")
+def rebuild_recurring_series(
+    db: Session = Depends(get_db)
+):
+    """
+    从全部财务记录批量重建周期性交易序列
+
+    Returns:
+        重建的序列数
+    """
+    try:
+        count = recurring_service.rebuild(db)
+        return {
+            "success": True,
+            "series_count": count
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建失败: {str(e)}")
+
+# 获取未来现金流预测
+@router.get("/cashflow/upcoming")
+def get_upcoming_cashflow(
+    days: int = Query(30, ge=1, le=366, description="预测的天数"),
+    db: Session = Depends(get_db)
+):
+    """
+    根据仍在进行的周期性交易推算未来一段时间的收支
+
+    Args:
+        days: 预测的天数
+
+    Returns:
+        预计发生的交易列表，以及预计收入、支出和净额
+    """
+    try:
+        return recurring_service.project_cashflow(db, days=days)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
@@ -1,11 +1,18 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
+from app.core.cache import CachedRoute, cache_response
+from app.core.columnar import COLUMNAR_RESPONSES, negotiate
 from app.core.database import get_db
+from app.core.serialization import RowSerializer, serialize
 from app import crud, schemas
+from app.models.data import LearningEntry
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# 列表接口的快速序列化，输出与schemas.Learning一致
+learning_rows = RowSerializer(schemas.Learning, LearningEntry)
 
 
 # 创建学习记录
@@ -18,24 +25,30 @@ def create_learning(
 
 
 # 获取学习记录列表
-@router.get("/", response_model=List[schemas.Learning])
+@router.get("/", response_model=List[schemas.Learning], responses=COLUMNAR_RESPONSES)
+@cache_response("learning_entries", "learning_entries_tags")
 def read_learnings(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     start_date: Optional[str] = Query(None, description="开始日期，格式YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="结束日期，格式YYYY-MM-DD"),
     skill_id: Optional[int] = Query(None, description="关联的技能ID"),
+    tags: Optional[List[str]] = Query(None, description="标签过滤，需同时包含全部标签"),
     db: Session = Depends(get_db)
 ):
-    learnings = crud.learning.get_multi(
+    return serialize(
+        learning_rows,
+        crud.learning.get_multi,
+        media_type=negotiate(request.headers.get("accept")),
         db=db,
         skip=skip,
         limit=limit,
         start_date=start_date,
         end_date=end_date,
-        skill_id=skill_id
+        skill_id=skill_id,
+        tags=tags
     )
-    return learnings
 
 
 # 获取单个学习记录
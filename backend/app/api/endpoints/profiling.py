@@ -0,0 +1,160 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, FileResponse
+
+from app.core.config import settings
+from app.core.profiling import profiler, to_collapsed, to_speedscope
+
+
+def require_profiling():
+    """未开启PROFILING_ENABLED时，剖析接口一律返回404"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="性能剖析未开启")
+
+
+router = APIRouter(dependencies=[Depends(require_profiling)])
+
+
+# 获取剖析状态
+@router.get("/status")
+def get_profiling_status():
+    """
+    获取持续采样器是否运行、采样间隔和待剖析的请求设置
+
+    Returns:
+        剖析状态
+    """
+    return profiler.status()
+
+
+# 开启或关闭持续采样
+@router.put("/sampler")
+def set_sampler(
+    enabled: bool = Query(..., description="是否开启持续采样"),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000, description="采样间隔，默认为PROFILING_INTERVAL_MS")
+):
+    """
+    开启或关闭持续采样，开启后所有请求的样本按路由累计
+
+    Args:
+        enabled: 是否开启
+        interval_ms: 采样间隔（毫秒）
+
+    Returns:
+        剖析状态
+    """
+    if enabled:
+        profiler.start(interval_ms)
+    else:
+        profiler.stop()
+    return profiler.status()
+
+
+# 对之后的请求做详细剖析
+@router.post("/arm")
+def arm_request_profiling(
+    path_prefix: str = Query(..., description="请求路径前缀，如/api/insights/data-by-date"),
+    count: int = Query(1, ge=0, le=100, description="剖析的请求个数，0表示取消")
+):
+    """
+    对之后路径匹配的若干个请求做详细剖析，效果与请求带X-Profile头相同，用于浏览器等无法添加请求头的场景
+
+    Args:
+        path_prefix: 请求路径前缀
+        count: 请求个数
+
+    Returns:
+        剖析状态
+    """
+    profiler.arm(path_prefix, count)
+    return profiler.status()
+
+
+# 获取各路由的采样汇总
+@router.get("/routes")
+def get_route_profiles(top: int = Query(5, ge=1, le=50, description="每个路由返回的自身耗时最多的函数数")):
+    """
+    获取持续采样器按路由累计的结果
+
+    Args:
+        top: 每个路由列出的函数数
+
+    Returns:
+        各路由的请求数、采样总耗时和自身耗时最多的函数
+    """
+    return {"routes": profiler.routes(top)}
+
+
+# 清空路由采样结果
+@router.delete("/routes")
+def reset_route_profiles():
+    """清空持续采样器累计的结果"""
+    profiler.reset()
+    return {"message": "已清空"}
+
+
+# 导出火焰图数据
+@router.get("/flamegraph")
+def get_flamegraph(
+    route: Optional[str] = Query(None, description="路由模板，如/api/finances/；为空时导出全部路由"),
+    method: Optional[str] = Query(None, description="请求方法"),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$", description="collapsed或speedscope"),
+    save: bool = Query(False, description="同时写入PROFILING_DIR")
+):
+    """
+    导出持续采样的结果，collapsed可交给flamegraph.pl，speedscope可直接在speedscope.app中打开
+
+    Args:
+        route: 路由模板，可选
+        method: 请求方法，可选
+        format: 输出格式
+        save: 是否同时保存为文件
+
+    Returns:
+        折叠栈文本或speedscope JSON
+    """
+    samples = profiler.aggregate(route, method)
+    if not samples:
+        raise HTTPException(status_code=404, detail="没有匹配的采样数据")
+    if save:
+        name = "routes" if route is None else f"{method or 'ALL'}{route}".replace("/", "_").strip("_")
+        profiler.save(name, samples)
+    if format == "speedscope":
+        return to_speedscope(samples, route or "all routes")
+    return PlainTextResponse(to_collapsed(samples))
+
+
+# 获取最近的单请求剖析记录
+@router.get("/requests")
+def get_request_profiles():
+    """
+    获取最近做过详细剖析的请求，最多保留50条
+
+    Returns:
+        剖析ID、路径、耗时和文件路径
+    """
+    return {"requests": list(profiler.recent)}
+
+
+# 下载单个请求的剖析结果
+@router.get("/requests/{profile_id}")
+def get_request_profile(
+    profile_id: str,
+    format: str = Query("speedscope", pattern="^(collapsed|speedscope)$", description="collapsed或speedscope")
+):
+    """
+    获取单个请求的剖析文件，剖析ID见响应头X-Profile-Id
+
+    Args:
+        profile_id: 剖析ID
+        format: 文件格式
+
+    Returns:
+        剖析文件
+    """
+    record = next((item for item in profiler.recent if item["id"] == profile_id), None)
+    if record is None or not os.path.exists(record["files"][format]):
+        raise HTTPException(status_code=404, detail="剖析记录不存在")
+    path = record["files"][format]
+    return FileResponse(path, filename=os.path.basename(path))
@@ -0,0 +1,128 @@
+from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db, engine
+from app.services import fulltext_search
+from app.services.semantic_search import SemanticIndexError, semantic_index
+
+router = APIRouter()
+
+
+# 语义搜索记录
+@router.get("/")
+def semantic_search(
+    q: str = Query(..., min_length=1, description="查询文本"),
+    k: int = Query(10, ge=1, le=100, description="返回结果数量"),
+    types: Optional[List[str]] = Query(None, description="记录类型：emotion, finance, learning"),
+    start_date: Optional[str] = Query(None, description="开始日期，格式YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期，格式YYYY-MM-DD")
+):
+    """
+    基于向量索引的语义搜索，覆盖情感内容、学习主题/内容和财务描述
+
+    Args:
+        q: 查询文本
+        k: 返回结果数量
+        types: 限定记录类型，可选
+        start_date: 开始日期，可选
+        end_date: 结束日期，可选
+
+    Returns:
+        按相似度排序的搜索结果
+    """
+    if not semantic_index.available:
+        raise HTTPException(status_code=503, detail="语义搜索未启用或未安装chromadb")
+
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+
+        hits = semantic_index.search(q, k=k, entry_types=types, start_date=start, end_date=end)
+        return {
+            "query": q,
+            "results": hits,
+            "count": len(hits)
+        }
+    except SemanticIndexError as e:
+        raise HTTPException(status_code=503, detail=f"语义索引暂不可用: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"搜索失败: {str(e)}")
+
+
+# 重建语义索引
+@router.post("/reindex")
+def rebuild_semantic_index(
+    db: Session = Depends(get_db)
+):
+    """
+    从数据库全量重建语义索引
+
+    Returns:
+        重建的记录数量
+    """
+    if not semantic_index.available:
+        raise HTTPException(status_code=503, detail="语义搜索未启用或未安装chromadb")
+
+    try:
+        total = semantic_index.rebuild(db)
+        return {
+            "status": "success",
+            "indexed": total
+        }
+    except SemanticIndexError as e:
+        raise HTTPException(status_code=503, detail=f"语义索引暂不可用: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建索引失败: {str(e)}")
+
+
+# 全文关键词搜索记录
+@router.get("/text")
+def text_search(
+    q: str = Query(..., min_length=1, description="查询关键词，多个词以空格分隔"),
+    types: Optional[List[str]] = Query(None, description="记录类型：emotion, finance, learning"),
+    start_date: Optional[str] = Query(None, description="开始日期，格式YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期，格式YYYY-MM-DD"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """
+    基于SQLite FTS5索引的关键词搜索，按相关度排序并返回高亮摘要；
+    trigram分词下少于3个字符的词（如两字中文词）改为LIKE匹配
+
+    Args:
+        q: 查询关键词，多个词之间为AND关系
+        types: 限定记录类型，可选
+        start_date: 开始日期，可选
+        end_date: 结束日期，可选
+        skip: 跳过的结果数量
+        limit: 返回结果数量
+
+    Returns:
+        按相关度排序的搜索结果，score为各记录类型内归一化到(0, 1]的相关度
+    """
+    if not fulltext_search.is_supported(engine):
+        raise HTTPException(status_code=503, detail="当前数据库不支持全文搜索")
+
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+
+        hits = fulltext_search.search(
+            db,
+            q,
+            entry_types=types,
+            start_date=start,
+            end_date=end,
+            limit=limit,
+            offset=skip
+        )
+        return {
+            "query": q,
+            "results": hits,
+            "count": len(hits)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"搜索失败: {str(e)}")
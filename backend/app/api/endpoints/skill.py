@@ -1,11 +1,21 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
+from app.core.cache import CachedRoute, cache_response
+from app.core.columnar import COLUMNAR_RESPONSES, negotiate
 from app.core.database import get_db
+from app.core.serialization import RowSerializer, serialize
 from app import crud, schemas
+from app.crud.skill_graph import SkillGraphCycleError
+from app.models.data import SkillEntry
+from app.services import skill_progress
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+# 列表接口的快速序列化，输出与schemas.Skill一致
+skill_rows = RowSerializer(schemas.Skill, SkillEntry, categorical=("category",))
 
 
 # 创建技能记录
@@ -18,20 +28,47 @@ def create_skill(
 
 
 # 获取技能记录列表
-@router.get("/", response_model=List[schemas.Skill])
+@router.get("/", response_model=List[schemas.Skill], responses=COLUMNAR_RESPONSES)
+@cache_response("skill_entries", "skill_entries_tags")
 def read_skills(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     category: Optional[str] = Query(None, description="技能类别"),
+    tags: Optional[List[str]] = Query(None, description="标签过滤，需同时包含全部标签"),
     db: Session = Depends(get_db)
 ):
-    skills = crud.skill.get_multi(
+    return serialize(
+        skill_rows,
+        crud.skill.get_multi,
+        media_type=negotiate(request.headers.get("accept")),
         db=db,
         skip=skip,
         limit=limit,
-        category=category
+        category=category,
+        tags=tags
     )
-    return skills
+
+
+# 按名称前缀或容错匹配查找技能
+@router.get("/search")
+@cache_response("skill_entries")
+def search_skill_names(
+    q: str = Query(..., min_length=1, description="技能名称或前缀"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    return crud.skill.search_names(db=db, query=q, limit=limit)
+
+
+# 按名称批量获取技能
+@router.get("/by-names", response_model=Dict[str, List[schemas.Skill]])
+@cache_response("skill_entries")
+def read_skills_by_names(
+    names: List[str] = Query(..., description="技能名称，忽略大小写和全半角"),
+    db: Session = Depends(get_db)
+):
+    return crud.skill.get_skills_by_names(db=db, names=names)
 
 
 # 获取单个技能记录
@@ -69,3 +106,92 @@ def delete_skill(
     if db_skill is None:
         raise HTTPException(status_code=404, detail="技能记录未找到")
     return crud.skill.remove(db=db, id=skill_id)
+
+
+# 获取技能的前置技能
+@router.get("/{skill_id}/prerequisites", response_model=List[schemas.Skill])
+@cache_response("skill_entries", "skill_edges")
+def read_skill_prerequisites(
+    skill_id: int,
+    direct_only: bool = Query(False, description="只返回直接前置技能，默认返回全部间接前置技能"),
+    db: Session = Depends(get_db)
+):
+    if crud.skill.get(db=db, id=skill_id) is None:
+        raise HTTPException(status_code=404, detail="技能记录未找到")
+    return crud.skill_graph.get_prerequisites(db=db, skill_id=skill_id, direct_only=direct_only)
+
+
+# 获取以该技能为前置的技能
+@router.get("/{skill_id}/dependents", response_model=List[schemas.Skill])
+@cache_response("skill_entries", "skill_edges")
+def read_skill_dependents(
+    skill_id: int,
+    direct_only: bool = Query(False, description="只返回直接依赖该技能的技能"),
+    db: Session = Depends(get_db)
+):
+    if crud.skill.get(db=db, id=skill_id) is None:
+        raise HTTPException(status_code=404, detail="技能记录未找到")
+    return crud.skill_graph.get_dependents(db=db, skill_id=skill_id, direct_only=direct_only)
+
+
+# 添加前置技能
+@router.post("/{skill_id}/prerequisites")
+def add_skill_prerequisite(
+    skill_id: int,
+    prerequisite: schemas.PrerequisiteCreate,
+    db: Session = Depends(get_db)
+):
+    if crud.skill.get(db=db, id=skill_id) is None or crud.skill.get(db=db, id=prerequisite.prerequisite_id) is None:
+        raise HTTPException(status_code=404, detail="技能记录未找到")
+    try:
+        created = crud.skill_graph.add_prerequisite(
+            db=db, skill_id=skill_id, prerequisite_id=prerequisite.prerequisite_id
+        )
+    except SkillGraphCycleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "created": created}
+
+
+# 删除前置技能
+@router.delete("/{skill_id}/prerequisites/{prerequisite_id}")
+def remove_skill_prerequisite(
+    skill_id: int,
+    prerequisite_id: int,
+    db: Session = Depends(get_db)
+):
+    if not crud.skill_graph.remove_prerequisite(db=db, skill_id=skill_id, prerequisite_id=prerequisite_id):
+        raise HTTPException(status_code=404, detail="前置关系不存在")
+    return {"success": True}
+
+
+# 获取技能的累计学习时长和进度曲线
+@router.get("/{skill_id}/progress")
+@cache_response("skill_entries", "skill_edges", "learning_entries", per_day=True)
+def read_skill_progress(
+    skill_id: int,
+    start_date: Optional[date] = Query(None, description="曲线开始日期，默认为结束日期前90天"),
+    end_date: Optional[date] = Query(None, description="曲线结束日期，默认为今天"),
+    db: Session = Depends(get_db)
+):
+    if crud.skill.get(db=db, id=skill_id) is None:
+        raise HTTPException(status_code=404, detail="技能记录未找到")
+    end = end_date or date.today()
+    start = start_date or end - timedelta(days=89)
+    if start > end:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+    if (end - start).days > 3660:
+        raise HTTPException(status_code=400, detail="日期范围不能超过10年")
+    return {
+        **skill_progress.get_progress(db, skill_id),
+        "history": skill_progress.history(db, skill_id, start, end),
+    }
+
+
+# 从学习记录全量重建技能进度
+@router.post("/progress/rebuild")
+def rebuild_skill_progress(db: Session = Depends(get_db)):
+    try:
+        result = skill_progress.rebuild(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建失败: {str(e)}")
+    return {"success": True, **result}
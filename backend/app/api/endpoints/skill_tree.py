@@ -0,0 +1,99 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.cache import CachedRoute, cache_response
+from app.core.database import get_db
+from app import crud, schemas
+
+router = APIRouter(route_class=CachedRoute)
+
+
+# 创建技能树
+@router.post("/", response_model=schemas.SkillTree)
+def create_skill_tree(
+    skill_tree: schemas.SkillTreeCreate,
+    db: Session = Depends(get_db)
+):
+    return crud.skill_tree.create(db=db, obj_in=skill_tree)
+
+
+# 获取技能树列表
+@router.get("/", response_model=List[schemas.SkillTree])
+@cache_response("skill_trees")
+def read_skill_trees(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    return crud.skill_tree.get_multi(db=db, skip=skip, limit=limit)
+
+
+# 获取单个技能树
+@router.get("/{tree_id}", response_model=schemas.SkillTree)
+def read_skill_tree(
+    tree_id: int,
+    db: Session = Depends(get_db)
+):
+    db_tree = crud.skill_tree.get(db=db, id=tree_id)
+    if db_tree is None:
+        raise HTTPException(status_code=404, detail="技能树未找到")
+    return db_tree
+
+
+# 获取技能树的图结构
+@router.get("/{tree_id}/graph")
+@cache_response("skill_trees", "skill_entries", "skill_edges")
+def read_skill_tree_graph(
+    tree_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    获取技能树的节点和边，供前端绘制
+
+    Args:
+        tree_id: 技能树ID
+
+    Returns:
+        技能树信息、节点列表（含前置链层级depth）和边列表（prerequisite或related）
+    """
+    db_tree = crud.skill_tree.get(db=db, id=tree_id)
+    if db_tree is None:
+        raise HTTPException(status_code=404, detail="技能树未找到")
+    try:
+        return {
+            "tree": {
+                "id": db_tree.id,
+                "name": db_tree.name,
+                "category": db_tree.category,
+                "description": db_tree.description
+            },
+            **crud.skill_graph.get_tree_graph(db=db, tree_id=tree_id)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+
+# 更新技能树
+@router.put("/{tree_id}", response_model=schemas.SkillTree)
+def update_skill_tree(
+    tree_id: int,
+    skill_tree: schemas.SkillTreeUpdate,
+    db: Session = Depends(get_db)
+):
+    db_tree = crud.skill_tree.get(db=db, id=tree_id)
+    if db_tree is None:
+        raise HTTPException(status_code=404, detail="技能树未找到")
+    return crud.skill_tree.update(db=db, db_obj=db_tree, obj_in=skill_tree)
+
+
+# 删除技能树
+@router.delete("/{tree_id}", response_model=schemas.SkillTree)
+def delete_skill_tree(
+    tree_id: int,
+    db: Session = Depends(get_db)
+):
+    db_tree = crud.skill_tree.get(db=db, id=tree_id)
+    if db_tree is None:
+        raise HTTPException(status_code=404, detail="技能树未找到")
+    return crud.skill_tree.remove(db=db, id=tree_id)
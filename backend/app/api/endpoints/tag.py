@@ -0,0 +1,91 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.cache import CachedRoute, cache_response
+from app.core.database import get_db
+from app import crud
+
+router = APIRouter(route_class=CachedRoute)
+
+
+# 获取标签使用次数统计
+@router.get("/")
+@cache_response(
+    "emotion_entries", "finance_entries", "skill_entries", "learning_entries",
+    "tags", "emotion_entries_tags", "finance_entries_tags", "skill_entries_tags", "learning_entries_tags"
+)
+def read_tag_counts(
+    types: Optional[List[str]] = Query(None, description="记录类型：emotion, finance, skill, learning"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    获取标签使用次数统计，直接从标签索引表聚合
+
+    Args:
+        types: 限定记录类型，可选
+        limit: 返回的标签数量
+
+    Returns:
+        按使用次数降序排列的标签列表
+    """
+    try:
+        return {
+            "tags": crud.tag.get_counts(db, entry_types=types, limit=limit)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+
+# 获取标签共现统计
+@router.get("/co-occurrence")
+@cache_response(
+    "emotion_entries", "finance_entries", "skill_entries", "learning_entries",
+    "tags", "emotion_entries_tags", "finance_entries_tags", "skill_entries_tags", "learning_entries_tags"
+)
+def read_tag_co_occurrence(
+    tag: Optional[str] = Query(None, description="指定标签时只返回与它共同出现的标签"),
+    types: Optional[List[str]] = Query(None, description="记录类型：emotion, finance, skill, learning"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    获取标签共现统计，即同一条记录上同时出现的标签对及次数
+
+    Args:
+        tag: 指定标签，可选
+        types: 限定记录类型，可选
+        limit: 返回的标签对数量
+
+    Returns:
+        按共现次数降序排列的标签对列表
+    """
+    try:
+        return {
+            "tag": tag,
+            "pairs": crud.tag.get_co_occurrence(db, tag=tag, entry_types=types, limit=limit)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+
+# 重建标签索引
+@router.post("/rebuild")
+def rebuild_tag_index(
+    db: Session = Depends(get_db)
+):
+    """
+    从各记录的tags字段重建标签索引
+
+    Returns:
+        处理的记录数量
+    """
+    try:
+        total = crud.tag.rebuild_index(db)
+        return {
+            "status": "success",
+            "processed": total
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建索引失败: {str(e)}")
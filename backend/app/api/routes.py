@@ -1,24 +1,40 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import emotion, finance, skill, learning, insights
+from app.api.endpoints import emotion, finance, budget, skill, skill_tree, learning, insights, search, tag
 
 router = APIRouter()
 
 # 注册情感相关路由
 router.include_router(emotion.router, prefix="/emotions", tags=["emotions"])
 
+# 注册预算路由，需在财务路由之前注册，避免/finances/budgets被/finances/{finance_id}匹配
+router.include_router(budget.router, prefix="/finances/budgets", tags=["budgets"])
+
 # 注册财务相关路由
 router.include_router(finance.router, prefix="/finances", tags=["finances"])
 
 # 注册技能相关路由
 router.include_router(skill.router, prefix="/skills", tags=["skills"])
 
+# 注册技能树路由
+router.include_router(skill_tree.router, prefix="/skill-trees", tags=["skill-trees"])
+
 # 注册学习相关路由
 router.include_router(learning.router, prefix="/learnings", tags=["learnings"])
 
 # 注册跨域数据关联查询路由
 router.include_router(insights.router, prefix="/insights", tags=["insights"])
 
+# 注册标签路由
+router.include_router(tag.router, prefix="/tags", tags=["tags"])
+
+# 注册搜索路由
+router.include_router(search.router, prefix="/search", tags=["search"])
+
+# 注册性能剖析路由，需开启PROFILING_ENABLED
+from app.api.endpoints import profiling
+router.include_router(profiling.router, prefix="/profiling", tags=["profiling"])
+
 # 启用AI Agent相关路由
 from app.api.endpoints import agent
 router.include_router(agent.router, prefix="/agent", tags=["agent"])
@@ -0,0 +1,378 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+from app.core import compression
+from app.core.columnar import negotiate
+from app.core.config import settings
+from app.core.shared_state import file_lock, shared_path
+
+
+class WriteVersions:
+    """
+    每张表的写入版本号
+
+    CRUD层每次提交写操作后调用bump，读缓存的键中包含依赖表的版本号，
+    因此数据变化后旧的缓存键自然不再命中，无需逐条失效。
+    """
+
+    def __init__(self):
+        # 进程启动标识，避免重启后版本号从0开始与磁盘缓存中的旧键冲突
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *tables: str) -> None:
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+
+class SharedWriteVersions(WriteVersions):
+    """
+    多进程共享的写入版本号
+
+    保存在内存映射文件中，各worker看到相同的进程启动标识和版本号，任一worker写入后
+    所有worker的缓存键都随之变化。表名按crc32映射到固定槽位，两张表落在同一槽位时
+    只会让彼此的缓存多失效一次，不会读到旧数据。递增时加跨进程锁，读取不加锁。
+    """
+
+    SLOTS = 256
+    _HEADER = 8  # 进程启动标识
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._offsets: Dict[str, int] = {}
+        size = self._HEADER + self.SLOTS * 8
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with file_lock(self._fd, self._lock):
+            # 第一个打开的进程初始化文件，之后的进程沿用其中的启动标识和版本号
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, uuid.uuid4().hex[:8].encode(), 0)
+        self._map = mmap.mmap(self._fd, size)
+        self.epoch = self._map[:self._HEADER].decode()
+
+    def _offset(self, table: str) -> int:
+        offset = self._offsets.get(table)
+        if offset is None:
+            offset = self._HEADER + zlib.crc32(table.encode()) % self.SLOTS * 8
+            self._offsets[table] = offset
+        return offset
+
+    def bump(self, *tables: str) -> None:
+        with file_lock(self._fd, self._lock):
+            for offset in {self._offset(table) for table in tables}:
+                struct.pack_into("<q", self._map, offset, struct.unpack_from("<q", self._map, offset)[0] + 1)
+
+    def get(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(struct.unpack_from("<q", self._map, self._offset(table))[0] for table in tables)
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: Optional[str]
+    etag: str
+    # 编码 -> 压缩后的响应体，只保存在内存中，从磁盘提升回内存后按需重新压缩
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+
+class ResponseCache:
+    """
+    GET响应缓存：内存LRU，可选磁盘二级缓存
+
+    内存按条数和总字节数淘汰；配置了磁盘目录时采用写穿透，
+    内存未命中会再查磁盘并提升回内存。多个worker共用磁盘目录时也会读到其他worker写入的文件，
+    每个进程按disk_max_bytes淘汰自己写入的文件。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            # 键中包含进程启动标识，上次运行留下的文件不会再命中
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".cache"):
+                    os.remove(os.path.join(self.disk_dir, name))
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.cache")
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        if not self.disk_dir:
+            return None
+
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                media_type, etag, body = f.read().split(b"\n", 2)
+        except (OSError, ValueError):
+            return None
+
+        entry = CachedResponse(body=body, media_type=media_type.decode() or None, etag=etag.decode())
+        self._put_memory(key, entry)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        if len(entry.body) > self.max_bytes:
+            return
+        self._put_memory(key, entry)
+        if self.disk_dir:
+            self._put_disk(key, entry)
+
+    def add_variant(self, key: str, encoding: str, data: bytes) -> None:
+        """为内存中的缓存条目保存压缩后的响应体，条目已被淘汰时忽略"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None or encoding in entry.variants:
+                return
+            entry.variants[encoding] = data
+            self._memory_bytes += len(data)
+            self._evict()
+
+    def _put_memory(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old.size
+            self._memory[key] = entry
+            self._memory_bytes += entry.size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._memory and (
+            len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    def _put_disk(self, key: str, entry: CachedResponse) -> None:
+        data = b"\n".join([(entry.media_type or "").encode(), entry.etag.encode(), entry.body])
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        evicted = []
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            while self._disk and self._disk_bytes > self.disk_max_bytes:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            try:
+                os.remove(self._disk_path(old_key))
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            keys = list(self._disk.keys())
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._disk.clear()
+            self._disk_bytes = 0
+        for key in keys:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+
+def _create_write_versions() -> WriteVersions:
+    path = shared_path("write_versions.bin")
+    return SharedWriteVersions(path) if path else WriteVersions()
+
+
+write_versions = _create_write_versions()
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+    disk_dir=settings.RESPONSE_CACHE_DIR,
+    disk_max_bytes=settings.RESPONSE_CACHE_DISK_MAX_MB * 1024 * 1024
+)
+
+
+def cache_response(*tables: str, per_day: bool = False) -> Callable:
+    """
+    标记GET端点可缓存，参数为端点结果依赖的表名
+
+    结果依赖当天日期（如省略日期参数时默认到今天）的端点传per_day=True，缓存键带上当天日期，
+    过了零点即使没有写入也不会继续返回前一天的结果。
+    需要所在路由使用CachedRoute作为route_class才会生效。
+    """
+    def decorator(func: Callable) -> Callable:
+        func.__cache_tables__ = tables
+        func.__cache_per_day__ = per_day
+        return func
+    return decorator
+
+
+def _cache_key(request: Request, tables: Tuple[str, ...], per_day: bool = False) -> str:
+    """缓存键：路由路径 + 排序后的查询参数 + 依赖表的写入版本 + 响应格式，per_day时再加当天日期"""
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    versions = ",".join(f"{table}:{version}" for table, version in zip(tables, write_versions.get(tables)))
+    # 同一地址按Accept可能返回JSON或列式格式，分开缓存
+    media_type = negotiate(request.headers.get("accept")) or "json"
+    raw = f"{write_versions.epoch}|{request.url.path}?{params}|{versions}|{media_type}"
+    if per_day:
+        raw += f"|{date.today().isoformat()}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def _encoded(request: Request, key: str, entry: CachedResponse) -> Tuple[bytes, Optional[str]]:
+    """
+    按Accept-Encoding取缓存条目的压缩变体，没有时压缩并保存
+
+    Returns:
+        响应体和编码，不压缩时编码为None
+    """
+    encoding = compression.negotiate(request.headers.get("accept-encoding"))
+    if encoding is None or len(entry.body) < settings.COMPRESSION_MINIMUM_SIZE:
+        return entry.body, None
+    data = entry.variants.get(encoding)
+    if data is None:
+        data = await compression.compress_async(encoding, entry.body, cached=True)
+        response_cache.add_variant(key, encoding, data)
+    return data, encoding
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def _tee_body(body_iterator: AsyncIterator, on_complete: Callable[[bytes], None]) -> AsyncIterator[bytes]:
+    """转发流式响应的数据块，同时收集完整响应体，超过缓存上限后放弃收集"""
+    chunks: Optional[List[bytes]] = []
+    size = 0
+    async for chunk in body_iterator:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if chunks is not None:
+            size += len(chunk)
+            if size > response_cache.max_bytes:
+                chunks = None
+            else:
+                chunks.append(chunk)
+        yield chunk
+    if chunks is not None:
+        on_complete(b"".join(chunks))
+
+
+class CachedRoute(APIRoute):
+    """
+    支持响应缓存和条件请求的路由类
+
+    命中If-None-Match时直接返回304，命中缓存时直接返回缓存的响应体，
+    两种情况都不会解析依赖（不创建数据库会话）也不会执行端点和序列化。
+    非流式响应按Accept-Encoding返回缓存条目中预先压缩的变体，压缩中间件不再重复压缩。
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        tables = getattr(self.endpoint, "__cache_tables__", None)
+        per_day = getattr(self.endpoint, "__cache_per_day__", False)
+        if tables is None or "GET" not in self.methods:
+            return handler
+
+        async def cached_route_handler(request: Request) -> Response:
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return await handler(request)
+
+            key = _cache_key(request, tables, per_day)
+            etag = f'W/"{key}"'
+            headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+
+            cached = response_cache.get(key)
+            if cached is not None:
+                body, encoding = await _encoded(request, key, cached)
+                if encoding:
+                    headers["Content-Encoding"] = encoding
+                return Response(content=body, media_type=cached.media_type, headers={**headers, "X-Cache": "HIT"})
+
+            response = await handler(request)
+            if response.status_code != 200:
+                return response
+
+            def store(body: bytes) -> Optional[CachedResponse]:
+                # 处理期间依赖表有写入时不缓存，避免把新旧混合的结果存到旧键下
+                if _cache_key(request, tables, per_day) != key:
+                    return None
+                entry = CachedResponse(body=body, media_type=response.media_type, etag=etag)
+                response_cache.set(key, entry)
+                return entry
+
+            if isinstance(response, StreamingResponse):
+                # 流式响应边发送边收集，发送完成后再写入缓存
+                response.body_iterator = _tee_body(response.body_iterator, store)
+            elif hasattr(response, "body"):
+                entry = store(response.body)
+                if entry is not None:
+                    body, encoding = await _encoded(request, key, entry)
+                    if encoding:
+                        # 直接返回压缩后的变体，下次命中时不必再压缩
+                        response.body = body
+                        response.headers["Content-Encoding"] = encoding
+                        response.headers["Content-Length"] = str(len(body))
+            else:
+                return response
+
+            response.headers.update({**headers, "X-Cache": "MISS"})
+            return response
+
+        return cached_route_handler
@@ -0,0 +1,193 @@
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Union, get_args, get_origin
+
+from fastapi import Response
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow为可选依赖，未安装时不提供Arrow格式
+    pa = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack为可选依赖，未安装时不提供MessagePack格式
+    msgpack = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/vnd.msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/msgpack")
+_JSON_TYPES = ("application/json", "application/*", "*/*")
+
+# 在OpenAPI中声明可选的响应格式，JSON部分仍由response_model生成
+COLUMNAR_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {
+        "content": {
+            ARROW_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            MSGPACK_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+        "description": "按Accept请求头返回JSON、Arrow IPC流或列式MessagePack",
+    }
+}
+
+_EPOCH = date(1970, 1, 1)
+_EPOCH_DATETIME = datetime(1970, 1, 1)
+_MICROSECOND = datetime(1970, 1, 1, 0, 0, 0, 1) - _EPOCH_DATETIME
+
+
+class Column(NamedTuple):
+    """
+    一列数据
+
+    kind: int64, float64, bool, string, category（字典编码的字符串）, date, timestamp,
+    list_string（字符串列表）, json（任意嵌套结构）
+    """
+    name: str
+    kind: str
+    values: Sequence[Any]
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    根据Accept请求头选择列式格式
+
+    按q值从高到低取第一个可用的格式；JSON或通配符排在前面、请求的格式依赖未安装时返回None，使用JSON。
+    """
+    if not accept or ("arrow" not in accept and "msgpack" not in accept):
+        return None
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        candidates.append((-quality, position, media_type.strip().lower()))
+    for negative_quality, _, media_type in sorted(candidates):
+        if negative_quality >= 0:
+            break
+        if media_type == ARROW_MEDIA_TYPE and pa is not None:
+            return ARROW_MEDIA_TYPE
+        if media_type in _MSGPACK_ALIASES and msgpack is not None:
+            return MSGPACK_MEDIA_TYPE
+        if media_type in _JSON_TYPES:
+            return None
+    return None
+
+
+def kind_of(annotation: Any) -> str:
+    """Pydantic字段类型对应的列类型"""
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    if get_origin(annotation) is Union and len(args) == 1:
+        annotation = args[0]
+    if annotation is bool:
+        return "bool"
+    if annotation is int:
+        return "int64"
+    if annotation is float:
+        return "float64"
+    if annotation is str:
+        return "string"
+    if annotation is datetime:
+        return "timestamp"
+    if annotation is date:
+        return "date"
+    if get_origin(annotation) in (list, List) and get_args(annotation) == (str,):
+        return "list_string"
+    return "json"
+
+
+def from_rows(names: Sequence[str], kinds: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[Column]:
+    """按列转置行元组"""
+    rows = list(rows)
+    values = list(zip(*rows)) if rows else [()] * len(names)
+    return [Column(name, kind, column) for name, kind, column in zip(names, kinds, values)]
+
+
+def from_records(kinds: Dict[str, str], records: Sequence[Dict[str, Any]]) -> List[Column]:
+    """按列取出字典列表中的值，kinds的顺序即列的顺序；date列接受ISO格式的字符串"""
+    columns = []
+    for name, kind in kinds.items():
+        values = [record.get(name) for record in records]
+        if kind == "date":
+            values = [date.fromisoformat(value) if isinstance(value, str) else value for value in values]
+        columns.append(Column(name, kind, values))
+    return columns
+
+
+def _arrow_array(column: Column):
+    values, kind = column.values, column.kind
+    if kind == "category":
+        return pa.array(values, type=pa.string()).dictionary_encode()
+    if kind == "json":
+        return pa.array(
+            [json.dumps(value, ensure_ascii=False) if value is not None else None for value in values],
+            type=pa.string()
+        )
+    types = {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "string": pa.string(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        "list_string": pa.list_(pa.string()),
+    }
+    return pa.array(values, type=types[kind])
+
+
+def to_arrow(columns: Sequence[Column]) -> bytes:
+    """编码为Arrow IPC流，json列编码为JSON字符串"""
+    table = pa.Table.from_arrays([_arrow_array(column) for column in columns], names=[c.name for c in columns])
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _msgpack_column(column: Column) -> Dict[str, Any]:
+    values, kind = column.values, column.kind
+    encoded: Dict[str, Any] = {"name": column.name, "type": kind}
+    if kind == "category":
+        dictionary: Dict[str, int] = {}
+        encoded["indices"] = [
+            None if value is None else dictionary.setdefault(value, len(dictionary)) for value in values
+        ]
+        encoded["dictionary"] = list(dictionary)
+    elif kind == "date":
+        # 距1970-01-01的天数
+        encoded["values"] = [None if value is None else (value - _EPOCH).days for value in values]
+    elif kind == "timestamp":
+        # 距1970-01-01 00:00:00的微秒数，不带时区
+        encoded["values"] = [
+            None if value is None else (value.replace(tzinfo=None) - _EPOCH_DATETIME) // _MICROSECOND
+            for value in values
+        ]
+    else:
+        encoded["values"] = list(values)
+    return encoded
+
+
+def to_msgpack(columns: Sequence[Column]) -> bytes:
+    """
+    编码为列式MessagePack
+
+    结构为{"length": 行数, "columns": [{"name", "type", "values"}]}；category列为
+    {"dictionary", "indices"}，date为天数，timestamp为微秒数。
+    """
+    length = len(columns[0].values) if columns else 0
+    return msgpack.packb(
+        {"length": length, "columns": [_msgpack_column(column) for column in columns]},
+        use_bin_type=True
+    )
+
+
+def response(media_type: str, columns: Sequence[Column]) -> Response:
+    """media_type为negotiate返回的格式"""
+    if media_type == ARROW_MEDIA_TYPE:
+        return Response(content=to_arrow(columns), media_type=ARROW_MEDIA_TYPE)
+    return Response(content=to_msgpack(columns), media_type=MSGPACK_MEDIA_TYPE)
@@ -0,0 +1,185 @@
+import zlib
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，未安装时不提供br编码
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖，未安装时不提供zstd编码
+    zstandard = None
+
+# 不压缩的响应类型：事件流压缩后会积压在压缩缓冲区中
+_SKIP_TYPES = ("text/event-stream",)
+
+
+def available() -> Tuple[str, ...]:
+    """按服务端偏好排列、依赖已安装的编码"""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return tuple(encoding for encoding in settings.COMPRESSION_ENCODINGS if installed.get(encoding))
+
+
+@lru_cache(maxsize=128)
+def _negotiate(accept_encoding: str, encodings: Tuple[str, ...]) -> Optional[str]:
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        # q值相同时保留服务端偏好靠前的编码
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    根据Accept-Encoding请求头选择压缩编码
+
+    按q值选择，q值相同时按COMPRESSION_ENCODINGS的顺序；没有可用编码时返回None，不压缩。
+    """
+    if not accept_encoding or not settings.COMPRESSION_ENABLED:
+        return None
+    return _negotiate(accept_encoding, available())
+
+
+def compress(encoding: str, body: bytes, cached: bool = False) -> bytes:
+    """
+    一次性压缩完整的响应体
+
+    cached为True时使用COMPRESSION_CACHED_LEVELS：缓存的变体只压缩一次，可以用更高的级别换取更小的体积。
+    """
+    levels = settings.COMPRESSION_CACHED_LEVELS if cached else settings.COMPRESSION_LEVELS
+    level = levels[encoding]
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+async def compress_async(encoding: str, body: bytes, cached: bool = False) -> bytes:
+    """超过COMPRESSION_OFFLOAD_BYTES的响应体在线程池中压缩，不阻塞事件循环（三种压缩库都会释放GIL）"""
+    if len(body) >= settings.COMPRESSION_OFFLOAD_BYTES:
+        return await to_thread.run_sync(compress, encoding, body, cached)
+    return compress(encoding, body, cached)
+
+
+class StreamCompressor:
+    """流式响应的增量压缩，compress返回的数据可能为空，finish返回剩余数据和结尾"""
+
+    def __init__(self, encoding: str):
+        level = settings.COMPRESSION_LEVELS[encoding]
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=level)
+            self.compress: Callable[[bytes], bytes] = compressor.process
+            self.finish: Callable[[], bytes] = compressor.finish
+        elif encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self.compress = compressor.compress
+            self.finish = compressor.flush
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self.compress = compressor.compress
+            self.finish = compressor.flush
+
+
+def set_encoding_headers(headers: MutableHeaders, encoding: str) -> None:
+    headers["Content-Encoding"] = encoding
+    # 缓存路由已经在Vary中声明了Accept-Encoding，add_vary_header不查重，重复追加会得到两个相同的值
+    vary = {token.strip().lower() for token in headers.get("vary", "").split(",")}
+    if "accept-encoding" not in vary and "*" not in vary:
+        headers.add_vary_header("Accept-Encoding")
+
+
+class CompressionMiddleware:
+    """
+    按Accept-Encoding以zstd、br或gzip压缩响应
+
+    纯ASGI中间件。已带Content-Encoding的响应（如CachedRoute返回的预压缩变体）和事件流原样转发；
+    完整响应体小于COMPRESSION_MINIMUM_SIZE时不压缩，超过COMPRESSION_OFFLOAD_BYTES时在线程池中压缩；
+    流式响应逐块增量压缩。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+        stream: Optional[StreamCompressor] = None
+
+        async def send_wrapper(message):
+            nonlocal start, passthrough, stream
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or headers.get("content-type", "").startswith(_SKIP_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None:
+                if not more_body:
+                    # 完整的响应体，一次性压缩
+                    if len(body) >= settings.COMPRESSION_MINIMUM_SIZE:
+                        body = await compress_async(encoding, body)
+                        headers = MutableHeaders(raw=start["headers"])
+                        set_encoding_headers(headers, encoding)
+                        headers["Content-Length"] = str(len(body))
+                        message = {"type": "http.response.body", "body": body}
+                    await send(start)
+                    await send(message)
+                    return
+
+                stream = StreamCompressor(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                set_encoding_headers(headers, encoding)
+                del headers["Content-Length"]
+                await send(start)
+
+            if len(body) >= settings.COMPRESSION_OFFLOAD_BYTES:
+                data = await to_thread.run_sync(stream.compress, body)
+            else:
+                data = stream.compress(body)
+            if not more_body:
+                data += stream.finish()
+            # 压缩器内部缓冲时不发送空块，最后一块总是发送
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -10,6 +10,11 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./app.db"
+    SQLITE_WAL_ENABLED: bool = True  # WAL模式下读写互不阻塞，多个worker进程同时访问时需要开启
+    
+    # 多进程部署配置
+    SHARED_STATE_DIR: Optional[str] = None  # 各worker共享写入版本号和预算通知的目录，为空时只在进程内有效；gunicorn.conf.py会自动设置
+    SHARED_STATE_POLL_SECONDS: float = 0.5  # 各worker检查其他worker发出的预算通知的间隔
     
     # 安全配置
     SECRET_KEY: str = "your-secret-key-here"
@@ -30,6 +35,65 @@ class Settings(BaseSettings):
     
     # ChromaDB配置
     CHROMA_DB_PATH: str = "./chroma_db"
+    SEMANTIC_SEARCH_ENABLED: bool = False  # 需要安装chromadb和sentence-transformers，开启后写入记录时在后台计算向量
+    EMBEDDING_MODEL: str = "paraphrase-multilingual-MiniLM-L12-v2"  # 支持中文的多语言嵌入模型
+    SEMANTIC_INDEX_BATCH_SIZE: int = 64  # 每批计算向量的记录数
+    
+    # 全文搜索配置
+    FTS_TOKENIZER: str = "trigram"  # trigram支持中文子串匹配，需要SQLite 3.34+；也可设为unicode61
+    
+    # 响应缓存配置
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_MAX_MB: int = 64  # 内存缓存总大小上限
+    RESPONSE_CACHE_DIR: Optional[str] = None  # 设置后启用磁盘二级缓存
+    RESPONSE_CACHE_DISK_MAX_MB: int = 256
+    
+    # 财务异常检测配置
+    FINANCE_ANOMALY_Z_THRESHOLD: float = 3.0  # 对数金额z分数绝对值超过该值视为异常
+    FINANCE_ANOMALY_MIN_SAMPLES: int = 8  # 子类别已有记录数少于该值时不做判断
+    
+    # 技能进度配置
+    SKILL_PROGRESS_AUTO: bool = False  # 开启后根据学习时长自动更新技能的progress和level，会覆盖手动设置的值；关闭时推算结果只在进度接口中返回
+    SKILL_MASTERY_MINUTES: int = 6000  # 进度达到100%所需的有效学习分钟数
+    SKILL_PROGRESS_PROPAGATION: float = 0.5  # 后续技能的学习时长计入前置技能有效时长的权重
+    
+    # 性能监控配置
+    METRICS_ENABLED: bool = True  # 记录请求耗时和SQL统计，通过/metrics导出
+    SERVER_TIMING_ENABLED: bool = True  # 在响应头中返回Server-Timing
+    METRICS_N_PLUS_ONE_THRESHOLD: int = 30  # 单个请求的SQL语句数超过该值时记录警告，0表示不检测
+    
+    # 大模型调用监控配置
+    LLM_TELEMETRY_ENABLED: bool = True  # 记录每次大模型调用的耗时和用量到llm_calls表
+    LLM_PRICING: Dict[str, List[float]] = {}  # 模型名 -> [输入单价, 输出单价]，单位为每百万token
+    LLM_BASE_URL: Optional[str] = None  # 设置后所有模型都请求该地址，用于压测时指向本地模拟服务
+    LLM_STREAM_USAGE: bool = True  # 流式调用时请求接口在最后一个数据块返回token用量（stream_options），不支持该参数的兼容服务可关闭
+    
+    # 流式聊天并发控制配置（多进程部署时按worker分别计算）
+    LLM_STREAM_MAX_CONCURRENCY: int = 32  # 同时进行的流式大模型调用上限
+    LLM_STREAM_PROVIDER_CONCURRENCY: int = 16  # 每个服务商的默认并发上限
+    LLM_STREAM_PROVIDER_LIMITS: Dict[str, int] = {}  # 服务商 -> 并发上限，覆盖默认值，如{"deepseek": 8}
+    LLM_STREAM_QUEUE_SIZE: int = 64  # 达到上限后最多排队的请求数，队列满时直接返回429
+    LLM_STREAM_QUEUE_TIMEOUT: float = 10  # 排队超过该秒数返回429
+    LLM_STREAM_EXPECTED_SECONDS: float = 10  # 还没有完成的调用时用于估算Retry-After的平均调用时长
+    
+    # 响应序列化配置
+    FAST_SERIALIZATION_ENABLED: bool = True  # 列表接口直接编码查询到的行，跳过逐行的Pydantic校验
+    
+    # 响应压缩配置
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]  # 客户端q值相同时的偏好顺序，br和zstd需安装brotli、zstandard
+    COMPRESSION_MINIMUM_SIZE: int = 1000  # 小于该字节数的响应不压缩
+    COMPRESSION_LEVELS: Dict[str, int] = {"gzip": 5, "br": 4, "zstd": 3}  # 每次请求都压缩的响应
+    COMPRESSION_CACHED_LEVELS: Dict[str, int] = {"gzip": 9, "br": 9, "zstd": 12}  # 缓存条目的压缩变体，只压缩一次
+    COMPRESSION_OFFLOAD_BYTES: int = 64 * 1024  # 超过该字节数的响应体在线程池中压缩，不阻塞事件循环
+    
+    # 性能剖析配置
+    PROFILING_ENABLED: bool = False  # 开启后可通过X-Profile请求头或/api/profiling接口做采样剖析
+    PROFILING_SAMPLER: bool = False  # 启动时开启持续采样，结果按路由累计
+    PROFILING_INTERVAL_MS: float = 20  # 持续采样的间隔
+    PROFILING_REQUEST_INTERVAL_MS: float = 1  # 单个请求详细剖析的采样间隔
+    PROFILING_DIR: str = "profiles"  # 折叠栈和speedscope文件的保存目录
     
     # CORS配置
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
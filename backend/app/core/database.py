@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -10,6 +10,14 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # SQLite特定配置
 )
 
+# 多个worker进程共用SQLite时，WAL模式下读取不会阻塞写入提交
+if settings.SQLITE_WAL_ENABLED and engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -17,6 +25,41 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# 补齐已存在表中缺失的列和索引
+def upgrade_schema():
+    """
+    create_all只会创建不存在的表，已有数据库中新增的列和索引需要单独补齐。
+    这里只处理可为空的新增列，不做列类型变更或删除。
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            # 补齐缺失的列
+            existing_columns = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                )
+                # 已有行填充列的默认值（如JSON列的空列表）
+                if column.default is not None and column.default.is_scalar:
+                    values = {column.name: column.default.arg}
+                    # 保留原值，避免触发updated_at等onupdate列
+                    values.update({c.name: c for c in table.columns if c.onupdate is not None})
+                    conn.execute(table.update().values(values))
+            
+            # 补齐缺失的索引
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
 # 依赖项，用于获取数据库会话
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,305 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# 直方图分桶上限
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """按标签分组的Prometheus风格直方图，线程安全"""
+
+    def __init__(self, name: str, description: str, buckets: Iterable[float], labels: Tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        # 标签值 -> (各桶计数, 总和, 样本数)
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, ([*counts], total, n)) for key, (counts, total, n) in self._series.items())
+        for label_values, (counts, total, n) in items:
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _join_labels(labels, _format_labels(("le",), (f"{bound:g}",)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_join_labels(labels, _format_labels(('le',), ('+Inf',)))} {n}")
+            lines.append(f"{self.name}_sum{_join_labels(labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_join_labels(labels)} {n}")
+        return lines
+
+
+class CounterMetric:
+    """按标签分组的计数器"""
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_join_labels(_format_labels(self.labels, label_values))} {value:g}")
+        return lines
+
+
+class Gauge:
+    """按标签分组的瞬时值"""
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_join_labels(_format_labels(self.labels, label_values))} {value:g}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+def _join_labels(*parts: str) -> str:
+    joined = ",".join(part for part in parts if part)
+    return f"{{{joined}}}" if joined else ""
+
+
+ROUTE_LABELS = ("method", "route", "status")
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "请求处理耗时（到响应体发送完毕）", LATENCY_BUCKETS, ROUTE_LABELS
+)
+request_queries = Histogram(
+    "http_request_db_queries", "每个请求执行的SQL语句数", QUERY_COUNT_BUCKETS, ROUTE_LABELS
+)
+request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "每个请求的SQL执行总耗时", LATENCY_BUCKETS, ROUTE_LABELS
+)
+response_size = Histogram(
+    "http_response_size_bytes", "响应体字节数（压缩后）", SIZE_BUCKETS, ROUTE_LABELS
+)
+db_rows = CounterMetric(
+    "http_request_db_rows_total", "请求中ORM加载的实体数与写语句影响的行数", ROUTE_LABELS
+)
+n_plus_one = CounterMetric(
+    "http_request_n_plus_one_total", "SQL语句数超过阈值的请求数", ("method", "route")
+)
+
+REGISTRY = [request_duration, request_queries, request_db_duration, response_size, db_rows, n_plus_one]
+
+
+def render_metrics() -> str:
+    """Prometheus文本格式"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class RequestStats:
+    """单个请求的数据库统计，通过contextvar传到线程池中执行的同步接口"""
+    query_count: int = 0
+    query_seconds: float = 0.0
+    rows: int = 0
+    statements: Counter = field(default_factory=Counter)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _record_query(conn, statement: str) -> Optional[RequestStats]:
+    """弹出语句的开始时间并计入当前请求，不在请求中时返回None"""
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is None:
+        return None
+    stats.query_count += 1
+    stats.query_seconds += time.perf_counter() - started
+    stats.statements[statement] += 1
+    return stats
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _record_query(conn, statement)
+    if stats is None:
+        return
+    # SELECT的rowcount为-1，读取的行数由ORM的load事件统计
+    if cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def _handle_error(exception_context):
+    """执行出错的语句不会触发after_cursor_execute，在这里弹出开始时间，否则连接上的栈会不断增长"""
+    conn = exception_context.connection
+    # 没有执行上下文说明出错时还没执行到before_cursor_execute，栈上没有该语句的开始时间
+    if conn is None or exception_context.execution_context is None or not conn.info.get("query_start"):
+        return
+    _record_query(conn, exception_context.statement)
+
+
+def _on_load(target, context):
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def instrument_engine(engine: Engine, base: Any) -> None:
+    """在引擎和所有ORM模型上注册统计用的事件"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(base, "load", _on_load, propagate=True)
+
+
+def _normalize_sql(statement: str) -> str:
+    return re.sub(r"\s+", " ", statement).strip()[:200]
+
+
+_routes: Dict[Any, str] = {}
+
+
+def route_template(scope) -> str:
+    """用路由模板而不是实际路径作为标签，避免路径参数导致标签数量无限增长"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _routes:
+        app = scope.get("app")
+        for route in getattr(app, "routes", []):
+            if getattr(route, "endpoint", None) is endpoint:
+                _routes[endpoint] = route.path
+                break
+        else:
+            _routes[endpoint] = getattr(endpoint, "__name__", "unknown")
+    return _routes[endpoint]
+
+
+class MetricsMiddleware:
+    """
+    记录每个请求的耗时、SQL次数和耗时、读写行数和响应字节数
+
+    纯ASGI中间件，不缓冲响应体，对流式响应同样有效。
+    Server-Timing头在响应头发出时写入，此时的耗时是到开始发送响应为止的值。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+        body_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, body_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    timing = (
+                        f'app;dur={elapsed:.1f}, '
+                        f'db;dur={stats.query_seconds * 1000:.1f};desc="{stats.query_count} queries"'
+                    )
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode())]
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats, status, time.perf_counter() - started, body_bytes)
+
+    def _record(self, scope, stats: RequestStats, status: int, elapsed: float, body_bytes: int) -> None:
+        method = scope.get("method", "")
+        route = route_template(scope)
+        labels = (method, route, str(status))
+        request_duration.observe(elapsed, *labels)
+        request_queries.observe(stats.query_count, *labels)
+        request_db_duration.observe(stats.query_seconds, *labels)
+        response_size.observe(body_bytes, *labels)
+        db_rows.inc(stats.rows, *labels)
+
+        threshold = settings.METRICS_N_PLUS_ONE_THRESHOLD
+        if threshold and stats.query_count > threshold:
+            n_plus_one.inc(1, method, route)
+            statement, repeats = stats.statements.most_common(1)[0]
+            logger.warning(
+                "疑似N+1查询: %s %s 执行了%d条SQL（耗时%.1fms），重复最多的语句执行%d次: %s",
+                method, scope.get("path", ""), stats.query_count, stats.query_seconds * 1000,
+                repeats, _normalize_sql(statement)
+            )
@@ -0,0 +1,384 @@
+import asyncio
+import json
+import os
+import queue
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+try:
+    from anyio._backends._asyncio import WorkerThread
+    # 同步接口在anyio的工作线程中执行，该函数的局部变量context是本次调用复制的上下文
+    _WORKER_RUN_CODE = WorkerThread.run.__code__
+except (ImportError, AttributeError):
+    _WORKER_RUN_CODE = None
+
+# 工作线程空闲时停在Queue.get中，此时context还是上一次调用的上下文，不应计入
+_QUEUE_GET_CODE = queue.Queue.get.__code__
+_STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+
+PROFILE_HEADER = b"x-profile"
+
+
+class RequestTag:
+    """单个请求的采样归属，采样线程据此把调用栈计入对应的请求"""
+
+    __slots__ = ("scope", "samples", "detailed", "__weakref__")
+
+    def __init__(self, scope, detailed: bool):
+        self.scope = scope
+        self.detailed = detailed
+        # 折叠后的调用栈 -> 采样到的秒数
+        self.samples: Counter = Counter()
+
+
+_current_tag: ContextVar[Optional[RequestTag]] = ContextVar("profile_tag", default=None)
+
+
+def _frame_name(code) -> str:
+    """函数名加相对路径，第三方库只保留site-packages之后的部分，标准库只保留模块路径"""
+    filename = code.co_filename
+    marker = filename.rfind("site-packages" + os.sep)
+    if marker >= 0:
+        filename = filename[marker + len("site-packages") + 1:]
+    elif filename.startswith(_STDLIB_DIR):
+        filename = filename[len(_STDLIB_DIR) + 1:]
+    else:
+        filename = os.path.relpath(filename) if os.path.isabs(filename) else filename
+    # co_qualname在Python 3.11才加入，Docker镜像使用的3.10只有co_name
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class _SamplerThread(threading.Thread):
+    """按固定间隔采样，每个样本的权重为距上次采样的实际间隔"""
+
+    def __init__(self, profiler: "Profiler", interval: float, tag: Optional[RequestTag] = None):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.profiler = profiler
+        self.interval = interval
+        self.tag = tag
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            now = time.perf_counter()
+            self.profiler.sample(now - last, self.tag)
+            last = now
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class Profiler:
+    """
+    采样式性能剖析
+
+    用sys._current_frames()定期读取所有线程的调用栈，不需要额外依赖，也不影响未被采样的代码。
+    事件循环线程上的样本按当前运行的asyncio任务归属到请求；线程池中执行的同步接口
+    按工作线程当前调用复制的contextvar上下文归属到请求。
+    持续采样器间隔较大、开销低，结果按路由累计；单个请求的详细剖析使用独立的高频采样线程。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.Task, RequestTag]" = weakref.WeakKeyDictionary()
+        self._loops: Dict[int, asyncio.AbstractEventLoop] = {}
+        self._routes: Dict[Tuple[str, str], Counter] = {}
+        self._route_requests: Counter = Counter()
+        self._sampler: Optional[_SamplerThread] = None
+        self._armed: Optional[List[Any]] = None
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    # ---- 采样 ----
+
+    def _tag_for_thread(self, thread_id: int, frame) -> Tuple[Optional[RequestTag], Any]:
+        """返回线程当前所属的请求和栈的起点代码，起点之外的帧（事件循环、线程池）不计入"""
+        loop = self._loops.get(thread_id)
+        if loop is not None:
+            task = asyncio.tasks._current_tasks.get(loop)
+            return (self._tasks.get(task) if task is not None else None), _MIDDLEWARE_CODE
+        if _WORKER_RUN_CODE is None:
+            return None, None
+        child = None
+        while frame is not None:
+            if frame.f_code is _WORKER_RUN_CODE:
+                if child is None or child.f_code is _QUEUE_GET_CODE:
+                    return None, None
+                context = frame.f_locals.get("context")
+                return (context.get(_current_tag) if context is not None else None), _WORKER_RUN_CODE
+            child, frame = frame, frame.f_back
+        return None, None
+
+    @staticmethod
+    def _collapse(frame, boundary) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if code is boundary:
+                if boundary is not _WORKER_RUN_CODE:
+                    names.append(_frame_name(code))
+                break
+            names.append(_frame_name(code))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def sample(self, weight: float, only: Optional[RequestTag] = None) -> None:
+        """
+        采样一次所有线程
+
+        Args:
+            weight: 样本代表的秒数
+            only: 只记录属于该请求的样本；为空时记录所有未开启详细剖析的请求
+        """
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            tag, boundary = self._tag_for_thread(thread_id, frame)
+            if tag is None or (only is not None and tag is not only) or (only is None and tag.detailed):
+                continue
+            stack = self._collapse(frame, boundary)
+            with self._lock:
+                tag.samples[stack] += weight
+
+    # ---- 持续采样器 ----
+
+    @property
+    def sampling(self) -> bool:
+        return self._sampler is not None
+
+    def start(self, interval_ms: Optional[float] = None) -> None:
+        self.stop()
+        self._sampler = _SamplerThread(self, (interval_ms or settings.PROFILING_INTERVAL_MS) / 1000)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        sampler, self._sampler = self._sampler, None
+        if sampler is not None:
+            sampler.stop()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.PROFILING_ENABLED,
+            "sampling": self.sampling,
+            "interval_ms": self._sampler.interval * 1000 if self._sampler else None,
+            "armed": {"path_prefix": self._armed[0], "remaining": self._armed[1]} if self._armed else None,
+            "routes": len(self._routes),
+            "profiled_requests": len(self.recent),
+        }
+
+    # ---- 请求 ----
+
+    def arm(self, path_prefix: str, count: int) -> None:
+        """对之后路径以path_prefix开头的count个请求做详细剖析，用于无法添加请求头的场景"""
+        with self._lock:
+            self._armed = [path_prefix, count] if count > 0 else None
+
+    def wants_detail(self, scope) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER and value not in (b"", b"0", b"false"):
+                return True
+        with self._lock:
+            if self._armed and scope.get("path", "").startswith(self._armed[0]):
+                self._armed[1] -= 1
+                if self._armed[1] <= 0:
+                    self._armed = None
+                return True
+        return False
+
+    def begin(self, scope, detailed: bool) -> Tuple[RequestTag, Any]:
+        tag = RequestTag(scope, detailed)
+        self._loops[threading.get_ident()] = asyncio.get_running_loop()
+        self._tasks[asyncio.current_task()] = tag
+        return tag, _current_tag.set(tag)
+
+    def end(self, tag: RequestTag, token) -> None:
+        _current_tag.reset(token)
+        self._tasks.pop(asyncio.current_task(), None)
+        key = (tag.scope.get("method", ""), route_template(tag.scope))
+        with self._lock:
+            self._routes.setdefault(key, Counter()).update(tag.samples)
+            self._route_requests[key] += 1
+
+    # ---- 结果 ----
+
+    def routes(self, top: int = 5) -> List[Dict[str, Any]]:
+        """
+        各路由的采样汇总
+
+        Returns:
+            每个路由的请求数、采样总秒数和自身耗时最多的几个函数，按采样总秒数降序
+        """
+        with self._lock:
+            items = [(key, Counter(samples), self._route_requests[key]) for key, samples in self._routes.items()]
+        summary = []
+        for (method, route), samples, requests in items:
+            self_time: Counter = Counter()
+            for stack, seconds in samples.items():
+                self_time[stack.rsplit(";", 1)[-1]] += seconds
+            summary.append({
+                "method": method,
+                "route": route,
+                "requests": requests,
+                "sampled_ms": round(sum(samples.values()) * 1000, 1),
+                "top_self": [
+                    {"frame": frame, "ms": round(seconds * 1000, 1)} for frame, seconds in self_time.most_common(top)
+                ],
+            })
+        summary.sort(key=lambda item: item["sampled_ms"], reverse=True)
+        return summary
+
+    def aggregate(self, route: Optional[str] = None, method: Optional[str] = None) -> Counter:
+        """合并指定路由（为空时为全部路由）的样本，路由作为栈的第一帧"""
+        merged: Counter = Counter()
+        with self._lock:
+            for (route_method, route_path), samples in self._routes.items():
+                if (route and route_path != route) or (method and route_method != method.upper()):
+                    continue
+                for stack, seconds in samples.items():
+                    merged[f"{route_method} {route_path};{stack}"] += seconds
+        return merged
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._route_requests.clear()
+
+    def save(self, name: str, samples: Counter) -> Dict[str, str]:
+        """把样本写成折叠栈和speedscope两种文件，返回文件路径"""
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        paths = {
+            "collapsed": os.path.join(settings.PROFILING_DIR, f"{name}.collapsed"),
+            "speedscope": os.path.join(settings.PROFILING_DIR, f"{name}.speedscope.json"),
+        }
+        with open(paths["collapsed"], "w", encoding="utf-8") as f:
+            f.write(to_collapsed(samples))
+        with open(paths["speedscope"], "w", encoding="utf-8") as f:
+            json.dump(to_speedscope(samples, name), f, ensure_ascii=False)
+        return paths
+
+    def finish_detailed(self, profile_id: str, tag: RequestTag, elapsed: float) -> None:
+        """保存单个请求的详细剖析结果，在线程池中执行"""
+        with self._lock:
+            samples = Counter(tag.samples)
+        paths = self.save(profile_id, samples)
+        self.recent.appendleft({
+            "id": profile_id,
+            "method": tag.scope.get("method", ""),
+            "path": tag.scope.get("path", ""),
+            "route": route_template(tag.scope),
+            "duration_ms": round(elapsed * 1000, 1),
+            "sampled_ms": round(sum(samples.values()) * 1000, 1),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "files": paths,
+        })
+
+
+def to_collapsed(samples: Counter) -> str:
+    """Brendan Gregg折叠栈格式，每行为“帧;帧;帧 毫秒数”，可直接交给flamegraph.pl或speedscope"""
+    lines = []
+    for stack, seconds in sorted(samples.items(), key=lambda item: item[1], reverse=True):
+        if stack:
+            lines.append(f"{stack} {max(1, round(seconds * 1000))}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(samples: Counter, name: str) -> Dict[str, Any]:
+    """speedscope的sampled格式，权重单位为毫秒"""
+    frames: List[Dict[str, Any]] = []
+    index: Dict[str, int] = {}
+    profile_samples, weights = [], []
+    for stack, seconds in samples.items():
+        if not stack:
+            continue
+        indices = []
+        for frame in stack.split(";"):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame})
+            indices.append(index[frame])
+        profile_samples.append(indices)
+        weights.append(round(seconds * 1000, 3))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sum(weights), 3),
+            "samples": profile_samples,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "personal-insight-dashboard",
+    }
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """
+    按需的性能剖析
+
+    持续采样器开启时，所有请求的样本按路由累计；请求带X-Profile头或命中arm设置的路径时，
+    对该请求启动高频采样，结果写入PROFILING_DIR，并在响应头X-Profile-Id中返回剖析ID。
+    放在最外层，压缩和序列化的耗时也会计入。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        detailed = profiler.wants_detail(scope)
+        if not detailed and not profiler.sampling:
+            await self.app(scope, receive, send)
+            return
+
+        tag, token = profiler.begin(scope, detailed)
+        started = time.perf_counter()
+        sampler = None
+        profile_id = None
+        if detailed:
+            profile_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+            sampler = _SamplerThread(profiler, settings.PROFILING_REQUEST_INTERVAL_MS / 1000, tag)
+            sampler.start()
+
+        async def send_wrapper(message):
+            if profile_id and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            profiler.end(tag, token)
+            if profile_id:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, profiler.finish_detailed, profile_id, tag, time.perf_counter() - started
+                )
+
+
+# 事件循环线程上的栈从中间件开始记录，之前的事件循环和服务器帧不计入
+_MIDDLEWARE_CODE = ProfilingMiddleware.__call__.__code__
@@ -0,0 +1,126 @@
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union, get_args
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.core import columnar
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # 未安装时退回标准库，结果相同，只是慢一些
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """编码为JSON字节，格式与FastAPI默认的JSONResponse一致（不转义中文、无多余空格）"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """用orjson编码的JSON响应"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _nullable(annotation: Any) -> bool:
+    return annotation is None or type(None) in get_args(annotation) or annotation is Any
+
+
+class RowSerializer:
+    """
+    把Core查询返回的行元组直接编码为与response_model相同的JSON
+
+    列表接口声明了response_model=List[schemas.X]，默认由FastAPI对每一行ORM对象做from_attributes校验
+    再用标准库编码，limit较大时这两步占了大部分耗时。端点查询columns得到行元组后交给response，
+    返回的Response会跳过校验，OpenAPI中的响应模型不变。
+    字段顺序与schema一致；数据库中为NULL而schema不允许为空的字段输出schema的默认值（默认路径下这样的行会校验失败）。
+    请求Accept为Arrow或MessagePack时按列编码，categorical中的字段做字典编码。
+    """
+
+    def __init__(self, schema: Type[BaseModel], model: Any, categorical: Tuple[str, ...] = ()):
+        self.schema = schema
+        self.fields: Tuple[str, ...] = tuple(schema.model_fields)
+        self.columns = [getattr(model, name) for name in self.fields]
+        self.kinds = [
+            "category" if name in categorical else columnar.kind_of(field.annotation)
+            for name, field in schema.model_fields.items()
+        ]
+        # 字段下标 -> 生成默认值的函数
+        self._defaults: List[Tuple[int, Callable[[], Any]]] = []
+        for index, (name, field) in enumerate(schema.model_fields.items()):
+            if field.is_required() or _nullable(field.annotation):
+                continue
+            if field.default_factory is not None:
+                self._defaults.append((index, field.default_factory))
+            else:
+                self._defaults.append((index, lambda value=field.default: value))
+
+    @property
+    def enabled(self) -> bool:
+        return settings.FAST_SERIALIZATION_ENABLED
+
+    def to_dicts(self, rows: Iterable[Any]) -> List[Dict[str, Any]]:
+        fields, defaults = self.fields, self._defaults
+        if not defaults:
+            return [dict(zip(fields, row)) for row in rows]
+        items = []
+        for row in rows:
+            item = dict(zip(fields, row))
+            for index, factory in defaults:
+                if row[index] is None:
+                    item[fields[index]] = factory()
+            items.append(item)
+        return items
+
+    def to_columns(self, rows: Iterable[Any]) -> List[columnar.Column]:
+        columns = columnar.from_rows(self.fields, self.kinds, rows)
+        for index, factory in self._defaults:
+            column = columns[index]
+            if None in column.values:
+                columns[index] = column._replace(
+                    values=[factory() if value is None else value for value in column.values]
+                )
+        return columns
+
+    def response(self, rows: Iterable[Any], media_type: Optional[str] = None) -> Response:
+        """media_type为columnar.negotiate选出的列式格式，为空时返回JSON"""
+        if media_type:
+            return columnar.response(media_type, self.to_columns(rows))
+        return FastJSONResponse(self.to_dicts(rows))
+
+
+def serialize(
+    serializer: RowSerializer,
+    query: Callable[..., Any],
+    media_type: Optional[str] = None,
+    **params: Any
+) -> Union[Response, Any]:
+    """
+    按FAST_SERIALIZATION_ENABLED选择快速路径或默认路径
+
+    Args:
+        serializer: 端点响应模型对应的RowSerializer
+        query: CRUD的查询方法，需支持columns参数
+        media_type: 请求的列式格式，指定时总是查询行元组并按列编码
+        params: 查询参数
+
+    Returns:
+        快速路径为已编码的Response，默认路径为ORM对象列表，交给FastAPI校验和编码
+    """
+    if media_type or serializer.enabled:
+        return serializer.response(query(columns=serializer.columns, **params), media_type)
+    return query(**params)
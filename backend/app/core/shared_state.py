@@ -0,0 +1,41 @@
+import contextlib
+import os
+import threading
+from typing import Iterator, Optional
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows下没有fcntl，不支持多进程共享状态
+    fcntl = None
+
+
+def shared_path(name: str) -> Optional[str]:
+    """
+    SHARED_STATE_DIR下的文件路径，未配置时返回None，表示只在进程内共享
+
+    多进程部署（见gunicorn.conf.py）时各worker通过该目录共享写入版本号和预算通知。
+    """
+    if not settings.SHARED_STATE_DIR:
+        return None
+    if fcntl is None:
+        raise RuntimeError("SHARED_STATE_DIR需要支持fcntl的POSIX系统")
+    os.makedirs(settings.SHARED_STATE_DIR, exist_ok=True)
+    return os.path.join(settings.SHARED_STATE_DIR, name)
+
+
+@contextlib.contextmanager
+def file_lock(fd: int, thread_lock: threading.Lock) -> Iterator[None]:
+    """
+    跨进程的排他锁
+
+    fcntl.lockf的记录锁按进程持有，fork出的worker之间同样互斥（flock的锁随文件描述符继承，不能用于这里）；
+    同一进程的线程之间不互斥，所以先取线程锁。
+    """
+    with thread_lock:
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN)
@@ -2,3 +2,7 @@ from .emotion import emotion
 from .finance import finance
 from .skill import skill
 from .learning import learning
+from .tag import tag
+from .budget import budget
+from .skill_tree import skill_tree
+from .skill_graph import skill_graph
@@ -0,0 +1,55 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+
+from app.models.finance import Budget
+from app.schemas.budget import BudgetCreate, BudgetUpdate
+from app.core.cache import write_versions
+
+
+class CRUDBudget:
+    def create(self, db: Session, obj_in: BudgetCreate) -> Budget:
+        """创建预算"""
+        db_obj = Budget(
+            subcategory=obj_in.subcategory,
+            monthly_limit=obj_in.monthly_limit,
+            thresholds=obj_in.thresholds
+        )
+        db.add(db_obj)
+        db.commit()
+        write_versions.bump(Budget.__tablename__)
+        db.refresh(db_obj)
+        return db_obj
+
+    def get(self, db: Session, id: int) -> Optional[Budget]:
+        """根据ID获取预算"""
+        return db.query(Budget).filter(Budget.id == id).first()
+
+    def get_by_subcategory(self, db: Session, subcategory: str) -> Optional[Budget]:
+        """根据子类别获取预算"""
+        return db.query(Budget).filter(Budget.subcategory == subcategory).first()
+
+    def get_multi(self, db: Session) -> List[Budget]:
+        """获取全部预算"""
+        return db.query(Budget).order_by(Budget.subcategory).all()
+
+    def update(self, db: Session, db_obj: Budget, obj_in: BudgetUpdate) -> Budget:
+        """更新预算"""
+        update_data = obj_in.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        db.commit()
+        write_versions.bump(Budget.__tablename__)
+        db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, db: Session, id: int) -> Budget:
+        """删除预算"""
+        obj = db.query(Budget).get(id)
+        db.delete(obj)
+        db.commit()
+        write_versions.bump(Budget.__tablename__)
+        return obj
+
+
+budget = CRUDBudget()
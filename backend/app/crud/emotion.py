@@ -1,10 +1,14 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from datetime import datetime, date
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 from app.models.data import EmotionEntry
 from app.schemas.emotion import EmotionCreate, EmotionUpdate
+from app.core.cache import write_versions
+from app.crud.tag import tag as crud_tag
+from app.services import analysis_cache, rollups
+from app.services.semantic_search import semantic_index
 
 
 # CRUD操作类
@@ -17,8 +21,13 @@ class CRUDEmotion:
             tags=obj_in.tags
         )
         db.add(db_obj)
+        db.flush()
+        crud_tag.set_entry_tags(db, db_obj, obj_in.tags)
+        rollups.add_entry(db, db_obj)
         db.commit()
+        write_versions.bump(EmotionEntry.__tablename__)
         db.refresh(db_obj)
+        semantic_index.index_entry(db_obj)
         return db_obj
     
     def get(self, db: Session, id: int) -> Optional[EmotionEntry]:
@@ -31,9 +40,11 @@ class CRUDEmotion:
         skip: int = 0, 
         limit: int = 100,
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        columns: Optional[Sequence[Any]] = None
     ) -> List[EmotionEntry]:
-        """获取情感记录列表，支持日期过滤"""
+        """获取情感记录列表，支持日期和标签过滤；指定columns时返回行元组"""
         query = db.query(EmotionEntry)
         
         # 日期过滤
@@ -45,6 +56,14 @@ class CRUDEmotion:
             end = datetime.strptime(end_date, "%Y-%m-%d").date()
             query = query.filter(EmotionEntry.date <= end)
         
+        # 标签过滤，通过标签索引表查询
+        if tags:
+            query = query.filter(EmotionEntry.id.in_(crud_tag.entry_ids_subquery("emotion", tags)))
+        
+        # 指定列时只查询这些列，返回行元组，省去ORM对象的构建
+        if columns:
+            query = query.with_entities(*columns)
+        
         return query.offset(skip).limit(limit).all()
     
     def update(
@@ -55,18 +74,31 @@ class CRUDEmotion:
     ) -> EmotionEntry:
         """更新情感记录"""
         update_data = obj_in.model_dump(exclude_unset=True)
+        before = rollups.contributions(db_obj)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        rollups.replace_entry(db, before, db_obj)
+        # 内容变化后，之前缓存的分析结果失效
+        analysis_cache.invalidate_stale(db, db_obj)
+        if "tags" in update_data:
+            crud_tag.set_entry_tags(db, db_obj, update_data["tags"])
         db.add(db_obj)
         db.commit()
+        write_versions.bump(EmotionEntry.__tablename__)
         db.refresh(db_obj)
+        semantic_index.index_entry(db_obj)
         return db_obj
     
     def remove(self, db: Session, id: int) -> EmotionEntry:
         """删除情感记录"""
         obj = db.query(EmotionEntry).get(id)
+        analysis_cache.invalidate_all(db, obj)
+        crud_tag.clear_entry_tags(db, obj)
+        rollups.remove_entry(db, obj)
         db.delete(obj)
         db.commit()
+        write_versions.bump(EmotionEntry.__tablename__)
+        semantic_index.remove_entry(obj)
         return obj
 
 
@@ -1,10 +1,14 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from datetime import datetime, date
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 from app.models.data import FinanceEntry
 from app.schemas.finance import FinanceCreate, FinanceUpdate
+from app.core.cache import write_versions
+from app.crud.tag import tag as crud_tag
+from app.services import budgets, finance_anomaly, recurring, rollups
+from app.services.semantic_search import semantic_index
 
 
 class CRUDFinance:
@@ -18,9 +22,19 @@ class CRUDFinance:
             date=obj_in.date,
             tags=obj_in.tags
         )
+        # 异常标记和所属序列在首次插入前确定，避免插入后再UPDATE而写入updated_at
+        finance_anomaly.observe(db, db_obj)
         db.add(db_obj)
+        recurring.observe(db, db_obj)
+        db.flush()
+        crud_tag.set_entry_tags(db, db_obj, obj_in.tags)
+        rollups.add_entry(db, db_obj)
+        budget_events = budgets.add_entry(db, db_obj)
         db.commit()
+        write_versions.bump(FinanceEntry.__tablename__)
+        budgets.notify(budget_events)
         db.refresh(db_obj)
+        semantic_index.index_entry(db_obj)
         return db_obj
     
     def get(self, db: Session, id: int) -> Optional[FinanceEntry]:
@@ -33,9 +47,13 @@ class CRUDFinance:
         skip: int = 0, 
         limit: int = 100,
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        anomalies_only: bool = False,
+        columns: Optional[Sequence[Any]] = None
     ) -> List[FinanceEntry]:
-        """获取财务记录列表，支持日期过滤"""
+        """获取财务记录列表，支持日期、类别、标签和异常标记过滤；指定columns时返回行元组"""
         query = db.query(FinanceEntry)
         
         # 日期过滤
@@ -47,6 +65,22 @@ class CRUDFinance:
             end = datetime.strptime(end_date, "%Y-%m-%d").date()
             query = query.filter(FinanceEntry.date <= end)
         
+        # 类别过滤
+        if category:
+            query = query.filter(FinanceEntry.category == category)
+        
+        # 标签过滤，通过标签索引表查询
+        if tags:
+            query = query.filter(FinanceEntry.id.in_(crud_tag.entry_ids_subquery("finance", tags)))
+        
+        # 只返回写入时被标记为异常的记录
+        if anomalies_only:
+            query = query.filter(FinanceEntry.is_anomaly.is_(True))
+        
+        # 指定列时只查询这些列，返回行元组，省去ORM对象的构建
+        if columns:
+            query = query.with_entities(*columns)
+        
         return query.offset(skip).limit(limit).all()
     
     def update(
@@ -57,18 +91,38 @@ class CRUDFinance:
     ) -> FinanceEntry:
         """更新财务记录"""
         update_data = obj_in.model_dump(exclude_unset=True)
+        before = rollups.contributions(db_obj)
+        before_stats = finance_anomaly.snapshot(db_obj)
+        before_budget = budgets.contributions(db_obj)
+        before_recurring = recurring.snapshot(db_obj)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        rollups.replace_entry(db, before, db_obj)
+        finance_anomaly.replace(db, before_stats, db_obj)
+        budget_events = budgets.replace_entry(db, before_budget, db_obj)
+        recurring.replace(db, before_recurring, db_obj)
+        if "tags" in update_data:
+            crud_tag.set_entry_tags(db, db_obj, update_data["tags"])
         db.add(db_obj)
         db.commit()
+        write_versions.bump(FinanceEntry.__tablename__)
+        budgets.notify(budget_events)
         db.refresh(db_obj)
+        semantic_index.index_entry(db_obj)
         return db_obj
     
     def remove(self, db: Session, id: int) -> FinanceEntry:
         """删除财务记录"""
         obj = db.query(FinanceEntry).get(id)
+        crud_tag.clear_entry_tags(db, obj)
+        rollups.remove_entry(db, obj)
+        finance_anomaly.forget(db, obj)
+        budgets.remove_entry(db, obj)
+        recurring.forget(db, obj)
         db.delete(obj)
         db.commit()
+        write_versions.bump(FinanceEntry.__tablename__)
+        semantic_index.remove_entry(obj)
         return obj
 
 
@@ -1,10 +1,14 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from datetime import datetime, date
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
-from app.models.data import LearningEntry
+from app.models.data import LearningEntry, SkillEntry
 from app.schemas.learning import LearningCreate, LearningUpdate
+from app.core.cache import write_versions
+from app.crud.tag import tag as crud_tag
+from app.services import rollups, skill_progress
+from app.services.semantic_search import semantic_index
 
 
 class CRUDLearning:
@@ -19,8 +23,14 @@ class CRUDLearning:
             skill_id=obj_in.skill_id
         )
         db.add(db_obj)
+        db.flush()
+        crud_tag.set_entry_tags(db, db_obj, obj_in.tags)
+        rollups.add_entry(db, db_obj)
+        skill_progress.add_entry(db, db_obj)
         db.commit()
+        write_versions.bump(LearningEntry.__tablename__, SkillEntry.__tablename__)
         db.refresh(db_obj)
+        semantic_index.index_entry(db_obj)
         return db_obj
     
     def get(self, db: Session, id: int) -> Optional[LearningEntry]:
@@ -34,9 +44,11 @@ class CRUDLearning:
         limit: int = 100,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        skill_id: Optional[int] = None
+        skill_id: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+        columns: Optional[Sequence[Any]] = None
     ) -> List[LearningEntry]:
-        """获取学习记录列表，支持日期和技能过滤"""
+        """获取学习记录列表，支持日期、技能和标签过滤；指定columns时返回行元组"""
         query = db.query(LearningEntry)
         
         # 日期过滤
@@ -52,6 +64,14 @@ class CRUDLearning:
         if skill_id:
             query = query.filter(LearningEntry.skill_id == skill_id)
         
+        # 标签过滤，通过标签索引表查询
+        if tags:
+            query = query.filter(LearningEntry.id.in_(crud_tag.entry_ids_subquery("learning", tags)))
+        
+        # 指定列时只查询这些列，返回行元组，省去ORM对象的构建
+        if columns:
+            query = query.with_entities(*columns)
+        
         return query.offset(skip).limit(limit).all()
     
     def update(
@@ -62,18 +82,31 @@ class CRUDLearning:
     ) -> LearningEntry:
         """更新学习记录"""
         update_data = obj_in.model_dump(exclude_unset=True)
+        before = rollups.contributions(db_obj)
+        before_progress = skill_progress.contributions(db_obj)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        rollups.replace_entry(db, before, db_obj)
+        skill_progress.replace_entry(db, before_progress, db_obj)
+        if "tags" in update_data:
+            crud_tag.set_entry_tags(db, db_obj, update_data["tags"])
         db.add(db_obj)
         db.commit()
+        write_versions.bump(LearningEntry.__tablename__, SkillEntry.__tablename__)
         db.refresh(db_obj)
+        semantic_index.index_entry(db_obj)
         return db_obj
     
     def remove(self, db: Session, id: int) -> LearningEntry:
         """删除学习记录"""
         obj = db.query(LearningEntry).get(id)
+        crud_tag.clear_entry_tags(db, obj)
+        rollups.remove_entry(db, obj)
+        skill_progress.remove_entry(db, obj)
         db.delete(obj)
         db.commit()
+        write_versions.bump(LearningEntry.__tablename__, SkillEntry.__tablename__)
+        semantic_index.remove_entry(obj)
         return obj
 
 
@@ -1,9 +1,15 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from app.models.data import SkillEntry
+from app.models.data import SkillEntry, LearningEntry
+from app.models.skill_graph import SkillEdge
 from app.schemas.skill import SkillCreate, SkillUpdate
+from app.core.cache import write_versions
+from app.crud.tag import tag as crud_tag
+from app.crud.skill_graph import skill_graph
+from app.services import rollups, skill_progress
+from app.services.skill_names import normalize_name, name_index
 
 
 class CRUDSkill:
@@ -11,6 +17,7 @@ class CRUDSkill:
         """创建技能记录"""
         db_obj = SkillEntry(
             name=obj_in.name,
+            name_key=normalize_name(obj_in.name),
             category=obj_in.category,
             level=obj_in.level,
             progress=obj_in.progress,
@@ -18,10 +25,16 @@ class CRUDSkill:
             learning_paths=obj_in.learning_paths,
             future_directions=obj_in.future_directions,
             related_skills=obj_in.related_skills,
+            tags=obj_in.tags,
             skill_tree_id=obj_in.skill_tree_id
         )
         db.add(db_obj)
+        db.flush()
+        crud_tag.set_entry_tags(db, db_obj, obj_in.tags)
+        skill_graph.sync_related(db, db_obj)
+        skill_graph.sync_related_to(db, [db_obj.name])
         db.commit()
+        write_versions.bump(SkillEntry.__tablename__, SkillEdge.__tablename__)
         db.refresh(db_obj)
         return db_obj
     
@@ -34,17 +47,53 @@ class CRUDSkill:
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
-        category: Optional[str] = None
+        category: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        columns: Optional[Sequence[Any]] = None
     ) -> List[SkillEntry]:
-        """获取技能记录列表，支持类别过滤"""
+        """获取技能记录列表，支持类别和标签过滤；指定columns时返回行元组"""
         query = db.query(SkillEntry)
         
         # 类别过滤
         if category:
             query = query.filter(SkillEntry.category == category)
         
+        # 标签过滤，通过标签索引表查询
+        if tags:
+            query = query.filter(SkillEntry.id.in_(crud_tag.entry_ids_subquery("skill", tags)))
+        
+        # 指定列时只查询这些列，返回行元组，省去ORM对象的构建
+        if columns:
+            query = query.with_entities(*columns)
+        
         return query.offset(skip).limit(limit).all()
     
+    def get_by_name(self, db: Session, name: str) -> List[SkillEntry]:
+        """按规范化名称精确查找技能，走name_key索引；同名技能全部返回"""
+        return db.query(SkillEntry).filter(
+            SkillEntry.name_key == normalize_name(name)
+        ).order_by(SkillEntry.id).all()
+    
+    def get_skills_by_names(self, db: Session, names: List[str]) -> Dict[str, List[SkillEntry]]:
+        """
+        一次查询按名称批量查找技能
+        
+        Returns:
+            以传入名称为键的字典，找不到的名称对应空列表
+        """
+        keys = {name: normalize_name(name) for name in names}
+        matches: Dict[str, List[SkillEntry]] = {}
+        if any(keys.values()):
+            for skill in db.query(SkillEntry).filter(
+                SkillEntry.name_key.in_(set(keys.values()))
+            ).order_by(SkillEntry.id):
+                matches.setdefault(skill.name_key, []).append(skill)
+        return {name: matches.get(key, []) for name, key in keys.items()}
+    
+    def search_names(self, db: Session, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """按名称前缀或容错匹配查找技能，用于补全和名称纠错"""
+        return name_index.search(db, query, limit)
+    
     def update(
         self, 
         db: Session, 
@@ -53,18 +102,37 @@ class CRUDSkill:
     ) -> SkillEntry:
         """更新技能记录"""
         update_data = obj_in.model_dump(exclude_unset=True)
+        old_name = db_obj.name
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        if "name" in update_data:
+            db_obj.name_key = normalize_name(db_obj.name)
+        if "tags" in update_data:
+            crud_tag.set_entry_tags(db, db_obj, update_data["tags"])
+        if "related_skills" in update_data:
+            skill_graph.sync_related(db, db_obj)
+        if "name" in update_data:
+            # 提到旧名称的技能不再连到这里，提到新名称的技能开始连到这里
+            skill_graph.sync_related_to(db, [old_name, db_obj.name])
         db.add(db_obj)
         db.commit()
+        write_versions.bump(SkillEntry.__tablename__, SkillEdge.__tablename__)
         db.refresh(db_obj)
         return db_obj
     
     def remove(self, db: Session, id: int) -> SkillEntry:
         """删除技能记录"""
         obj = db.query(SkillEntry).get(id)
+        crud_tag.clear_entry_tags(db, obj)
+        skill_graph.remove_skill(db, obj.id)
+        skill_progress.remove_skill(db, obj.id)
+        # 关联的学习记录skill_id会被置空，学习时长预聚合随之并入无技能维度
+        rollups.detach_skill(db, obj.id)
         db.delete(obj)
+        # 同名技能还在时，提到该名称的技能的related边重新解析
+        skill_graph.sync_related_to(db, [obj.name])
         db.commit()
+        write_versions.bump(SkillEntry.__tablename__, SkillEdge.__tablename__, LearningEntry.__tablename__)
         return obj
 
 
@@ -0,0 +1,343 @@
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, insert, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.cache import write_versions
+from app.models.data import SkillEntry
+from app.models.skill_graph import SkillEdge, SkillClosure
+from app.services import skill_progress
+from app.services.skill_names import normalize_name
+
+
+PREREQUISITE = "prerequisite"
+RELATED = "related"
+
+
+class SkillGraphCycleError(ValueError):
+    """添加前置关系会形成环"""
+
+
+class CRUDSkillGraph:
+    # 闭包维护
+    def _closure_pairs(self, db: Session, source_id: int, target_id: int) -> Dict[Tuple[int, int], int]:
+        """
+        边source→target经过的路径数增量：source的每个祖先（含自身）到target的每个后代（含自身）
+        之间新增 paths(祖先, source) × paths(target, 后代) 条路径
+        """
+        ancestors = [(source_id, 1)] + [
+            tuple(row) for row in db.execute(
+                select(SkillClosure.ancestor_id, SkillClosure.path_count)
+                .where(SkillClosure.descendant_id == source_id)
+            )
+        ]
+        descendants = [(target_id, 1)] + [
+            tuple(row) for row in db.execute(
+                select(SkillClosure.descendant_id, SkillClosure.path_count)
+                .where(SkillClosure.ancestor_id == target_id)
+            )
+        ]
+        return {
+            (ancestor, descendant): up * down
+            for ancestor, up in ancestors
+            for descendant, down in descendants
+        }
+
+    def _apply_closure(self, db: Session, pairs: Dict[Tuple[int, int], int], sign: int) -> None:
+        """按路径数增减闭包，并把新出现或消失的闭包对同步到技能学习时长的汇总"""
+        if not pairs:
+            return
+        existing = {
+            (ancestor, descendant): count
+            for ancestor, descendant, count in db.execute(
+                select(SkillClosure.ancestor_id, SkillClosure.descendant_id, SkillClosure.path_count).where(
+                    SkillClosure.ancestor_id.in_({ancestor for ancestor, _ in pairs}),
+                    SkillClosure.descendant_id.in_({descendant for _, descendant in pairs})
+                )
+            )
+        }
+        if sign > 0:
+            skill_progress.on_closure_change(db, [pair for pair in pairs if pair not in existing], [])
+        else:
+            skill_progress.on_closure_change(
+                db, [], [pair for pair, count in pairs.items() if existing.get(pair, 0) - count <= 0]
+            )
+
+        for (ancestor, descendant), count in pairs.items():
+            stmt = sqlite_insert(SkillClosure).values(
+                ancestor_id=ancestor,
+                descendant_id=descendant,
+                path_count=sign * count
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["ancestor_id", "descendant_id"],
+                set_={"path_count": SkillClosure.path_count + stmt.excluded.path_count}
+            ))
+        if sign < 0:
+            db.execute(delete(SkillClosure).where(SkillClosure.path_count <= 0))
+
+    def is_ancestor(self, db: Session, ancestor_id: int, descendant_id: int) -> bool:
+        """ancestor是否是descendant的（直接或间接）前置技能，查闭包表一次"""
+        return db.execute(
+            select(SkillClosure.path_count).where(
+                SkillClosure.ancestor_id == ancestor_id,
+                SkillClosure.descendant_id == descendant_id
+            )
+        ).first() is not None
+
+    # 前置关系
+    def add_prerequisite(self, db: Session, skill_id: int, prerequisite_id: int) -> bool:
+        """
+        添加前置关系prerequisite→skill并增量更新闭包，提交事务
+
+        Returns:
+            是否新增（已存在时返回False）
+
+        Raises:
+            SkillGraphCycleError: 会形成环
+        """
+        if skill_id == prerequisite_id or self.is_ancestor(db, skill_id, prerequisite_id):
+            raise SkillGraphCycleError("添加该前置技能会形成循环依赖")
+
+        exists = db.get(SkillEdge, (prerequisite_id, skill_id, PREREQUISITE))
+        if exists is not None:
+            return False
+
+        db.add(SkillEdge(source_id=prerequisite_id, target_id=skill_id, kind=PREREQUISITE))
+        self._apply_closure(db, self._closure_pairs(db, prerequisite_id, skill_id), 1)
+        db.commit()
+        write_versions.bump(SkillEdge.__tablename__, SkillEntry.__tablename__)
+        return True
+
+    def remove_prerequisite(self, db: Session, skill_id: int, prerequisite_id: int) -> bool:
+        """删除前置关系并增量更新闭包，提交事务；不存在时返回False"""
+        edge = db.get(SkillEdge, (prerequisite_id, skill_id, PREREQUISITE))
+        if edge is None:
+            return False
+        self._remove_prerequisite_edge(db, edge)
+        db.commit()
+        write_versions.bump(SkillEdge.__tablename__, SkillEntry.__tablename__)
+        return True
+
+    def _remove_prerequisite_edge(self, db: Session, edge: SkillEdge) -> None:
+        db.delete(edge)
+        db.flush()
+        self._apply_closure(db, self._closure_pairs(db, edge.source_id, edge.target_id), -1)
+
+    def get_prerequisites(self, db: Session, skill_id: int, direct_only: bool = False) -> List[SkillEntry]:
+        """获取前置技能；direct_only为False时通过闭包表一次查出全部间接前置技能"""
+        if direct_only:
+            ids = select(SkillEdge.source_id).where(
+                SkillEdge.target_id == skill_id, SkillEdge.kind == PREREQUISITE
+            )
+        else:
+            ids = select(SkillClosure.ancestor_id).where(SkillClosure.descendant_id == skill_id)
+        return db.query(SkillEntry).filter(SkillEntry.id.in_(ids)).order_by(SkillEntry.id).all()
+
+    def get_dependents(self, db: Session, skill_id: int, direct_only: bool = False) -> List[SkillEntry]:
+        """获取以该技能为前置的技能"""
+        if direct_only:
+            ids = select(SkillEdge.target_id).where(
+                SkillEdge.source_id == skill_id, SkillEdge.kind == PREREQUISITE
+            )
+        else:
+            ids = select(SkillClosure.descendant_id).where(SkillClosure.ancestor_id == skill_id)
+        return db.query(SkillEntry).filter(SkillEntry.id.in_(ids)).order_by(SkillEntry.id).all()
+
+    # 相关技能
+    def sync_related(self, db: Session, skill: SkillEntry) -> None:
+        """
+        按技能的related_skills名称列表重建related边，不提交事务
+
+        名称按规范形式（name_key）匹配，全角或大小写不同也能对应；对应不到已有技能的忽略，名称重复时全部连接。
+        """
+        db.execute(delete(SkillEdge).where(
+            SkillEdge.source_id == skill.id, SkillEdge.kind == RELATED
+        ))
+        keys = {normalize_name(name) for name in (skill.related_skills or [])} - {""}
+        if not keys:
+            return
+        target_ids = db.execute(
+            select(SkillEntry.id).where(SkillEntry.name_key.in_(keys), SkillEntry.id != skill.id)
+        ).scalars().all()
+        if target_ids:
+            db.execute(insert(SkillEdge), [
+                {"source_id": skill.id, "target_id": target_id, "kind": RELATED}
+                for target_id in set(target_ids)
+            ])
+
+    def sync_related_to(self, db: Session, names: Iterable[Optional[str]]) -> None:
+        """
+        技能新建、改名或删除后调用：重建related_skills中提到这些名称的技能的related边，不提交事务
+
+        related边只在写入来源技能时解析，目标技能后建或改名时不调用的话，边会缺失或指向旧名称。
+        """
+        keys = {normalize_name(name) for name in names} - {""}
+        if not keys:
+            return
+        db.flush()
+        source_ids = [
+            skill_id
+            for skill_id, related in db.execute(select(SkillEntry.id, SkillEntry.related_skills))
+            if keys & {normalize_name(name) for name in (related or [])}
+        ]
+        for source in db.query(SkillEntry).filter(SkillEntry.id.in_(source_ids)):
+            self.sync_related(db, source)
+
+    def remove_skill(self, db: Session, skill_id: int) -> None:
+        """删除技能前调用：移除所有相关的边并增量更新闭包，不提交事务"""
+        prerequisite_edges = db.execute(
+            select(SkillEdge).where(
+                or_(SkillEdge.source_id == skill_id, SkillEdge.target_id == skill_id),
+                SkillEdge.kind == PREREQUISITE
+            )
+        ).scalars().all()
+        for edge in prerequisite_edges:
+            self._remove_prerequisite_edge(db, edge)
+        db.execute(delete(SkillEdge).where(
+            or_(SkillEdge.source_id == skill_id, SkillEdge.target_id == skill_id)
+        ))
+
+    # 技能树图
+    def get_tree_graph(self, db: Session, tree_id: int) -> Dict[str, Any]:
+        """
+        一次查询取出技能树的节点和出边
+
+        技能左连接以其为起点的边，结果按技能分组得到节点，
+        只保留终点也在该树中的边。每个节点附带在树内前置链上的层级（无前置为0）。
+        """
+        rows = db.execute(
+            select(
+                SkillEntry.id,
+                SkillEntry.name,
+                SkillEntry.category,
+                SkillEntry.level,
+                SkillEntry.progress,
+                SkillEdge.target_id,
+                SkillEdge.kind
+            ).outerjoin(SkillEdge, SkillEdge.source_id == SkillEntry.id)
+            .where(SkillEntry.skill_tree_id == tree_id)
+            .order_by(SkillEntry.id)
+        ).all()
+
+        nodes: Dict[int, Dict[str, Any]] = {}
+        raw_edges = []
+        for skill_id, name, category, level, progress, target_id, kind in rows:
+            if skill_id not in nodes:
+                nodes[skill_id] = {
+                    "id": skill_id,
+                    "name": name,
+                    "category": category,
+                    "level": level,
+                    "progress": progress,
+                }
+            if target_id is not None:
+                raw_edges.append({"source": skill_id, "target": target_id, "kind": kind})
+        edges = [edge for edge in raw_edges if edge["target"] in nodes]
+
+        # 按前置边做拓扑排序，节点层级为最长前置链的长度
+        depth = {node_id: 0 for node_id in nodes}
+        indegree = defaultdict(int)
+        children = defaultdict(list)
+        for edge in edges:
+            if edge["kind"] == PREREQUISITE:
+                children[edge["source"]].append(edge["target"])
+                indegree[edge["target"]] += 1
+        queue = deque(node_id for node_id in nodes if indegree[node_id] == 0)
+        while queue:
+            node_id = queue.popleft()
+            for child in children[node_id]:
+                depth[child] = max(depth[child], depth[node_id] + 1)
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+        for node_id, node in nodes.items():
+            node["depth"] = depth[node_id]
+
+        return {"nodes": list(nodes.values()), "edges": edges}
+
+    # 全量重建
+    def compute_closure(self, db: Session) -> Dict[Tuple[int, int], int]:
+        """按拓扑顺序从前置边全量计算闭包的路径数，用于重建和校验"""
+        edges = db.execute(
+            select(SkillEdge.source_id, SkillEdge.target_id).where(SkillEdge.kind == PREREQUISITE)
+        ).all()
+        parents = defaultdict(list)
+        indegree = defaultdict(int)
+        children = defaultdict(list)
+        nodes = set()
+        for source, target in edges:
+            parents[target].append(source)
+            children[source].append(target)
+            indegree[target] += 1
+            nodes.update((source, target))
+
+        # paths[y][x]：x到y的路径数
+        paths: Dict[int, Dict[int, int]] = {}
+        queue = deque(node for node in nodes if indegree[node] == 0)
+        while queue:
+            node = queue.popleft()
+            counts: Dict[int, int] = defaultdict(int)
+            for parent in parents[node]:
+                counts[parent] += 1
+                for ancestor, count in paths[parent].items():
+                    counts[ancestor] += count
+            paths[node] = counts
+            for child in children[node]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+
+        return {
+            (ancestor, descendant): count
+            for descendant, counts in paths.items()
+            for ancestor, count in counts.items()
+        }
+
+    def rebuild(self, db: Session) -> Dict[str, int]:
+        """从技能的related_skills重建related边，并从前置边全量重建闭包"""
+        for skill in db.query(SkillEntry).all():
+            self.sync_related(db, skill)
+        db.flush()
+
+        db.execute(delete(SkillClosure))
+        closure = self.compute_closure(db)
+        if closure:
+            db.execute(insert(SkillClosure), [
+                {"ancestor_id": ancestor, "descendant_id": descendant, "path_count": count}
+                for (ancestor, descendant), count in closure.items()
+            ])
+        db.commit()
+        write_versions.bump(SkillEdge.__tablename__, SkillEntry.__tablename__)
+        return {"closure_rows": len(closure)}
+
+    def compute_related(self, db: Session) -> Set[Tuple[int, int]]:
+        """从所有技能的related_skills全量解析related边，用于校验"""
+        skills = db.execute(select(SkillEntry.id, SkillEntry.name, SkillEntry.name_key, SkillEntry.related_skills)).all()
+        ids_by_key: Dict[str, List[int]] = defaultdict(list)
+        for skill_id, name, name_key, _ in skills:
+            ids_by_key[name_key or normalize_name(name)].append(skill_id)
+        return {
+            (skill_id, target_id)
+            for skill_id, _, _, related in skills
+            for name in (related or [])
+            for target_id in ids_by_key.get(normalize_name(name), [])
+            if target_id != skill_id
+        }
+
+    def verify(self, db: Session) -> bool:
+        """校验增量维护的闭包和related边与全量计算结果一致"""
+        stored = {
+            (ancestor, descendant): count
+            for ancestor, descendant, count in db.execute(
+                select(SkillClosure.ancestor_id, SkillClosure.descendant_id, SkillClosure.path_count)
+            )
+        }
+        related = set(db.execute(
+            select(SkillEdge.source_id, SkillEdge.target_id).where(SkillEdge.kind == RELATED)
+        ).all())
+        return stored == self.compute_closure(db) and related == self.compute_related(db)
+
+
+skill_graph = CRUDSkillGraph()
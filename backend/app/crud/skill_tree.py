@@ -0,0 +1,54 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import update
+
+from app.models.data import SkillEntry
+from app.models.skill_tree import SkillTree
+from app.schemas.skill_tree import SkillTreeCreate, SkillTreeUpdate
+from app.core.cache import write_versions
+
+
+class CRUDSkillTree:
+    def create(self, db: Session, obj_in: SkillTreeCreate) -> SkillTree:
+        """创建技能树"""
+        db_obj = SkillTree(
+            name=obj_in.name,
+            category=obj_in.category,
+            description=obj_in.description
+        )
+        db.add(db_obj)
+        db.commit()
+        write_versions.bump(SkillTree.__tablename__)
+        db.refresh(db_obj)
+        return db_obj
+
+    def get(self, db: Session, id: int) -> Optional[SkillTree]:
+        """根据ID获取技能树"""
+        return db.query(SkillTree).filter(SkillTree.id == id).first()
+
+    def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[SkillTree]:
+        """获取技能树列表"""
+        return db.query(SkillTree).offset(skip).limit(limit).all()
+
+    def update(self, db: Session, db_obj: SkillTree, obj_in: SkillTreeUpdate) -> SkillTree:
+        """更新技能树"""
+        update_data = obj_in.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        db.commit()
+        write_versions.bump(SkillTree.__tablename__)
+        db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, db: Session, id: int) -> SkillTree:
+        """删除技能树，树中的技能保留，只解除归属"""
+        obj = db.query(SkillTree).get(id)
+        db.execute(update(SkillEntry).where(SkillEntry.skill_tree_id == id).values(skill_tree_id=None))
+        db.delete(obj)
+        db.commit()
+        write_versions.bump(SkillTree.__tablename__, SkillEntry.__tablename__)
+        return obj
+
+
+skill_tree = CRUDSkillTree()
@@ -0,0 +1,201 @@
+from typing import List, Optional, Dict, Any, Iterable
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.cache import write_versions
+from app.models.tag import Tag, ENTRY_TAG_TABLES
+
+
+def normalize_tag(name: str) -> str:
+    """标签规范化：去除首尾空白、合并连续空白并转为小写"""
+    return " ".join(name.split()).lower()
+
+
+def normalize_tags(names: Optional[Iterable[str]]) -> List[str]:
+    """规范化并去重，保持原有顺序"""
+    result: List[str] = []
+    for name in names or []:
+        normalized = normalize_tag(name)
+        if normalized and normalized not in result:
+            result.append(normalized)
+    return result
+
+
+def _entry_type_of(entry: Any) -> str:
+    for entry_type, (model, _, _) in ENTRY_TAG_TABLES.items():
+        if isinstance(entry, model):
+            return entry_type
+    raise ValueError(f"不支持标签的记录类型: {type(entry).__name__}")
+
+
+class CRUDTag:
+    def get_or_create_many(self, db: Session, names: List[str]) -> Dict[str, int]:
+        """获取标签ID，不存在的标签自动创建，不提交事务"""
+        if not names:
+            return {}
+
+        tag_ids = dict(db.execute(
+            select(Tag.name, Tag.id).where(Tag.name.in_(names))
+        ).all())
+
+        missing = [name for name in names if name not in tag_ids]
+        if missing:
+            # 并发写入同一个新标签时，后插入的一方跳过冲突，再查询对方创建的ID
+            db.execute(
+                sqlite_insert(Tag).on_conflict_do_nothing(index_elements=["name"]),
+                [{"name": name} for name in missing]
+            )
+            tag_ids.update(db.execute(
+                select(Tag.name, Tag.id).where(Tag.name.in_(missing))
+            ).all())
+        return tag_ids
+
+    def set_entry_tags(self, db: Session, entry: Any, names: Optional[List[str]]) -> None:
+        """
+        用新的标签列表替换记录在索引中的标签，由各CRUD在写入时调用，不提交事务
+
+        Args:
+            entry: 已flush、拥有ID的记录
+            names: 新的标签列表
+        """
+        _, table, column = ENTRY_TAG_TABLES[_entry_type_of(entry)]
+        entry_column = table.c[column]
+
+        db.execute(delete(table).where(entry_column == entry.id))
+
+        tag_ids = self.get_or_create_many(db, normalize_tags(names))
+        if tag_ids:
+            db.execute(
+                insert(table),
+                [{column: entry.id, "tag_id": tag_id} for tag_id in tag_ids.values()]
+            )
+
+    def clear_entry_tags(self, db: Session, entry: Any) -> None:
+        """删除记录的全部标签关联，不提交事务"""
+        _, table, column = ENTRY_TAG_TABLES[_entry_type_of(entry)]
+        db.execute(delete(table).where(table.c[column] == entry.id))
+
+    def entry_ids_subquery(self, entry_type: str, names: List[str], match_all: bool = True):
+        """
+        构造"带有指定标签的记录ID"子查询，供各CRUD的get_multi过滤使用
+
+        Args:
+            entry_type: 记录类型（emotion, finance, skill, learning）
+            names: 标签列表
+            match_all: True表示必须同时带有全部标签，False表示带有任一标签即可
+        """
+        _, table, column = ENTRY_TAG_TABLES[entry_type]
+        entry_column = table.c[column]
+        names = normalize_tags(names)
+
+        query = select(entry_column).join(Tag, Tag.id == table.c.tag_id).where(Tag.name.in_(names))
+        if match_all:
+            query = query.group_by(entry_column).having(
+                func.count(table.c.tag_id) == len(names)
+            )
+        return query
+
+    def get_counts(
+        self,
+        db: Session,
+        entry_types: Optional[List[str]] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """统计每个标签被使用的次数，按总次数降序"""
+        counts: Dict[int, Dict[str, int]] = {}
+        for entry_type, (_, table, _) in ENTRY_TAG_TABLES.items():
+            if entry_types and entry_type not in entry_types:
+                continue
+            rows = db.execute(
+                select(table.c.tag_id, func.count()).group_by(table.c.tag_id)
+            ).all()
+            for tag_id, count in rows:
+                counts.setdefault(tag_id, {})[entry_type] = count
+
+        if not counts:
+            return []
+
+        names = dict(db.execute(
+            select(Tag.id, Tag.name).where(Tag.id.in_(list(counts.keys())))
+        ).all())
+        result = [
+            {
+                "tag": names[tag_id],
+                "total": sum(by_type.values()),
+                "by_type": by_type
+            }
+            for tag_id, by_type in counts.items()
+        ]
+        result.sort(key=lambda item: (-item["total"], item["tag"]))
+        return result[:limit]
+
+    def get_co_occurrence(
+        self,
+        db: Session,
+        tag: Optional[str] = None,
+        entry_types: Optional[List[str]] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        统计标签共现次数（同一条记录上同时出现的标签对）
+
+        Args:
+            tag: 指定标签时只返回与它共现的标签
+            entry_types: 限定记录类型，可选
+            limit: 返回的标签对数量
+        """
+        tag_id = None
+        if tag is not None:
+            tag_id = db.execute(
+                select(Tag.id).where(Tag.name == normalize_tag(tag))
+            ).scalar()
+            if tag_id is None:
+                return []
+
+        pairs: Dict[tuple, int] = {}
+        for entry_type, (_, table, column) in ENTRY_TAG_TABLES.items():
+            if entry_types and entry_type not in entry_types:
+                continue
+            a = table.alias("a")
+            b = table.alias("b")
+            query = select(a.c.tag_id, b.c.tag_id, func.count()).join(
+                b, a.c[column] == b.c[column]
+            )
+            if tag_id is not None:
+                query = query.where(a.c.tag_id == tag_id, b.c.tag_id != tag_id)
+            else:
+                query = query.where(a.c.tag_id < b.c.tag_id)
+            for first, second, count in db.execute(query.group_by(a.c.tag_id, b.c.tag_id)).all():
+                pairs[(first, second)] = pairs.get((first, second), 0) + count
+
+        if not pairs:
+            return []
+
+        top = sorted(pairs.items(), key=lambda item: -item[1])[:limit]
+        ids = {tag_id for pair, _ in top for tag_id in pair}
+        names = dict(db.execute(select(Tag.id, Tag.name).where(Tag.id.in_(ids))).all())
+        return [
+            {"tags": [names[first], names[second]], "count": count}
+            for (first, second), count in top
+        ]
+
+    def rebuild_index(self, db: Session) -> int:
+        """从各记录的JSON标签列重建标签索引，返回处理的记录数"""
+        total = 0
+        for entry_type, (model, table, column) in ENTRY_TAG_TABLES.items():
+            db.execute(delete(table))
+            for entry_id, tags in db.execute(select(model.id, model.tags)).all():
+                if tags:
+                    tag_ids = self.get_or_create_many(db, normalize_tags(tags))
+                    db.execute(
+                        insert(table),
+                        [{column: entry_id, "tag_id": tag_id} for tag_id in tag_ids.values()]
+                    )
+                total += 1
+        db.commit()
+        write_versions.bump(Tag.__tablename__, *(table.name for _, table, _ in ENTRY_TAG_TABLES.values()))
+        return total
+
+
+tag = CRUDTag()
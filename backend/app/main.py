@@ -1,9 +1,13 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy import inspect
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, SessionLocal, upgrade_schema
+from app.core.metrics import MetricsMiddleware, instrument_engine, render_metrics
+from app.core.profiling import ProfilingMiddleware, profiler
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -20,12 +24,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 配置GZip压缩，减少响应大小
-app.add_middleware(
-    GZipMiddleware,
-    minimum_size=1000,  # 只有大于1000字节的响应才会被压缩
-    compresslevel=5,     # 压缩级别，1-9，5是平衡速度和压缩率的推荐值
-)
+# 按Accept-Encoding以zstd、br或gzip压缩响应，减少响应大小；缓存命中的响应已预先压缩，直接转发
+app.add_middleware(CompressionMiddleware)
+
+# 记录请求耗时、SQL次数和响应大小，放在压缩中间件外层以统计压缩后的字节数
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine, Base)
+
+# 按需的采样剖析，在最外层以计入压缩和序列化的耗时
+app.add_middleware(ProfilingMiddleware)
+if settings.PROFILING_ENABLED and settings.PROFILING_SAMPLER:
+    profiler.start()
 
 # 导入所有模型，确保它们被注册到Base.metadata中
 from app import models
@@ -35,10 +44,54 @@ from app.api import routes
 app.include_router(routes.router, prefix=settings.API_V1_STR)
 
 # 创建数据库表 - 必须在导入所有模型类之后执行
+existing_tables = set(inspect(engine).get_table_names())
 Base.metadata.create_all(bind=engine)
+upgrade_schema()
+
+# 首次创建标签索引表、每日预聚合表、财务派生表、技能关系表和技能进度表时，从已有记录回填
+derived_tables = {"tags", "daily_rollups", "finance_category_stats", "finance_monthly_totals", "recurring_series", "skill_edges", "skill_progress"}
+if derived_tables - existing_tables:
+    from app import crud
+    from app.services import rollups, finance_anomaly, budgets, recurring, skill_progress
+    db = SessionLocal()
+    try:
+        if "tags" not in existing_tables:
+            crud.tag.rebuild_index(db)
+        if "daily_rollups" not in existing_tables:
+            rollups.rebuild(db)
+        if "finance_category_stats" not in existing_tables:
+            finance_anomaly.rebuild(db)
+        if "finance_monthly_totals" not in existing_tables:
+            budgets.rebuild(db)
+        if "recurring_series" not in existing_tables:
+            recurring.rebuild(db)
+        if "skill_edges" not in existing_tables:
+            crud.skill_graph.rebuild(db)
+        if {"skill_edges", "skill_progress"} - existing_tables:
+            skill_progress.rebuild(db)
+    finally:
+        db.close()
+
+# 为已有技能补齐规范化名称
+from app.services.skill_names import backfill as backfill_skill_names
+db = SessionLocal()
+try:
+    backfill_skill_names(db)
+finally:
+    db.close()
+
+# 创建全文搜索索引
+from app.services.fulltext_search import setup_fulltext_index
+setup_fulltext_index(engine)
 print("数据库表创建完成！")
 print(f"创建的表：{list(Base.metadata.tables.keys())}")
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus格式的性能指标"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/")
 def root():
     return {"message": "个人洞察仪表盘 API", "version": "1.0.0"}
@@ -1,3 +1,9 @@
 from app.models.data import *
 from app.models.analysis import *
 from app.models.skill_tree import *
+from app.models.tag import *
+from app.models.rollup import *
+from app.models.finance import *
+from app.models.skill_graph import *
+from app.models.skill_progress import *
+from app.models.llm_call import *
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -12,6 +12,7 @@ class AnalysisResult(Base):
     type = Column(String(50), nullable=False)  # sentiment, topic, habit, goal, comprehensive
     result = Column(JSON, nullable=False)  # 存储结构化分析结果
     model_used = Column(String(50), nullable=False)  # 记录使用的模型
+    content_hash = Column(String(64))  # 计算结果时关联记录内容的哈希，用于缓存校验
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -26,3 +27,8 @@ class AnalysisResult(Base):
     finance_entry = relationship("FinanceEntry", back_populates="analysis_results")
     skill_entry = relationship("SkillEntry", back_populates="analysis_results")
     learning_entry = relationship("LearningEntry", back_populates="analysis_results")
+    
+    # 缓存查找索引：(记录ID, 分析类型, 模型)
+    __table_args__ = (
+        Index("ix_analysis_results_emotion_lookup", "emotion_entry_id", "type", "model_used"),
+    )
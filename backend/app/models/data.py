@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, ForeignKey, JSON, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -10,7 +10,7 @@ class EmotionEntry(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     tags = Column(JSON, default=[])
     sentiment = Column(String(20))  # positive, negative, neutral
     sentiment_score = Column(Float)  # -1到1
@@ -29,8 +29,11 @@ class FinanceEntry(Base):
     category = Column(String(50), nullable=False)  # income, expense
     subcategory = Column(String(50), nullable=False)  # food, transportation, salary
     description = Column(Text)
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     tags = Column(JSON, default=[])
+    is_anomaly = Column(Boolean, default=False)  # 写入时金额明显偏离同子类别的历史分布
+    anomaly_score = Column(Float)  # 写入时对数金额相对同子类别历史的z分数
+    recurring_series_id = Column(Integer, ForeignKey("recurring_series.id"), index=True)  # 所属的周期性序列
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -43,6 +46,7 @@ class SkillEntry(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
+    name_key = Column(String(100), index=True)  # 规范化的名称，用于按名称查找
     category = Column(String(50), nullable=False)
     level = Column(Integer, default=1)  # 1-5
     progress = Column(Integer, default=0)  # 0-100
@@ -50,7 +54,8 @@ class SkillEntry(Base):
     learning_paths = Column(JSON, default={})
     future_directions = Column(JSON, default=[])
     related_skills = Column(JSON, default=[])
-    skill_tree_id = Column(Integer, ForeignKey("skill_trees.id"), nullable=True)
+    tags = Column(JSON, default=[])
+    skill_tree_id = Column(Integer, ForeignKey("skill_trees.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -66,7 +71,7 @@ class LearningEntry(Base):
     topic = Column(String(100), nullable=False)
     duration = Column(Integer, nullable=False)  # 学习时长，分钟
     content = Column(Text)
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     tags = Column(JSON, default=[])
     skill_id = Column(Integer, ForeignKey("skill_entries.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
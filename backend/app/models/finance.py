@@ -0,0 +1,89 @@
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, Boolean, JSON, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class FinanceCategoryStats(Base):
+    """
+    每个(类别, 子类别)金额的运行统计，用于写入时的异常检测
+
+    采用Welford算法在线维护对数金额的均值和平方差和，
+    新增、修改、删除记录时都只需更新一行。
+    """
+    __tablename__ = "finance_category_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    category = Column(String(50), nullable=False)
+    subcategory = Column(String(50), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0)  # log(1+|金额|)的均值
+    m2 = Column(Float, nullable=False, default=0)  # 与均值之差的平方和
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("category", "subcategory", name="uq_finance_category_stats_category_subcategory"),
+    )
+
+
+class Budget(Base):
+    """按支出子类别设置的每月预算"""
+    __tablename__ = "budgets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    subcategory = Column(String(50), nullable=False, unique=True, index=True)
+    monthly_limit = Column(Float, nullable=False)
+    thresholds = Column(JSON, default=[0.8, 1.0])  # 月内支出达到预算的这些比例时发出通知
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class FinanceMonthlyTotal(Base):
+    """
+    每个支出子类别每月的累计支出，由财务记录的写入增量维护
+
+    预算状态只需读取当月的这几行，不必汇总当月的所有记录。
+    """
+    __tablename__ = "finance_monthly_totals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    subcategory = Column(String(50), nullable=False)
+    month = Column(String(7), nullable=False)  # YYYY-MM
+    spent = Column(Float, nullable=False, default=0)  # 支出金额绝对值之和
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("month", "subcategory", name="uq_finance_monthly_totals_month_subcategory"),
+    )
+
+
+class RecurringSeries(Base):
+    """
+    由描述和金额相近的财务记录聚成的序列，如订阅费、工资
+
+    每条财务记录通过recurring_series_id归入一个序列；记录数足够且间隔规律的
+    序列标记为is_recurring，并估计周期和下一次发生的日期。
+    """
+    __tablename__ = "recurring_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    text_key = Column(String(64), nullable=False)  # 类别、子类别和规范化描述的哈希
+    amount_band = Column(Integer, nullable=False)  # 对数金额分档
+    category = Column(String(50), nullable=False)
+    subcategory = Column(String(50), nullable=False)
+    description = Column(Text)  # 最近一条记录的原始描述
+    typical_amount = Column(Float, nullable=False, default=0)  # 金额中位数，保留正负号
+    occurrences = Column(Integer, nullable=False, default=0)
+    first_date = Column(Date)
+    last_date = Column(Date)
+    period = Column(String(20))  # weekly, biweekly, monthly, quarterly, yearly
+    period_days = Column(Float)  # 相邻记录间隔的中位数
+    next_date = Column(Date)  # 按周期推算的下一次发生日期
+    confidence = Column(Float, nullable=False, default=0)  # 0-1，间隔的规律程度
+    is_recurring = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_recurring_series_text_key_band", "text_key", "amount_band"),
+        Index("ix_recurring_series_is_recurring_next_date", "is_recurring", "next_date"),
+    )
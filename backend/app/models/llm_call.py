@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class LLMCall(Base):
+    """
+    每次大模型调用的耗时和用量，用于离线比较不同模型在实际请求下的表现
+
+    status为ok表示调用成功；fallback表示调用失败并回退到了简化响应；
+    cancelled表示流式调用途中客户端断开，上游调用被取消。
+    token数取自接口返回的用量，流式调用通过stream_options请求用量，接口不返回时记为空。
+    """
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    mode = Column(String(20), nullable=False)  # invoke, stream
+    status = Column(String(20), nullable=False)  # ok, fallback, cancelled
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    total_tokens = Column(Integer)
+    cost = Column(Float)  # 按配置的单价估算，未配置单价时为空
+    ttft_ms = Column(Float)  # 首个token的耗时，只有流式调用有值
+    latency_ms = Column(Float, nullable=False)
+    output_chars = Column(Integer, default=0)
+    fallback = Column(Boolean, default=False)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_llm_calls_created", "created_at"),
+        Index("ix_llm_calls_model", "provider", "model", "created_at"),
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Float, Date, Index, UniqueConstraint
+
+from app.core.database import Base
+
+
+class DailyRollup(Base):
+    """
+    按天预聚合的指标，由各CRUD在写入记录时增量维护
+
+    每行是某个指标在某个维度（如财务子类别、技能ID）上一天的累计值和记录数，
+    分析类接口直接读取这里，而不是扫描原始记录。
+    """
+    __tablename__ = "daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric = Column(String(30), nullable=False)  # sentiment, spend, income, learning_minutes
+    dimension = Column(String(100), nullable=False, default="")  # 子类别、技能ID等，无维度为空串
+    date = Column(Date, nullable=False)
+    total = Column(Float, nullable=False, default=0)  # 当天累计值
+    count = Column(Integer, nullable=False, default=0)  # 参与累计的记录数
+
+    __table_args__ = (
+        UniqueConstraint("metric", "dimension", "date", name="uq_daily_rollups_metric_dimension_date"),
+        Index("ix_daily_rollups_metric_date", "metric", "date"),
+    )
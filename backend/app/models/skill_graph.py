@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class SkillEdge(Base):
+    """
+    技能之间的边
+
+    kind为prerequisite时表示source是target的前置技能；
+    kind为related时来自技能的related_skills列表，表示source把target列为相关技能。
+    """
+    __tablename__ = "skill_edges"
+
+    source_id = Column(Integer, ForeignKey("skill_entries.id"), primary_key=True)
+    target_id = Column(Integer, ForeignKey("skill_entries.id"), primary_key=True)
+    kind = Column(String(20), primary_key=True)  # prerequisite, related
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_skill_edges_target_kind", "target_id", "kind"),
+    )
+
+
+class SkillClosure(Base):
+    """
+    前置关系的传递闭包：ancestor经过一条或多条prerequisite边可以到达descendant
+
+    path_count记录两者之间不同路径的条数，增删边时按路径数增减，
+    减到0才删除该行，因此删除边也能增量维护而不必全量重算。
+    """
+    __tablename__ = "skill_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("skill_entries.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("skill_entries.id"), primary_key=True)
+    path_count = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        Index("ix_skill_closure_descendant", "descendant_id", "ancestor_id"),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class SkillProgress(Base):
+    """
+    技能的累计学习时长，随学习记录的增删改增量维护
+
+    own_minutes是直接关联该技能的学习时长；subtree_minutes还包括以该技能为
+    （直接或间接）前置的所有技能的学习时长，即沿前置关系向上汇总的结果。
+    这些计数也是学习-技能统计接口的数据来源，避免每次请求都全量连接学习记录。
+    """
+    __tablename__ = "skill_progress"
+
+    skill_id = Column(Integer, ForeignKey("skill_entries.id"), primary_key=True)
+    own_minutes = Column(Integer, nullable=False, default=0)
+    subtree_minutes = Column(Integer, nullable=False, default=0)
+    learning_count = Column(Integer, nullable=False, default=0)
+    first_date = Column(Date)  # 直接关联该技能的最早、最晚学习日期
+    last_date = Column(Date)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
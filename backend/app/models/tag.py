@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+from app.models.data import EmotionEntry, FinanceEntry, SkillEntry, LearningEntry
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), nullable=False, unique=True, index=True)  # 规范化后的标签名
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+def _entry_tag_table(entry_table: str, entry_column: str) -> Table:
+    """创建记录-标签关联表，主键(记录ID, 标签ID)，另建(标签ID, 记录ID)索引用于按标签查记录"""
+    return Table(
+        f"{entry_table}_tags",
+        Base.metadata,
+        Column(entry_column, Integer, ForeignKey(f"{entry_table}.id"), primary_key=True),
+        Column("tag_id", Integer, ForeignKey("tags.id"), primary_key=True),
+        Index(f"ix_{entry_table}_tags_tag_entry", "tag_id", entry_column),
+    )
+
+
+emotion_entry_tags = _entry_tag_table("emotion_entries", "emotion_entry_id")
+finance_entry_tags = _entry_tag_table("finance_entries", "finance_entry_id")
+skill_entry_tags = _entry_tag_table("skill_entries", "skill_entry_id")
+learning_entry_tags = _entry_tag_table("learning_entries", "learning_entry_id")
+
+
+# 记录类型 -> (模型, 关联表, 关联表中的记录ID列名)
+ENTRY_TAG_TABLES = {
+    "emotion": (EmotionEntry, emotion_entry_tags, "emotion_entry_id"),
+    "finance": (FinanceEntry, finance_entry_tags, "finance_entry_id"),
+    "skill": (SkillEntry, skill_entry_tags, "skill_entry_id"),
+    "learning": (LearningEntry, learning_entry_tags, "learning_entry_id"),
+}
@@ -2,3 +2,5 @@ from .emotion import Emotion, EmotionCreate, EmotionUpdate
 from .finance import Finance, FinanceCreate, FinanceUpdate
 from .skill import Skill, SkillCreate, SkillUpdate
 from .learning import Learning, LearningCreate, LearningUpdate
+from .budget import Budget, BudgetCreate, BudgetUpdate
+from .skill_tree import SkillTree, SkillTreeCreate, SkillTreeUpdate, PrerequisiteCreate
@@ -0,0 +1,48 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+
+
+# 预算基础模式
+class BudgetBase(BaseModel):
+    subcategory: str = Field(..., description="支出子类别：如 food, transportation")
+    monthly_limit: float = Field(..., gt=0, description="每月预算金额")
+    thresholds: List[float] = Field(default_factory=lambda: [0.8, 1.0], description="达到预算的这些比例时发出通知")
+
+    @field_validator("thresholds")
+    @classmethod
+    def sort_thresholds(cls, v: List[float]) -> List[float]:
+        if any(t <= 0 for t in v):
+            raise ValueError("通知比例必须大于0")
+        return sorted(set(v))
+
+
+# 创建预算模式
+class BudgetCreate(BudgetBase):
+    pass
+
+
+# 更新预算模式
+class BudgetUpdate(BaseModel):
+    monthly_limit: Optional[float] = Field(None, gt=0)
+    thresholds: Optional[List[float]] = None
+
+    @field_validator("thresholds")
+    @classmethod
+    def sort_thresholds(cls, v: Optional[List[float]]) -> Optional[List[float]]:
+        if v is None:
+            return v
+        if any(t <= 0 for t in v):
+            raise ValueError("通知比例必须大于0")
+        return sorted(set(v))
+
+
+# 预算响应模式
+class Budget(BudgetBase):
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
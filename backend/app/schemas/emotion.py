@@ -18,7 +18,7 @@ class EmotionCreate(EmotionBase):
 # 更新情感记录模式
 class EmotionUpdate(BaseModel):
     content: Optional[str] = None
-    date: Optional[date] = None
+    date: Optional[DateType] = None
     tags: Optional[List[str]] = None
     sentiment: Optional[str] = None
     sentiment_score: Optional[float] = None
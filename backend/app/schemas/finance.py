@@ -24,13 +24,16 @@ class FinanceUpdate(BaseModel):
     category: Optional[str] = None
     subcategory: Optional[str] = None
     description: Optional[str] = None
-    date: Optional[date] = None
+    date: Optional[DateType] = None
     tags: Optional[List[str]] = None
 
 
 # 财务记录响应模式
 class Finance(FinanceBase):
     id: int
+    is_anomaly: bool = Field(False, description="写入时金额明显偏离同子类别的历史分布")
+    anomaly_score: Optional[float] = Field(None, description="写入时对数金额相对同子类别历史的z分数")
+    recurring_series_id: Optional[int] = Field(None, description="所属的周期性交易序列")
     created_at: datetime
     updated_at: Optional[datetime] = None
     
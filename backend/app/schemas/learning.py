@@ -23,7 +23,7 @@ class LearningUpdate(BaseModel):
     topic: Optional[str] = None
     duration: Optional[int] = Field(None, gt=0)
     content: Optional[str] = None
-    date: Optional[date] = None
+    date: Optional[DateType] = None
     tags: Optional[List[str]] = None
     skill_id: Optional[int] = None
 
@@ -31,6 +31,7 @@ class SkillUpdate(BaseModel):
     learning_paths: Optional[Dict] = None
     future_directions: Optional[List[str]] = None
     related_skills: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
     skill_tree_id: Optional[int] = None
 
 
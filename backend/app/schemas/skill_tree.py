@@ -0,0 +1,38 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+# 技能树基础模式
+class SkillTreeBase(BaseModel):
+    name: str = Field(..., description="技能树名称")
+    category: str = Field(..., description="技能树类别：如 frontend, backend, ai_ml")
+    description: Optional[str] = Field(None, description="技能树描述")
+
+
+# 创建技能树模式
+class SkillTreeCreate(SkillTreeBase):
+    pass
+
+
+# 更新技能树模式
+class SkillTreeUpdate(BaseModel):
+    name: Optional[str] = None
+    category: Optional[str] = None
+    description: Optional[str] = None
+
+
+# 技能树响应模式
+class SkillTree(SkillTreeBase):
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+# 添加前置技能模式
+class PrerequisiteCreate(BaseModel):
+    prerequisite_id: int = Field(..., description="前置技能ID")
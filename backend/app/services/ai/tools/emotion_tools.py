@@ -1,7 +1,8 @@
 from langchain_core.tools import tool
 from app.models.data import EmotionEntry
-from app.crud.emotion import create, get_multi, update, get
+from app.crud.emotion import emotion as crud_emotion
 from app.schemas.emotion import EmotionCreate, EmotionUpdate
+from app.services import sentiment
 from app.core.database import get_db
 from typing import List, Optional
 from datetime import date
@@ -34,7 +35,7 @@ def create_emotion_entry(content: str, date_str: str, tags: List[str] = None) ->
         )
         
         # 使用crud创建记录
-        emotion = create(db, obj_in=emotion_in)
+        emotion = crud_emotion.create(db, obj_in=emotion_in)
         
         return {
             "success": True,
@@ -52,13 +53,14 @@ def create_emotion_entry(content: str, date_str: str, tags: List[str] = None) ->
 
 # 情感历史获取工具
 @tool
-def get_emotion_history(start_date: Optional[str] = None, end_date: Optional[str] = None, limit: int = 10) -> dict:
+def get_emotion_history(start_date: Optional[str] = None, end_date: Optional[str] = None, tags: Optional[List[str]] = None, limit: int = 10) -> dict:
     """
     获取指定日期范围内的情感记录
     
     参数:
     - start_date: 开始日期，格式YYYY-MM-DD，可选
     - end_date: 结束日期，格式YYYY-MM-DD，可选
+    - tags: 标签列表，只返回同时带有全部标签的记录，可选
     - limit: 返回记录数量限制，默认10
     
     返回:
@@ -72,7 +74,7 @@ def get_emotion_history(start_date: Optional[str] = None, end_date: Optional[str
         end = date.fromisoformat(end_date) if end_date else None
         
         # 获取情感记录
-        emotions = get_multi(db, limit=limit, start_date=start, end_date=end)
+        emotions = crud_emotion.get_multi(db, limit=limit, start_date=start_date, end_date=end_date, tags=tags)
         
         return {
             "success": True,
@@ -112,7 +114,7 @@ def update_emotion_entry(emotion_id: int, content: Optional[str] = None, tags: O
         db = next(get_db())
         
         # 检查记录是否存在
-        emotion = get(db, id=emotion_id)
+        emotion = crud_emotion.get(db, id=emotion_id)
         if not emotion:
             return {
                 "success": False,
@@ -136,7 +138,7 @@ def update_emotion_entry(emotion_id: int, content: Optional[str] = None, tags: O
         
         # 更新记录
         emotion_update = EmotionUpdate(**update_data)
-        updated_emotion = update(db, db_obj=emotion, obj_in=emotion_update)
+        updated_emotion = crud_emotion.update(db, db_obj=emotion, obj_in=emotion_update)
         
         return {
             "success": True,
@@ -150,3 +152,78 @@ def update_emotion_entry(emotion_id: int, content: Optional[str] = None, tags: O
             "success": False,
             "message": f"更新失败: {str(e)}"
         }
+
+# 情感分析工具
+@tool
+def analyze_emotions(start_date: str, end_date: str) -> dict:
+    """
+    分析指定日期范围内情感记录的情绪倾向
+    
+    参数:
+    - start_date: 开始日期，格式YYYY-MM-DD
+    - end_date: 结束日期，格式YYYY-MM-DD
+    
+    返回:
+    - 包含情绪分布、每日情绪得分和逐条分析结果的字典
+    """
+    try:
+        db = next(get_db())
+        
+        # 解析日期
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+        
+        # 获取情感记录
+        emotions = crud_emotion.get_multi(db, start_date=start_date, end_date=end_date)
+        
+        # 逐条分析，已分析过且内容未变的记录直接使用缓存结果
+        analyses = sentiment.analyze_entries(db, emotions)
+        
+        # 按情绪倾向统计
+        sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
+        for analysis in analyses.values():
+            sentiment_counts[analysis["sentiment"]] += 1
+        
+        # 按日期统计
+        daily_stats = {}
+        for e in emotions:
+            date_key = e.date.isoformat()
+            if date_key not in daily_stats:
+                daily_stats[date_key] = {
+                    "score": 0,
+                    "entries": 0
+                }
+            daily_stats[date_key]["score"] += analyses[e.id]["score"]
+            daily_stats[date_key]["entries"] += 1
+        for stats in daily_stats.values():
+            stats["score"] = round(stats["score"] / stats["entries"], 4)
+        
+        avg_score = sum(a["score"] for a in analyses.values()) / len(analyses) if analyses else 0
+        
+        return {
+            "success": True,
+            "period": {
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat()
+            },
+            "summary": {
+                "record_count": len(emotions),
+                "avg_score": round(avg_score, 4),
+                "sentiment_counts": sentiment_counts
+            },
+            "daily_stats": daily_stats,
+            "data": [
+                {
+                    "id": str(e.id),
+                    "date": e.date.isoformat(),
+                    "content": e.content,
+                    **analyses[e.id]
+                }
+                for e in emotions
+            ]
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"分析失败: {str(e)}"
+        }
@@ -1,6 +1,7 @@
 from langchain_core.tools import tool
 from app.models.data import FinanceEntry
-from app.crud.finance import create, get_multi, update, get
+from app.crud.finance import finance as crud_finance
+from app.services import finance_anomaly, budgets
 from app.schemas.finance import FinanceCreate, FinanceUpdate
 from app.core.database import get_db
 from typing import List, Optional
@@ -47,7 +48,7 @@ def create_finance_entry(amount: float, category: str, subcategory: str, descrip
         )
         
         # 使用crud创建记录
-        finance = create(db, obj_in=finance_in)
+        finance = crud_finance.create(db, obj_in=finance_in)
         
         return {
             "success": True,
@@ -56,7 +57,9 @@ def create_finance_entry(amount: float, category: str, subcategory: str, descrip
             "amount": finance.amount,
             "category": finance.category,
             "subcategory": finance.subcategory,
-            "date": finance.date.isoformat()
+            "date": finance.date.isoformat(),
+            "is_anomaly": finance.is_anomaly,
+            "anomaly_score": finance.anomaly_score
         }
     except Exception as e:
         return {
@@ -66,7 +69,7 @@ def create_finance_entry(amount: float, category: str, subcategory: str, descrip
 
 # 财务历史获取工具
 @tool
-def get_finance_history(start_date: Optional[str] = None, end_date: Optional[str] = None, category: Optional[str] = None, limit: int = 10) -> dict:
+def get_finance_history(start_date: Optional[str] = None, end_date: Optional[str] = None, category: Optional[str] = None, tags: Optional[List[str]] = None, limit: int = 10) -> dict:
     """
     获取指定日期范围内的财务记录
     
@@ -74,6 +77,7 @@ def get_finance_history(start_date: Optional[str] = None, end_date: Optional[str
     - start_date: 开始日期，格式YYYY-MM-DD，可选
     - end_date: 结束日期，格式YYYY-MM-DD，可选
     - category: 类别，可选，只能是income或expense
+    - tags: 标签列表，只返回同时带有全部标签的记录，可选
     - limit: 返回记录数量限制，默认10
     
     返回:
@@ -87,7 +91,7 @@ def get_finance_history(start_date: Optional[str] = None, end_date: Optional[str
         end = date.fromisoformat(end_date) if end_date else None
         
         # 获取财务记录
-        finances = get_multi(db, limit=limit, start_date=start, end_date=end, category=category)
+        finances = crud_finance.get_multi(db, limit=limit, start_date=start_date, end_date=end_date, category=category, tags=tags)
         
         return {
             "success": True,
@@ -131,7 +135,7 @@ def analyze_finance(start_date: str, end_date: str) -> dict:
         end = date.fromisoformat(end_date)
         
         # 获取财务记录
-        finances = get_multi(db, start_date=start, end_date=end)
+        finances = crud_finance.get_multi(db, start_date=start_date, end_date=end_date)
         
         # 分析数据
         total_income = sum(f.amount for f in finances if f.category == "income")
@@ -170,3 +174,75 @@ def analyze_finance(start_date: str, end_date: str) -> dict:
             "success": False,
             "message": f"分析失败: {str(e)}"
         }
+
+# 财务异常记录获取工具
+@tool
+def get_finance_anomalies(start_date: Optional[str] = None, end_date: Optional[str] = None, limit: int = 10) -> dict:
+    """
+    获取写入时被标记为异常的财务记录（金额明显偏离同子类别的历史水平）
+    
+    参数:
+    - start_date: 开始日期，格式YYYY-MM-DD，可选
+    - end_date: 结束日期，格式YYYY-MM-DD，可选
+    - limit: 返回记录数量限制，默认10
+    
+    返回:
+    - 包含异常记录及其子类别典型金额的字典
+    """
+    try:
+        db = next(get_db())
+        
+        finances = crud_finance.get_multi(db, limit=limit, start_date=start_date, end_date=end_date, anomalies_only=True)
+        
+        typical = {}
+        for f in finances:
+            key = (f.category, f.subcategory)
+            if key not in typical:
+                typical[key] = finance_anomaly.typical_amount(db, f.category, f.subcategory)
+        
+        return {
+            "success": True,
+            "data": [
+                {
+                    "id": str(f.id),
+                    "amount": f.amount,
+                    "category": f.category,
+                    "subcategory": f.subcategory,
+                    "description": f.description,
+                    "date": f.date.isoformat(),
+                    "anomaly_score": f.anomaly_score,
+                    "typical_amount": typical[(f.category, f.subcategory)]
+                }
+                for f in finances
+            ]
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"获取失败: {str(e)}"
+        }
+
+# 预算执行情况工具
+@tool
+def get_budget_status(month: Optional[str] = None) -> dict:
+    """
+    获取各子类别预算的月内执行情况
+    
+    参数:
+    - month: 月份，格式YYYY-MM，可选，默认为当月
+    
+    返回:
+    - 包含每个预算已支出、剩余、比例、推算月末支出和状态（ok/warning/exceeded）的字典
+    """
+    try:
+        db = next(get_db())
+        
+        return {
+            "success": True,
+            "data": budgets.get_status(db, month=month)
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"获取失败: {str(e)}"
+        }
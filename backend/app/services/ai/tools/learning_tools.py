@@ -1,6 +1,6 @@
 from langchain_core.tools import tool
 from app.models.data import LearningEntry
-from app.crud.learning import create, get_multi, update, get
+from app.crud.learning import learning as crud_learning
 from app.schemas.learning import LearningCreate, LearningUpdate
 from app.core.database import get_db
 from typing import List, Optional
@@ -47,7 +47,7 @@ def create_learning_entry(topic: str, duration: int, skill_id: Optional[int] = N
         )
         
         # 使用crud创建记录
-        learning = create(db, obj_in=learning_in)
+        learning = crud_learning.create(db, obj_in=learning_in)
         
         return {
             "success": True,
@@ -65,7 +65,7 @@ def create_learning_entry(topic: str, duration: int, skill_id: Optional[int] = N
 
 # 学习历史获取工具
 @tool
-def get_learning_history(start_date: Optional[str] = None, end_date: Optional[str] = None, skill_id: Optional[int] = None, limit: int = 10) -> dict:
+def get_learning_history(start_date: Optional[str] = None, end_date: Optional[str] = None, skill_id: Optional[int] = None, tags: Optional[List[str]] = None, limit: int = 10) -> dict:
     """
     获取指定日期范围内的学习记录
     
@@ -73,6 +73,7 @@ def get_learning_history(start_date: Optional[str] = None, end_date: Optional[st
     - start_date: 开始日期，格式YYYY-MM-DD，可选
     - end_date: 结束日期，格式YYYY-MM-DD，可选
     - skill_id: 关联的技能ID，可选
+    - tags: 标签列表，只返回同时带有全部标签的记录，可选
     - limit: 返回记录数量限制，默认10
     
     返回:
@@ -86,7 +87,7 @@ def get_learning_history(start_date: Optional[str] = None, end_date: Optional[st
         end = date.fromisoformat(end_date) if end_date else None
         
         # 获取学习记录
-        learnings = get_multi(db, limit=limit, start_date=start, end_date=end, skill_id=skill_id)
+        learnings = crud_learning.get_multi(db, limit=limit, start_date=start_date, end_date=end_date, skill_id=skill_id, tags=tags)
         
         return {
             "success": True,
@@ -130,7 +131,7 @@ def analyze_learning(start_date: str, end_date: str) -> dict:
         end = date.fromisoformat(end_date)
         
         # 获取学习记录
-        learnings = get_multi(db, start_date=start, end_date=end)
+        learnings = crud_learning.get_multi(db, start_date=start_date, end_date=end_date)
         
         # 分析数据
         total_duration = sum(l.duration for l in learnings)
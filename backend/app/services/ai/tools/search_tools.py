@@ -0,0 +1,43 @@
+from langchain_core.tools import tool
+from app.services.semantic_search import semantic_index
+from typing import List, Optional
+from datetime import date
+
+# 语义搜索工具
+@tool
+def semantic_search_entries(query: str, k: int = 5, entry_types: Optional[List[str]] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """
+    按语义搜索情感记录、学习记录和财务记录
+
+    参数:
+    - query: 查询文本，如"工作压力大的时候"、"学习Rust"
+    - k: 返回结果数量，默认5
+    - entry_types: 限定记录类型列表，可选值emotion、finance、learning，可选
+    - start_date: 开始日期，格式YYYY-MM-DD，可选
+    - end_date: 结束日期，格式YYYY-MM-DD，可选
+
+    返回:
+    - 包含按相似度排序的记录列表的字典
+    """
+    try:
+        if not semantic_index.available:
+            return {
+                "success": False,
+                "message": "语义搜索未启用"
+            }
+
+        # 解析日期
+        start = date.fromisoformat(start_date) if start_date else None
+        end = date.fromisoformat(end_date) if end_date else None
+
+        hits = semantic_index.search(query, k=k, entry_types=entry_types, start_date=start, end_date=end)
+
+        return {
+            "success": True,
+            "data": hits
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"搜索失败: {str(e)}"
+        }
@@ -1,6 +1,6 @@
 from langchain_core.tools import tool
 from app.models.data import SkillEntry
-from app.crud.skill import create, get_multi, update, get
+from app.crud.skill import skill as crud_skill
 from app.schemas.skill import SkillCreate, SkillUpdate
 from app.core.database import get_db
 from typing import List, Optional
@@ -50,7 +50,7 @@ def create_skill_entry(name: str, category: str, level: int = 1, progress: int =
         )
         
         # 使用crud创建记录
-        skill = create(db, obj_in=skill_in)
+        skill = crud_skill.create(db, obj_in=skill_in)
         
         return {
             "success": True,
@@ -69,42 +69,60 @@ def create_skill_entry(name: str, category: str, level: int = 1, progress: int =
 
 # 技能获取工具
 @tool
-def get_skill_progress(skill_id: Optional[int] = None, name: Optional[str] = None) -> dict:
+def get_skill_progress(
+    skill_id: Optional[int] = None,
+    name: Optional[str] = None,
+    names: Optional[List[str]] = None
+) -> dict:
     """
     获取技能进度信息
     
     参数:
     - skill_id: 技能ID，可选
-    - name: 技能名称，可选
+    - name: 技能名称，可选，忽略大小写和全半角
+    - names: 多个技能名称，可选，一次查询全部
     
     返回:
-    - 包含技能进度信息的字典
+    - 包含技能进度信息的字典；有名称找不到时在not_found中给出相近的技能名称
     """
     try:
         db = next(get_db())
+        not_found = []
         
         if skill_id:
             # 通过ID获取技能
-            skill = get(db, id=skill_id)
+            skill = crud_skill.get(db, id=skill_id)
             if not skill:
                 return {
                     "success": False,
                     "message": f"技能不存在: {skill_id}"
                 }
             skills = [skill]
-        elif name:
-            # 通过名称获取技能
-            skills = [s for s in get_multi(db) if s.name == name]
+        elif name or names:
+            # 通过名称索引批量获取技能
+            lookup = list(dict.fromkeys(([name] if name else []) + list(names or [])))
+            skills = []
+            for skill_name, matches in crud_skill.get_skills_by_names(db, lookup).items():
+                if matches:
+                    skills.extend(matches)
+                else:
+                    not_found.append({
+                        "name": skill_name,
+                        "suggestions": [
+                            item["name"] for item in crud_skill.search_names(db, skill_name, limit=5)
+                        ]
+                    })
             if not skills:
                 return {
                     "success": False,
-                    "message": f"技能不存在: {name}"
+                    "message": f"技能不存在: {', '.join(lookup)}",
+                    "not_found": not_found
                 }
         else:
             # 获取所有技能
-            skills = get_multi(db)
+            skills = crud_skill.get_multi(db)
         
-        return {
+        result = {
             "success": True,
             "data": [
                 {
@@ -118,6 +136,9 @@ def get_skill_progress(skill_id: Optional[int] = None, name: Optional[str] = Non
                 for s in skills
             ]
         }
+        if not_found:
+            result["not_found"] = not_found
+        return result
     except Exception as e:
         return {
             "success": False,
@@ -142,7 +163,7 @@ def update_skill_progress(skill_id: int, level: Optional[int] = None, progress:
         db = next(get_db())
         
         # 检查技能是否存在
-        skill = get(db, id=skill_id)
+        skill = crud_skill.get(db, id=skill_id)
         if not skill:
             return {
                 "success": False,
@@ -177,7 +198,7 @@ def update_skill_progress(skill_id: int, level: Optional[int] = None, progress:
         
         # 更新记录
         skill_update = SkillUpdate(**update_data)
-        updated_skill = update(db, db_obj=skill, obj_in=skill_update)
+        updated_skill = crud_skill.update(db, db_obj=skill, obj_in=skill_update)
         
         return {
             "success": True,
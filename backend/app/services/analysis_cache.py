@@ -0,0 +1,184 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.analysis import AnalysisResult
+from app.models.data import EmotionEntry
+
+
+# 每种记录对应的外键列，以及参与内容哈希的字段
+# 只有这些字段变化时缓存的分析结果才会失效；新增逐条分析器时在这里登记记录类型，并在对应CRUD中调用invalidate_*
+ENTRY_CACHE_CONFIG = {
+    EmotionEntry: ("emotion_entry_id", ("content",)),
+}
+
+
+def _config_for(entry: Any):
+    config = ENTRY_CACHE_CONFIG.get(type(entry))
+    if config is None:
+        raise ValueError(f"不支持缓存分析结果的记录类型: {type(entry).__name__}")
+    return config
+
+
+def compute_content_hash(entry: Any) -> str:
+    """
+    计算记录分析相关字段的内容哈希
+
+    Args:
+        entry: 情感、财务、技能或学习记录
+
+    Returns:
+        SHA-256十六进制字符串
+    """
+    _, fields = _config_for(entry)
+    payload = {field: getattr(entry, field) for field in fields}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached(db: Session, entry: Any, type: str, model_used: str) -> Optional[Dict[str, Any]]:
+    """根据(记录ID, 分析类型, 模型, 内容哈希)查找缓存的分析结果，未命中返回None"""
+    fk_column, _ = _config_for(entry)
+    cached = db.query(AnalysisResult.result).filter(
+        getattr(AnalysisResult, fk_column) == entry.id,
+        AnalysisResult.type == type,
+        AnalysisResult.model_used == model_used,
+        AnalysisResult.content_hash == compute_content_hash(entry)
+    ).first()
+    return cached.result if cached else None
+
+
+def store(
+    db: Session,
+    entry: Any,
+    type: str,
+    model_used: str,
+    result: Dict[str, Any],
+    commit: bool = True
+) -> AnalysisResult:
+    """保存分析结果，同一(记录, 类型, 模型)只保留最新一条"""
+    fk_column, _ = _config_for(entry)
+    db.query(AnalysisResult).filter(
+        getattr(AnalysisResult, fk_column) == entry.id,
+        AnalysisResult.type == type,
+        AnalysisResult.model_used == model_used
+    ).delete(synchronize_session=False)
+
+    db_obj = AnalysisResult(
+        type=type,
+        result=result,
+        model_used=model_used,
+        content_hash=compute_content_hash(entry),
+        **{fk_column: entry.id}
+    )
+    db.add(db_obj)
+    if commit:
+        db.commit()
+    return db_obj
+
+
+def get_or_compute(
+    db: Session,
+    entry: Any,
+    type: str,
+    model_used: str,
+    compute: Callable[[Any], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    带缓存的单条记录分析
+
+    Args:
+        entry: 待分析的记录
+        type: 分析类型，如sentiment、topic
+        model_used: 使用的模型名称，不同模型的结果分别缓存
+        compute: 未命中时调用的分析函数，接收记录并返回可JSON序列化的结果
+
+    Returns:
+        分析结果
+    """
+    cached = get_cached(db, entry, type, model_used)
+    if cached is not None:
+        return cached
+
+    result = compute(entry)
+    store(db, entry, type, model_used, result)
+    return result
+
+
+def get_or_compute_many(
+    db: Session,
+    entries: List[Any],
+    type: str,
+    model_used: str,
+    compute: Callable[[Any], Dict[str, Any]]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    批量带缓存的记录分析，一次查询取回所有缓存，只对内容变化或未分析过的记录调用compute
+
+    Args:
+        entries: 同一类型的记录列表
+        type: 分析类型
+        model_used: 使用的模型名称
+        compute: 未命中时调用的分析函数
+
+    Returns:
+        记录ID到分析结果的字典
+    """
+    if not entries:
+        return {}
+
+    fk_column, _ = _config_for(entries[0])
+    fk = getattr(AnalysisResult, fk_column)
+    hashes = {entry.id: compute_content_hash(entry) for entry in entries}
+
+    # 分批查询，避免超出SQLite参数数量限制
+    cached: Dict[int, Dict[str, Any]] = {}
+    ids = list(hashes.keys())
+    for i in range(0, len(ids), 500):
+        rows = db.query(fk, AnalysisResult.content_hash, AnalysisResult.result).filter(
+            fk.in_(ids[i:i + 500]),
+            AnalysisResult.type == type,
+            AnalysisResult.model_used == model_used
+        ).all()
+        for entry_id, content_hash, result in rows:
+            if content_hash == hashes[entry_id]:
+                cached[entry_id] = result
+
+    results: Dict[int, Dict[str, Any]] = {}
+    missed = False
+    for entry in entries:
+        if entry.id in cached:
+            results[entry.id] = cached[entry.id]
+            continue
+        results[entry.id] = compute(entry)
+        store(db, entry, type, model_used, results[entry.id], commit=False)
+        missed = True
+
+    if missed:
+        db.commit()
+    return results
+
+
+def invalidate_stale(db: Session, entry: Any) -> int:
+    """
+    删除与记录当前内容哈希不一致的缓存结果，由CRUD更新时调用，不提交事务
+
+    Returns:
+        删除的缓存条数
+    """
+    fk_column, _ = _config_for(entry)
+    return db.query(AnalysisResult).filter(
+        getattr(AnalysisResult, fk_column) == entry.id,
+        (AnalysisResult.content_hash != compute_content_hash(entry))
+        | AnalysisResult.content_hash.is_(None)
+    ).delete(synchronize_session=False)
+
+
+def invalidate_all(db: Session, entry: Any) -> int:
+    """删除记录的全部缓存结果，由CRUD删除时调用，不提交事务"""
+    fk_column, _ = _config_for(entry)
+    return db.query(AnalysisResult).filter(
+        getattr(AnalysisResult, fk_column) == entry.id
+    ).delete(synchronize_session=False)
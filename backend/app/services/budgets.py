@@ -0,0 +1,390 @@
+import asyncio
+import calendar
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import date
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.shared_state import file_lock, shared_path
+from app.models.data import FinanceEntry
+from app.models.finance import Budget, FinanceMonthlyTotal
+
+
+# 单条支出记录对月度累计的贡献：(子类别, 月份, 金额)
+Contribution = Tuple[str, str, float]
+
+
+def month_of(day: date) -> str:
+    return day.strftime("%Y-%m")
+
+
+def contributions(entry: FinanceEntry) -> List[Contribution]:
+    """只有支出计入预算"""
+    if entry.category != "expense":
+        return []
+    return [(entry.subcategory or "", month_of(entry.date), abs(float(entry.amount)))]
+
+
+def _get_total(db: Session, subcategory: str, month: str) -> FinanceMonthlyTotal:
+    """取出子类别当月的累计行，不存在时创建"""
+    db.execute(
+        sqlite_insert(FinanceMonthlyTotal)
+        .values(subcategory=subcategory, month=month, spent=0.0, count=0)
+        .on_conflict_do_nothing(index_elements=["month", "subcategory"])
+    )
+    return db.execute(
+        select(FinanceMonthlyTotal).where(
+            FinanceMonthlyTotal.month == month,
+            FinanceMonthlyTotal.subcategory == subcategory
+        )
+    ).scalar_one()
+
+
+def _crossings(
+    budget: Optional[Budget],
+    month: str,
+    before: float,
+    after: float
+) -> List[Dict[str, Any]]:
+    """支出从before增加到after时越过的通知比例"""
+    if budget is None or after <= before:
+        return []
+    events = []
+    for threshold in sorted(budget.thresholds or []):
+        line = budget.monthly_limit * threshold
+        if before < line <= after:
+            events.append({
+                "type": "budget_threshold",
+                "subcategory": budget.subcategory,
+                "month": month,
+                "threshold": threshold,
+                "monthly_limit": budget.monthly_limit,
+                "spent": round(after, 2),
+                "ratio": round(after / budget.monthly_limit, 4),
+            })
+    return events
+
+
+def _add_deltas(
+    deltas: Dict[Tuple[str, str], Tuple[float, int]],
+    items: List[Contribution],
+    sign: int
+) -> None:
+    """把贡献按(子类别, 月份)合并为金额和记录数的净变化"""
+    for subcategory, month, amount in items:
+        spent, count = deltas.get((subcategory, month), (0.0, 0))
+        deltas[(subcategory, month)] = (spent + sign * amount, count + sign)
+
+
+def _apply_deltas(db: Session, deltas: Dict[Tuple[str, str], Tuple[float, int]]) -> List[Dict[str, Any]]:
+    """
+    把净变化写入月度累计，只比较写入前后的累计值判断越过的通知比例
+
+    每个(子类别, 月份)只读写一行累计和一行预算，与当月记录数量无关。
+    """
+    events: List[Dict[str, Any]] = []
+    for (subcategory, month), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        total = _get_total(db, subcategory, month)
+        before = total.spent
+        total.spent = max(before + amount, 0.0)
+        total.count = max(total.count + count, 0)
+        if total.spent > before:
+            budget = db.execute(
+                select(Budget).where(Budget.subcategory == subcategory)
+            ).scalar_one_or_none()
+            events.extend(_crossings(budget, month, before, total.spent))
+    return events
+
+
+def apply(db: Session, items: List[Contribution], sign: int = 1) -> List[Dict[str, Any]]:
+    """
+    把支出累加（sign=1）或扣除（sign=-1）到月度累计，不提交事务
+
+    Returns:
+        本次写入越过的预算通知比例，应在事务提交后调用notify发送
+    """
+    deltas: Dict[Tuple[str, str], Tuple[float, int]] = {}
+    _add_deltas(deltas, items, sign)
+    return _apply_deltas(db, deltas)
+
+
+def add_entry(db: Session, entry: FinanceEntry) -> List[Dict[str, Any]]:
+    """新增记录时累加其支出"""
+    return apply(db, contributions(entry), 1)
+
+
+def remove_entry(db: Session, entry: FinanceEntry) -> None:
+    """删除记录时扣除其支出"""
+    apply(db, contributions(entry), -1)
+
+
+def replace_entry(db: Session, before: List[Contribution], entry: FinanceEntry) -> List[Dict[str, Any]]:
+    """
+    更新记录后用新支出替换旧支出
+
+    按(子类别, 月份)合并新旧贡献后只写入净变化，已超过通知比例的支出修改其他字段时
+    不会先扣除再累加而重复通知。
+
+    Args:
+        before: 修改字段前调用contributions得到的旧贡献
+        entry: 已修改的记录
+    """
+    after = contributions(entry)
+    if before == after:
+        return []
+    deltas: Dict[Tuple[str, str], Tuple[float, int]] = {}
+    _add_deltas(deltas, before, -1)
+    _add_deltas(deltas, after, 1)
+    return _apply_deltas(db, deltas)
+
+
+def rebuild(db: Session) -> int:
+    """从财务记录全量重建月度累计，返回写入的行数"""
+    db.execute(delete(FinanceMonthlyTotal))
+    month = func.strftime("%Y-%m", FinanceEntry.date)
+    rows = [
+        {"subcategory": subcategory, "month": row_month, "spent": spent, "count": count}
+        for subcategory, row_month, spent, count in db.execute(
+            select(
+                func.coalesce(FinanceEntry.subcategory, ""),
+                month,
+                func.sum(func.abs(FinanceEntry.amount)),
+                func.count(FinanceEntry.id)
+            ).where(FinanceEntry.category == "expense").group_by(FinanceEntry.subcategory, month)
+        )
+    ]
+    if rows:
+        db.execute(sqlite_insert(FinanceMonthlyTotal), rows)
+    db.commit()
+    return len(rows)
+
+
+def get_status(db: Session, month: Optional[str] = None, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    预算执行情况：读取预算表和该月的累计行，不扫描财务记录
+
+    Args:
+        month: 月份YYYY-MM，默认为当月
+        today: 计算当月已过天数用的日期，默认为今天
+
+    Returns:
+        每个预算的已支出、剩余、比例和按当前速度推算的月末支出
+    """
+    today = today or date.today()
+    month = month or month_of(today)
+    year, month_number = (int(part) for part in month.split("-"))
+    days_in_month = calendar.monthrange(year, month_number)[1]
+    if month == month_of(today):
+        days_elapsed = today.day
+    elif month < month_of(today):
+        days_elapsed = days_in_month
+    else:
+        days_elapsed = 0
+
+    budgets = db.execute(select(Budget).order_by(Budget.subcategory)).scalars().all()
+    spent = dict(db.execute(
+        select(FinanceMonthlyTotal.subcategory, FinanceMonthlyTotal.spent).where(
+            FinanceMonthlyTotal.month == month,
+            FinanceMonthlyTotal.subcategory.in_([budget.subcategory for budget in budgets])
+        )
+    ).all()) if budgets else {}
+
+    items = []
+    for budget in budgets:
+        amount = spent.get(budget.subcategory, 0.0)
+        ratio = amount / budget.monthly_limit
+        projected = amount / days_elapsed * days_in_month if days_elapsed else 0.0
+        if ratio >= 1:
+            status = "exceeded"
+        elif any(ratio >= threshold for threshold in budget.thresholds or []):
+            status = "warning"
+        else:
+            status = "ok"
+        items.append({
+            "subcategory": budget.subcategory,
+            "monthly_limit": budget.monthly_limit,
+            "spent": round(amount, 2),
+            "remaining": round(budget.monthly_limit - amount, 2),
+            "ratio": round(ratio, 4),
+            "projected": round(projected, 2),
+            "status": status,
+        })
+
+    total_limit = sum(item["monthly_limit"] for item in items)
+    total_spent = sum(item["spent"] for item in items)
+    return {
+        "month": month,
+        "days_elapsed": days_elapsed,
+        "days_in_month": days_in_month,
+        "total_limit": round(total_limit, 2),
+        "total_spent": round(total_spent, 2),
+        "budgets": items,
+    }
+
+
+class BudgetNotifier:
+    """
+    预算通知的进程内广播
+
+    财务写入发生在线程池中，订阅者是事件循环里的SSE连接，
+    所以通过call_soon_threadsafe把事件投递到各订阅者的队列。
+    保留最近的事件，断线重连时可按Last-Event-ID补发。
+    """
+
+    def __init__(self, history: int = 100, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        with self._lock:
+            stamped = []
+            for event in events:
+                stamped.append({"id": self._next_id, **event})
+                self._next_id += 1
+            self._history.extend(stamped)
+        self._deliver(stamped)
+
+    def _deliver(self, stamped: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            for event in stamped:
+                try:
+                    loop.call_soon_threadsafe(self._offer, queue, event)
+                except RuntimeError:
+                    # 事件循环已关闭
+                    pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        # 消费过慢的订阅者丢弃最旧的事件，不阻塞写入方
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[asyncio.Queue, List[Dict[str, Any]]]:
+        """在当前事件循环中订阅，返回(队列, 需要补发的事件)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+            backlog = [
+                event for event in self._history
+                if last_event_id is not None and event["id"] > last_event_id
+            ]
+        return queue, backlog
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = {item for item in self._subscribers if item[1] is not queue}
+
+
+class SharedBudgetNotifier(BudgetNotifier):
+    """
+    多进程部署时的预算通知
+
+    事件追加写入共享目录下的日志文件，事件ID为该行在文件中的结束偏移；各worker在有订阅者后
+    由后台线程轮询文件，把新事件投递给本进程的订阅者。因此任一worker上的写入都能通知到所有SSE连接，
+    重连到其他worker时也能按Last-Event-ID补发。
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.5, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._append_lock = threading.Lock()
+        with open(path, "ab"):
+            pass
+        # 已投递到的位置，只投递本进程启动之后的事件
+        self._offset = os.path.getsize(path)
+        self._poller: Optional[threading.Thread] = None
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        data = b"".join(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n" for event in events)
+        with open(self.path, "ab") as f:
+            with file_lock(f.fileno(), self._append_lock):
+                f.write(data)
+
+    def _read(self, start: int, end: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """读取start到end之间的完整行，返回(事件, 读到的位置)"""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read() if end is None else f.read(max(end - start, 0))
+        data = data[:data.rfind(b"\n") + 1]
+        events = []
+        position = start
+        for line in data.splitlines(keepends=True):
+            position += len(line)
+            events.append({"id": position, **json.loads(line)})
+        return events, position
+
+    def _poll(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if os.path.getsize(self.path) <= self._offset:
+                    continue
+                events, offset = self._read(self._offset)
+            except (OSError, ValueError):
+                continue
+            with self._lock:
+                self._offset = offset
+                self._history.extend(events)
+            self._deliver(events)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[asyncio.Queue, List[Dict[str, Any]]]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name="budget-notifier", daemon=True)
+                self._poller.start()
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+            offset = self._offset
+        backlog: List[Dict[str, Any]] = []
+        # 补发到轮询线程已投递的位置为止，之后的事件由轮询线程投递；ID须落在行边界上
+        if last_event_id is not None and 0 <= last_event_id < offset:
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(max(last_event_id - 1, 0))
+                    boundary = last_event_id == 0 or f.read(1) == b"\n"
+                if boundary:
+                    backlog = self._read(last_event_id, offset)[0][-self._history.maxlen:]
+            except (OSError, ValueError):
+                pass
+        return queue, backlog
+
+
+def _create_notifier() -> BudgetNotifier:
+    path = shared_path("budget_events.jsonl")
+    if path:
+        return SharedBudgetNotifier(path, poll_interval=settings.SHARED_STATE_POLL_SECONDS)
+    return BudgetNotifier()
+
+
+notifier = _create_notifier()
+
+
+def notify(events: List[Dict[str, Any]]) -> None:
+    """事务提交后发送预算通知"""
+    notifier.publish(events)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    data = json.dumps({k: v for k, v in event.items() if k != "id"}, ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
@@ -0,0 +1,255 @@
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.data import SkillEntry
+from app.services import rollups
+
+
+# 可作为分析目标的指标，目标所在指标族的明细序列不再作为特征
+TARGETS = ("sentiment", "spend", "income", "learning_minutes")
+
+
+def _pearson(y: np.ndarray, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    目标序列与每个特征列的皮尔逊相关系数，只使用两者都有值的天
+
+    Args:
+        y: 形状(T,)的目标序列，缺失值为NaN
+        X: 形状(T, F)的特征矩阵，缺失值为NaN
+
+    Returns:
+        (相关系数数组, 有效样本数数组)，方差为0或样本不足时相关系数为NaN
+    """
+    mask = ~np.isnan(X) & ~np.isnan(y)[:, None]
+    n = mask.sum(axis=0)
+    xs = np.where(mask, X, 0.0)
+    ys = np.where(mask, y[:, None], 0.0)
+
+    sx, sy = xs.sum(axis=0), ys.sum(axis=0)
+    sxx, syy, sxy = (xs * xs).sum(axis=0), (ys * ys).sum(axis=0), (xs * ys).sum(axis=0)
+
+    cov = n * sxy - sx * sy
+    var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.where(var > 1e-12, cov / np.sqrt(np.where(var > 0, var, 1.0)), np.nan)
+    return np.clip(r, -1.0, 1.0), n
+
+
+def lagged_correlations(
+    y: np.ndarray,
+    X: np.ndarray,
+    max_lag: int
+) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+    """
+    计算-max_lag到max_lag各滞后天数下的相关系数
+
+    滞后k>0表示特征在第t天、目标在第t+k天（特征领先目标），
+    k<0表示目标领先特征。
+
+    Returns:
+        (形状(L, F)的相关系数, 形状(L, F)的样本数, 滞后天数列表)
+    """
+    T = len(y)
+    lags = [lag for lag in range(-max_lag, max_lag + 1) if abs(lag) < T]
+    r = np.full((len(lags), X.shape[1]), np.nan)
+    n = np.zeros((len(lags), X.shape[1]), dtype=int)
+    for i, lag in enumerate(lags):
+        if lag >= 0:
+            r[i], n[i] = _pearson(y[lag:], X[:T - lag])
+        else:
+            r[i], n[i] = _pearson(y[:T + lag], X[-lag:])
+    return r, n, lags
+
+
+def rolling_correlation(
+    y: np.ndarray,
+    X: np.ndarray,
+    window: int,
+    min_periods: int
+) -> np.ndarray:
+    """
+    滑动窗口相关系数，用累计和一次算出所有窗口，复杂度O(T·F)
+
+    Returns:
+        形状(T, F)的矩阵，第t行是以第t天结尾的窗口的相关系数，
+        窗口内有效样本少于min_periods时为NaN
+    """
+    mask = ~np.isnan(X) & ~np.isnan(y)[:, None]
+    xs = np.where(mask, X, 0.0)
+    ys = np.where(mask, y[:, None], 0.0)
+
+    def windowed(values: np.ndarray) -> np.ndarray:
+        cumulative = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+        starts = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+        return cumulative[1:] - cumulative[starts]
+
+    n = windowed(mask.astype(float))
+    sx, sy = windowed(xs), windowed(ys)
+    sxx, syy, sxy = windowed(xs * xs), windowed(ys * ys), windowed(xs * ys)
+
+    cov = n * sxy - sx * sy
+    var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.where(
+            (var > 1e-12) & (n >= min_periods),
+            cov / np.sqrt(np.where(var > 0, var, 1.0)),
+            np.nan
+        )
+    return np.clip(r, -1.0, 1.0)
+
+
+def build_daily_matrix(
+    db: Session,
+    target: str,
+    start: date,
+    end: date,
+    min_active_days: int = 3
+) -> Tuple[List[date], np.ndarray, List[Dict[str, Any]], np.ndarray]:
+    """
+    从每日预聚合表构建对齐的日序列
+
+    目标序列：情绪取当天平均分（无记录为NaN），其余取当天总和（无记录为0）。
+    特征列：情绪均分、各指标总和，以及各财务子类别支出/收入、各技能学习时长，
+    目标所在指标族不作为特征；有记录天数少于min_active_days的明细列被忽略。
+
+    Returns:
+        (日期列表, 目标序列, 特征描述列表, 形状(T, F)的特征矩阵)
+    """
+    days = (end - start).days + 1
+    dates = [start + timedelta(days=i) for i in range(days)]
+
+    totals: Dict[Tuple[str, str], np.ndarray] = {}
+    counts: Dict[Tuple[str, str], np.ndarray] = {}
+    for metric, dimension, day, total, count in rollups.load(db, rollups.METRICS, start, end):
+        key = (metric, dimension)
+        if key not in totals:
+            totals[key] = np.zeros(days)
+            counts[key] = np.zeros(days)
+        index = (day - start).days
+        totals[key][index] += total
+        counts[key][index] += count
+
+    def metric_series(metric: str) -> np.ndarray:
+        keys = [key for key in totals if key[0] == metric]
+        total = sum((totals[key] for key in keys), np.zeros(days))
+        count = sum((counts[key] for key in keys), np.zeros(days))
+        if metric == "sentiment":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(count > 0, total / np.where(count > 0, count, 1), np.nan)
+        return total
+
+    skill_ids = [int(dimension) for metric, dimension in totals if metric == "learning_minutes" and dimension]
+    skill_names = dict(db.execute(
+        select(SkillEntry.id, SkillEntry.name).where(SkillEntry.id.in_(skill_ids))
+    ).all()) if skill_ids else {}
+
+    features: List[Dict[str, Any]] = []
+    columns: List[np.ndarray] = []
+    for metric in TARGETS:
+        if metric == target:
+            continue
+        column = metric_series(metric)
+        features.append({"feature": metric, "metric": metric, "dimension": None, "label": metric})
+        columns.append(column)
+
+        if metric == "sentiment":
+            continue
+        for key in sorted(k for k in totals if k[0] == metric and k[1]):
+            if np.count_nonzero(counts[key]) < min_active_days:
+                continue
+            dimension = key[1]
+            if metric == "learning_minutes":
+                label = skill_names.get(int(dimension), f"技能#{dimension}")
+            else:
+                label = dimension
+            features.append({
+                "feature": f"{metric}:{dimension}",
+                "metric": metric,
+                "dimension": dimension,
+                "label": label,
+            })
+            columns.append(totals[key])
+
+    X = np.column_stack(columns) if columns else np.zeros((days, 0))
+    return dates, metric_series(target), features, X
+
+
+def _round(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def analyze(
+    db: Session,
+    start: date,
+    end: date,
+    target: str = "sentiment",
+    max_lag: int = 7,
+    window: int = 30,
+    min_periods: int = 10,
+    top: int = 10
+) -> Dict[str, Any]:
+    """
+    跨域相关性分析
+
+    Args:
+        target: 目标指标，见TARGETS
+        max_lag: 最大滞后天数
+        window: 滑动相关的窗口天数
+        min_periods: 计算相关系数所需的最少有效天数
+        top: 返回相关性最强的特征数
+
+    Returns:
+        同日相关系数、最佳滞后效应和最强特征的滑动相关序列
+    """
+    dates, y, features, X = build_daily_matrix(db, target, start, end)
+    r, n, lags = lagged_correlations(y, X, max_lag)
+    zero = lags.index(0)
+
+    correlations = []
+    for j, feature in enumerate(features):
+        if n[zero, j] < min_periods or np.isnan(r[zero, j]):
+            continue
+        correlations.append({**feature, "r": _round(r[zero, j]), "n": int(n[zero, j])})
+    correlations.sort(key=lambda item: -abs(item["r"]))
+
+    # 每个特征取绝对值最大的非零滞后
+    lagged = []
+    valid = (n >= min_periods) & ~np.isnan(r)
+    strength = np.where(valid, np.abs(r), -1.0)
+    strength[zero] = -1.0
+    for j, feature in enumerate(features):
+        best = int(np.argmax(strength[:, j])) if len(lags) > 1 else zero
+        if strength[best, j] < 0:
+            continue
+        lagged.append({
+            **feature,
+            "lag": lags[best],
+            "r": _round(r[best, j]),
+            "n": int(n[best, j]),
+            "by_lag": [
+                {"lag": lag, "r": _round(r[i, j]), "n": int(n[i, j])}
+                for i, lag in enumerate(lags)
+            ],
+        })
+    lagged.sort(key=lambda item: -abs(item["r"]))
+
+    top_features = [item["feature"] for item in correlations[:top]]
+    rolling: Dict[str, Any] = {"window": window, "x": [day.isoformat() for day in dates], "series": {}}
+    if top_features:
+        indexes = [next(j for j, f in enumerate(features) if f["feature"] == name) for name in top_features]
+        rolled = rolling_correlation(y, X[:, indexes], window, min_periods)
+        for k, name in enumerate(top_features):
+            rolling["series"][name] = [_round(value) for value in rolled[:, k]]
+
+    return {
+        "target": target,
+        "days": len(dates),
+        "target_days": int(np.count_nonzero(~np.isnan(y))),
+        "correlations": correlations[:top],
+        "lagged": lagged[:top],
+        "rolling": rolling,
+    }
@@ -0,0 +1,196 @@
+import heapq
+import json
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.data import EmotionEntry, FinanceEntry, SkillEntry, LearningEntry
+
+
+# 每个域可以返回的字段及对应的列
+DOMAIN_FIELDS = {
+    "emotions": (EmotionEntry, {
+        "id": EmotionEntry.id,
+        "content": EmotionEntry.content,
+        "sentiment": EmotionEntry.sentiment,
+        "sentiment_score": EmotionEntry.sentiment_score,
+        "tags": EmotionEntry.tags,
+    }),
+    "finances": (FinanceEntry, {
+        "id": FinanceEntry.id,
+        "amount": FinanceEntry.amount,
+        "category": FinanceEntry.category,
+        "subcategory": FinanceEntry.subcategory,
+        "description": FinanceEntry.description,
+        "tags": FinanceEntry.tags,
+    }),
+    "learnings": (LearningEntry, {
+        "id": LearningEntry.id,
+        "topic": LearningEntry.topic,
+        "duration": LearningEntry.duration,
+        "content": LearningEntry.content,
+        "skill_name": SkillEntry.name,
+        "tags": LearningEntry.tags,
+    }),
+}
+
+DOMAINS = tuple(DOMAIN_FIELDS.keys())
+
+
+def resolve_fields(fields: Optional[List[str]]) -> Dict[str, List[str]]:
+    """
+    解析fields参数，返回每个域需要查询的字段
+
+    字段可以写成"域.字段"（如finances.amount）只作用于该域，
+    也可以只写字段名（如tags）作用于所有包含该字段的域；id总是返回。
+    未指定fields时返回全部字段。
+
+    Raises:
+        ValueError: 字段名或域名不存在
+    """
+    if not fields:
+        return {domain: list(columns.keys()) for domain, (_, columns) in DOMAIN_FIELDS.items()}
+
+    selected: Dict[str, List[str]] = {domain: ["id"] for domain in DOMAINS}
+    for item in fields:
+        for name in item.split(","):
+            name = name.strip()
+            if not name:
+                continue
+            domain, _, field = name.rpartition(".")
+            domains = [domain] if domain else DOMAINS
+            matched = False
+            for candidate in domains:
+                if candidate not in DOMAIN_FIELDS:
+                    raise ValueError(f"未知的数据域: {candidate}")
+                if field in DOMAIN_FIELDS[candidate][1]:
+                    matched = True
+                    if field not in selected[candidate]:
+                        selected[candidate].append(field)
+            if not matched:
+                raise ValueError(f"未知的字段: {name}")
+    return selected
+
+
+def _domain_statement(domain: str, field_names: List[str], start: date, end: date):
+    """构造只查询所需列的Core select语句，按日期排序"""
+    model, columns = DOMAIN_FIELDS[domain]
+    stmt = select(model.date, *[columns[name] for name in field_names])
+    if domain == "learnings" and "skill_name" in field_names:
+        # 只取技能名称一列，而不是加载整条技能记录
+        stmt = stmt.outerjoin(SkillEntry, SkillEntry.id == LearningEntry.skill_id)
+    return stmt.where(model.date >= start, model.date <= end).order_by(model.date, model.id)
+
+
+def _iter_domain_rows(
+    db: Session,
+    domain: str,
+    field_names: List[str],
+    start: date,
+    end: date
+) -> Iterator[Tuple[date, str, Dict[str, Any]]]:
+    stmt = _domain_statement(domain, field_names, start, end)
+    for row in db.execute(stmt.execution_options(yield_per=1000)):
+        yield row[0], domain, dict(zip(field_names, row[1:]))
+
+
+def _summary_statements(start: date, end: date) -> Dict[str, Any]:
+    """按日期在数据库中聚合的统计语句"""
+    return {
+        "emotions": select(
+            EmotionEntry.date,
+            func.count(EmotionEntry.id).label("count"),
+            func.avg(EmotionEntry.sentiment_score).label("avg_sentiment_score"),
+        ).where(EmotionEntry.date >= start, EmotionEntry.date <= end).group_by(EmotionEntry.date).order_by(EmotionEntry.date),
+        "finances": select(
+            FinanceEntry.date,
+            func.count(FinanceEntry.id).label("count"),
+            func.sum(case((FinanceEntry.category == "income", func.abs(FinanceEntry.amount)), else_=0)).label("income"),
+            func.sum(case((FinanceEntry.category == "expense", func.abs(FinanceEntry.amount)), else_=0)).label("expense"),
+        ).where(FinanceEntry.date >= start, FinanceEntry.date <= end).group_by(FinanceEntry.date).order_by(FinanceEntry.date),
+        "learnings": select(
+            LearningEntry.date,
+            func.count(LearningEntry.id).label("count"),
+            func.sum(LearningEntry.duration).label("total_duration"),
+        ).where(LearningEntry.date >= start, LearningEntry.date <= end).group_by(LearningEntry.date).order_by(LearningEntry.date),
+    }
+
+
+def _iter_summary_rows(db: Session, domain: str, stmt) -> Iterator[Tuple[date, str, Dict[str, Any]]]:
+    for row in db.execute(stmt):
+        values = row._asdict()
+        yield values.pop("date"), domain, values
+
+
+def iter_grouped(
+    db: Session,
+    start: date,
+    end: date,
+    fields: Optional[Dict[str, List[str]]] = None,
+    summary_only: bool = False
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    按日期依次产出分组数据，三个域的有序结果做归并，内存中只保留当天的数据
+
+    Yields:
+        (日期字符串, {"emotions": ..., "finances": ..., "learnings": ...})
+    """
+    if summary_only:
+        streams = [
+            _iter_summary_rows(db, domain, stmt)
+            for domain, stmt in _summary_statements(start, end).items()
+        ]
+    else:
+        fields = fields or resolve_fields(None)
+        streams = [
+            _iter_domain_rows(db, domain, field_names, start, end)
+            for domain, field_names in fields.items()
+        ]
+
+    current_date = None
+    group: Dict[str, Any] = {}
+    for row_date, domain, values in heapq.merge(*streams, key=lambda item: item[0]):
+        if row_date != current_date:
+            if current_date is not None:
+                yield current_date.isoformat(), group
+            current_date = row_date
+            group = {name: (None if summary_only else []) for name in DOMAINS}
+        if summary_only:
+            group[domain] = values
+        else:
+            group[domain].append(values)
+
+    if current_date is not None:
+        yield current_date.isoformat(), group
+
+
+def stream_json(
+    start_date: str,
+    end_date: str,
+    start: date,
+    end: date,
+    fields: Optional[Dict[str, List[str]]] = None,
+    summary_only: bool = False
+) -> Iterator[bytes]:
+    """
+    以JSON片段流式输出data-by-date结果，格式与一次性返回的对象相同
+
+    使用独立的数据库会话，因为流式输出在端点函数返回之后才进行。
+    """
+    db = SessionLocal()
+    try:
+        header = json.dumps({"start_date": start_date, "end_date": end_date}, ensure_ascii=False)
+        yield (header[:-1] + ', "data": {').encode("utf-8")
+
+        first = True
+        for date_str, group in iter_grouped(db, start, end, fields=fields, summary_only=summary_only):
+            chunk = json.dumps({date_str: group}, ensure_ascii=False, default=str)[1:-1]
+            yield (chunk if first else ", " + chunk).encode("utf-8")
+            first = False
+
+        yield b"}}"
+    finally:
+        db.close()
@@ -0,0 +1,169 @@
+import math
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select, delete, update, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.data import FinanceEntry
+from app.models.finance import FinanceCategoryStats
+
+
+# 对数金额标准差的下限，避免历史金额几乎不变（如房租）时微小差异也被判为异常
+MIN_STD = 0.05
+
+# 记录参与统计的键：(类别, 子类别, 金额)
+Snapshot = Tuple[str, str, float]
+
+
+def _value(amount: float) -> float:
+    """金额分布通常右偏，取log(1+|金额|)后更接近正态"""
+    return math.log1p(abs(amount))
+
+
+def snapshot(entry: FinanceEntry) -> Snapshot:
+    """记录当前参与统计的字段，更新记录前调用"""
+    return (entry.category, entry.subcategory or "", entry.amount)
+
+
+def _z_score(stats: Any, value: float) -> Optional[float]:
+    """相对已有统计的z分数，样本不足时返回None"""
+    if stats is None or stats.count < max(settings.FINANCE_ANOMALY_MIN_SAMPLES, 2):
+        return None
+    std = max(math.sqrt(stats.m2 / (stats.count - 1)), MIN_STD)
+    return (value - stats.mean) / std
+
+
+def _add(stats: Any, value: float) -> None:
+    """Welford在线更新：加入一个样本"""
+    stats.count += 1
+    delta = value - stats.mean
+    stats.mean += delta / stats.count
+    stats.m2 += delta * (value - stats.mean)
+
+
+def _remove(stats: Any, value: float) -> None:
+    """Welford逆向更新：移除一个样本"""
+    if stats.count <= 1:
+        stats.count, stats.mean, stats.m2 = 0, 0.0, 0.0
+        return
+    mean = (stats.count * stats.mean - value) / (stats.count - 1)
+    stats.m2 = max(stats.m2 - (value - mean) * (value - stats.mean), 0.0)
+    stats.mean = mean
+    stats.count -= 1
+
+
+def _get_stats(db: Session, category: str, subcategory: str) -> FinanceCategoryStats:
+    """取出子类别的统计行，不存在时创建"""
+    db.execute(
+        sqlite_insert(FinanceCategoryStats)
+        .values(category=category, subcategory=subcategory, count=0, mean=0.0, m2=0.0)
+        .on_conflict_do_nothing(index_elements=["category", "subcategory"])
+    )
+    return db.execute(
+        select(FinanceCategoryStats).where(
+            FinanceCategoryStats.category == category,
+            FinanceCategoryStats.subcategory == subcategory
+        )
+    ).scalar_one()
+
+
+def _flag(entry: FinanceEntry, z: Optional[float]) -> None:
+    entry.anomaly_score = round(z, 4) if z is not None else None
+    entry.is_anomaly = z is not None and abs(z) >= settings.FINANCE_ANOMALY_Z_THRESHOLD
+
+
+def observe(db: Session, entry: FinanceEntry) -> None:
+    """
+    新增记录时调用：先按已有统计给记录打异常标记，再把金额计入统计，不提交事务
+
+    只读写该子类别的一行统计，与历史记录数量无关。
+    """
+    stats = _get_stats(db, entry.category, entry.subcategory or "")
+    value = _value(entry.amount)
+    _flag(entry, _z_score(stats, value))
+    _add(stats, value)
+
+
+def forget(db: Session, entry: FinanceEntry) -> None:
+    """删除记录时调用：把金额移出统计，不提交事务"""
+    _forget_snapshot(db, snapshot(entry))
+
+
+def _forget_snapshot(db: Session, before: Snapshot) -> None:
+    category, subcategory, amount = before
+    stats = _get_stats(db, category, subcategory)
+    _remove(stats, _value(amount))
+
+
+def replace(db: Session, before: Snapshot, entry: FinanceEntry) -> None:
+    """
+    更新记录后调用：金额或类别有变化时，移出旧值，重新打标记并计入新值
+
+    Args:
+        before: 修改字段前调用snapshot得到的旧值
+        entry: 已修改的记录
+    """
+    if snapshot(entry) == before:
+        return
+    _forget_snapshot(db, before)
+    observe(db, entry)
+
+
+def rebuild(db: Session) -> int:
+    """
+    按日期顺序重放全部记录，重建统计并重新打异常标记，返回处理的记录数
+
+    统计值与增量维护的结果一致。异常标记则按(日期, ID)顺序相对此前的记录重新计算，
+    只有记录按日期顺序写入且之后未修改时才与写入时得到的标记相同；补录早于已有记录的日期、
+    修改金额后，重建的标记会以按时间排列的历史为准。用于首次创建统计表或调整阈值后。
+    """
+    db.execute(delete(FinanceCategoryStats))
+
+    stats: Dict[Tuple[str, str], FinanceCategoryStats] = {}
+    flags = []
+    rows = db.execute(
+        select(FinanceEntry.id, FinanceEntry.category, FinanceEntry.subcategory, FinanceEntry.amount)
+        .order_by(FinanceEntry.date, FinanceEntry.id)
+    ).all()
+    for entry_id, category, subcategory, amount in rows:
+        key = (category, subcategory or "")
+        if key not in stats:
+            stats[key] = FinanceCategoryStats(category=key[0], subcategory=key[1], count=0, mean=0.0, m2=0.0)
+        value = _value(amount)
+        z = _z_score(stats[key], value)
+        flags.append({
+            "entry_id": entry_id,
+            "anomaly_score": round(z, 4) if z is not None else None,
+            "is_anomaly": z is not None and abs(z) >= settings.FINANCE_ANOMALY_Z_THRESHOLD,
+        })
+        _add(stats[key], value)
+
+    if flags:
+        # 保留updated_at原值，重建派生字段不算作记录被修改
+        table = FinanceEntry.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("entry_id")).values(
+                is_anomaly=bindparam("is_anomaly"),
+                anomaly_score=bindparam("anomaly_score"),
+                updated_at=table.c.updated_at
+            ),
+            flags
+        )
+    db.add_all(stats.values())
+    db.commit()
+    return len(rows)
+
+
+def typical_amount(db: Session, category: str, subcategory: str) -> Optional[float]:
+    """子类别金额的典型值（对数均值还原），没有统计时返回None"""
+    stats = db.execute(
+        select(FinanceCategoryStats).where(
+            FinanceCategoryStats.category == category,
+            FinanceCategoryStats.subcategory == subcategory
+        )
+    ).scalar_one_or_none()
+    if stats is None or stats.count == 0:
+        return None
+    return round(math.expm1(stats.mean), 2)
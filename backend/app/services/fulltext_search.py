@@ -0,0 +1,215 @@
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+# 记录类型 -> (源表, 建立全文索引的列)
+FTS_TABLES = {
+    "emotion": ("emotion_entries", ("content",)),
+    "finance": ("finance_entries", ("description",)),
+    "learning": ("learning_entries", ("topic", "content")),
+}
+
+
+def _fts_name(table: str) -> str:
+    return f"{table}_fts"
+
+
+def is_supported(engine: Engine) -> bool:
+    """FTS5只在SQLite下可用"""
+    return engine.dialect.name == "sqlite"
+
+
+def setup_fulltext_index(engine: Engine) -> None:
+    """
+    创建FTS5虚拟表和同步触发器
+
+    虚拟表使用外部内容模式（content=源表），不重复存储文本，
+    由INSERT/UPDATE/DELETE触发器保持与源表一致。首次创建时从源表重建索引。
+    """
+    if not is_supported(engine):
+        return
+
+    with engine.begin() as conn:
+        for table, columns in FTS_TABLES.values():
+            fts = _fts_name(table)
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": fts}
+            ).first()
+
+            column_list = ", ".join(columns)
+            new_values = ", ".join(f"new.{col}" for col in columns)
+            old_values = ", ".join(f"old.{col}" for col in columns)
+
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"{column_list}, content='{table}', content_rowid='id', "
+                f"tokenize='{settings.FTS_TOKENIZER}')"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+                f"END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+                f"END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); "
+                f"END"
+            )
+
+            if not exists:
+                conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _min_term_length() -> int:
+    """trigram分词按3个字符建立索引，更短的词无法通过MATCH命中"""
+    return 3 if settings.FTS_TOKENIZER.split()[0] == "trigram" else 1
+
+
+def split_terms(query: str) -> Tuple[List[str], List[str]]:
+    """
+    拆分查询词，返回(可走索引的词, 需要LIKE扫描的短词)
+
+    中文常见的两字词（如"心情"）在trigram分词下不能命中索引，改为对源表做LIKE匹配。
+    """
+    terms = [term for term in re.split(r"\s+", query.strip()) if term]
+    min_length = _min_term_length()
+    return [term for term in terms if len(term) >= min_length], [term for term in terms if len(term) < min_length]
+
+
+def build_match_query(terms: List[str]) -> str:
+    """
+    把查询词转换为FTS5 MATCH表达式
+
+    每个词加双引号作为短语，避免用户输入中的引号、括号、AND/OR等被解析为FTS语法，
+    多个词之间为AND关系。
+    """
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like_snippet(texts: List[Optional[str]], terms: List[str], width: int = 16) -> str:
+    """LIKE扫描命中的记录没有FTS的snippet()，按第一个命中位置截取前后width个字符并高亮"""
+    text_value = " ".join(part for part in texts if part)
+    positions = [text_value.find(term) for term in terms if term in text_value]
+    first = min(positions) if positions else 0
+    begin, end = max(first - width, 0), min(first + width, len(text_value))
+    window = text_value[begin:end]
+    pattern = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    window = re.sub(f"({pattern})", r"<mark>\1</mark>", window)
+    return ("…" if begin > 0 else "") + window + ("…" if end < len(text_value) else "")
+
+
+def search(
+    db: Session,
+    query: str,
+    entry_types: Optional[List[str]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    全文搜索记录，按相关度排序
+
+    能命中索引的词用FTS5 MATCH匹配并按bm25排序；trigram分词下少于3个字符的词
+    改为对源表做LIKE匹配，只有短词时按词出现次数排序。
+    各表的分数先除以本表最高分归一化到(0, 1]，再合并排序，避免不同表的bm25直接比较。
+
+    Args:
+        query: 查询关键词，多个词以空格分隔，词之间为AND关系
+        entry_types: 限定记录类型（emotion, finance, learning），可选
+        start_date: 开始日期，可选
+        end_date: 结束日期，可选
+        limit: 返回结果数量
+        offset: 跳过的结果数量
+
+    Returns:
+        包含记录ID、日期、摘要片段和相关度分数的列表
+    """
+    indexed_terms, short_terms = split_terms(query)
+    if not indexed_terms and not short_terms:
+        return []
+
+    params: Dict[str, Any] = {"limit": limit + offset}
+    filters = ""
+    if indexed_terms:
+        params["match"] = build_match_query(indexed_terms)
+    if start_date:
+        filters += " AND e.date >= :start_date"
+        params["start_date"] = start_date.isoformat()
+    if end_date:
+        filters += " AND e.date <= :end_date"
+        params["end_date"] = end_date.isoformat()
+    for i, term in enumerate(short_terms):
+        params[f"term_{i}"] = term
+        params[f"like_{i}"] = f"%{_escape_like(term)}%"
+
+    hits: List[Dict[str, Any]] = []
+    for entry_type, (table, columns) in FTS_TABLES.items():
+        if entry_types and entry_type not in entry_types:
+            continue
+
+        fts = _fts_name(table)
+        like_filter = "".join(
+            " AND (" + " OR ".join(f"e.{col} LIKE :like_{i} ESCAPE '\\'" for col in columns) + ")"
+            for i in range(len(short_terms))
+        )
+        # 每张表只取前limit+offset条，合并后再统一排序分页
+        if indexed_terms:
+            sql = (
+                f"SELECT e.id, e.date, "
+                f"snippet({fts}, -1, '<mark>', '</mark>', '…', 16) AS snippet, "
+                f"-bm25({fts}) AS score "
+                f"FROM {fts} JOIN {table} e ON e.id = {fts}.rowid "
+                f"WHERE {fts} MATCH :match{filters}{like_filter} "
+                f"ORDER BY score DESC LIMIT :limit"
+            )
+        else:
+            # 只有短词时不走索引，按各词在文本中出现的次数排序
+            occurrences = " + ".join(
+                f"(length(coalesce(e.{col}, '')) - length(replace(coalesce(e.{col}, ''), :term_{i}, ''))) "
+                f"/ length(:term_{i})"
+                for i in range(len(short_terms)) for col in columns
+            )
+            sql = (
+                f"SELECT e.id, e.date, {', '.join(f'e.{col}' for col in columns)}, "
+                f"{occurrences} AS score "
+                f"FROM {table} e WHERE 1 = 1{filters}{like_filter} "
+                f"ORDER BY score DESC, e.date DESC LIMIT :limit"
+            )
+        rows = db.execute(text(sql), params).all()
+        if not rows:
+            continue
+
+        best = rows[0].score or 1
+        for row in rows:
+            snippet = row.snippet if indexed_terms else _like_snippet(
+                [getattr(row, col) for col in columns], short_terms
+            )
+            hits.append({
+                "entry_type": entry_type,
+                "entry_id": row.id,
+                "date": str(row.date),
+                "snippet": snippet,
+                "score": round(row.score / best, 4)
+            })
+
+    hits.sort(key=lambda hit: hit["score"], reverse=True)
+    return hits[offset:offset + limit]
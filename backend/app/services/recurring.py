@@ -0,0 +1,371 @@
+import calendar
+import hashlib
+import math
+import re
+import statistics
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, insert, delete, update, bindparam
+from sqlalchemy.orm import Session
+
+from app.core.cache import write_versions
+from app.models.data import FinanceEntry
+from app.models.finance import RecurringSeries
+
+
+# 相邻金额分档的比例，金额相差约15%以内视为同一序列
+BAND_RATIO = 1.15
+
+# 判定为周期性序列所需的最少记录数和最低规律程度
+MIN_OCCURRENCES = 3
+MIN_CONFIDENCE = 0.6
+
+# 周期名称 -> (标准天数, 允许偏差天数, 推算下一次时增加的月数，0表示按天数)
+PERIODS = {
+    "weekly": (7.0, 1.5, 0),
+    "biweekly": (14.0, 2.5, 0),
+    "monthly": (30.44, 4.0, 1),
+    "quarterly": (91.31, 10.0, 3),
+    "yearly": (365.25, 20.0, 12),
+}
+
+_DIGITS_AND_PUNCTUATION = re.compile(r"[\d\W_]+", re.UNICODE)
+
+
+def normalize_description(description: Optional[str]) -> str:
+    """描述规范化：去掉数字和标点（订单号、日期等），合并空白并转为小写"""
+    if not description:
+        return ""
+    return " ".join(_DIGITS_AND_PUNCTUATION.sub(" ", description.lower()).split())
+
+
+def text_key(category: str, subcategory: Optional[str], description: Optional[str]) -> str:
+    raw = f"{category}|{subcategory or ''}|{normalize_description(description)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def amount_band(amount: float) -> int:
+    """对数金额分档，相邻分档的金额相差BAND_RATIO倍"""
+    return int(math.floor(math.log(max(abs(amount), 0.01)) / math.log(BAND_RATIO)))
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def advance(day: date, period: str, period_days: float) -> date:
+    """按周期推算下一次发生的日期，按月的周期保持在同一天"""
+    months = PERIODS[period][2]
+    if months:
+        return _add_months(day, months)
+    return day + timedelta(days=round(period_days))
+
+
+def estimate_period(dates: Sequence[date]) -> Tuple[Optional[str], Optional[float], float]:
+    """
+    根据记录日期估计周期
+
+    取相邻日期间隔的中位数匹配最接近的标准周期，置信度为落在该周期允许偏差内的
+    间隔占比，记录数较少时再打折扣。
+
+    Returns:
+        (周期名称, 间隔中位数, 置信度)，无法匹配时周期名称为None
+    """
+    unique_dates = sorted(set(dates))
+    if len(unique_dates) < 2:
+        return None, None, 0.0
+
+    gaps = [(b - a).days for a, b in zip(unique_dates, unique_dates[1:])]
+    median_gap = float(statistics.median(gaps))
+
+    period = None
+    for name, (days, tolerance, _) in PERIODS.items():
+        if abs(median_gap - days) <= tolerance:
+            period = name
+            break
+    if period is None:
+        return None, median_gap, 0.0
+
+    days, tolerance, _ = PERIODS[period]
+    regular = sum(1 for gap in gaps if abs(gap - days) <= tolerance) / len(gaps)
+    support = min(1.0, len(gaps) / (MIN_OCCURRENCES - 1))
+    return period, median_gap, round(regular * support, 4)
+
+
+def _summarize(series: RecurringSeries, rows: List[Tuple[date, float, Optional[str]]]) -> None:
+    """用序列中记录的(日期, 金额, 描述)重新计算序列的统计字段"""
+    rows = sorted(rows, key=lambda row: row[0])
+    dates = [row[0] for row in rows]
+    series.occurrences = len(rows)
+    series.typical_amount = float(statistics.median(row[1] for row in rows))
+    # 典型金额变化后同步分档，否则按新金额查找时会漏掉该序列
+    series.amount_band = amount_band(series.typical_amount)
+    series.first_date = dates[0]
+    series.last_date = dates[-1]
+    series.description = rows[-1][2]
+
+    period, period_days, confidence = estimate_period(dates)
+    series.period = period
+    series.period_days = period_days
+    series.confidence = confidence
+    series.is_recurring = bool(
+        period and len(set(dates)) >= MIN_OCCURRENCES and confidence >= MIN_CONFIDENCE
+    )
+    series.next_date = advance(dates[-1], period, period_days) if series.is_recurring else None
+
+
+def refresh(db: Session, series_id: Optional[int], exclude_id: Optional[int] = None) -> None:
+    """
+    重新计算一个序列，只读取该序列自己的记录；序列为空时删除，不提交事务
+
+    Args:
+        series_id: 序列ID
+        exclude_id: 计算时排除的记录ID（正在删除的记录）
+    """
+    if series_id is None:
+        return
+    series = db.get(RecurringSeries, series_id)
+    if series is None:
+        return
+
+    query = select(FinanceEntry.date, FinanceEntry.amount, FinanceEntry.description).where(
+        FinanceEntry.recurring_series_id == series_id
+    )
+    if exclude_id is not None:
+        query = query.where(FinanceEntry.id != exclude_id)
+    rows = [tuple(row) for row in db.execute(query)]
+
+    if rows:
+        _summarize(series, rows)
+    else:
+        db.delete(series)
+
+
+def _find_series(db: Session, entry: FinanceEntry) -> Optional[RecurringSeries]:
+    """在同一文本键、相邻金额分档的序列中找典型金额最接近的一个，走(text_key, amount_band)索引"""
+    key = text_key(entry.category, entry.subcategory, entry.description)
+    band = amount_band(entry.amount)
+    candidates = db.execute(
+        select(RecurringSeries).where(
+            RecurringSeries.text_key == key,
+            RecurringSeries.amount_band.between(band - 1, band + 1)
+        )
+    ).scalars().all()
+
+    value = math.log(max(abs(entry.amount), 0.01))
+    best, best_distance = None, math.log(BAND_RATIO)
+    for series in candidates:
+        distance = abs(math.log(max(abs(series.typical_amount), 0.01)) - value)
+        if distance <= best_distance:
+            best, best_distance = series, distance
+    return best
+
+
+def observe(db: Session, entry: FinanceEntry) -> None:
+    """
+    新增记录时调用：归入匹配的序列（没有则新建）并重新估计该序列的周期，不提交事务
+
+    只读写一个序列及其记录，不与其他记录两两比较。记录需已加入会话，
+    这里会flush把它写入数据库。
+    """
+    series = _find_series(db, entry)
+    if series is None:
+        # 用Core插入新序列，不触发会话flush，记录插入时即带上序列ID
+        series_id = db.execute(insert(RecurringSeries).values(
+            text_key=text_key(entry.category, entry.subcategory, entry.description),
+            amount_band=amount_band(entry.amount),
+            category=entry.category,
+            subcategory=entry.subcategory or "",
+            typical_amount=entry.amount,
+        )).inserted_primary_key[0]
+    else:
+        series_id = series.id
+    entry.recurring_series_id = series_id
+    db.flush()
+    refresh(db, series_id)
+
+
+# 影响归类的字段，更新时只要有一个变化就重新归类
+TRACKED_FIELDS = ("category", "subcategory", "description", "amount", "date")
+
+
+def snapshot(entry: FinanceEntry) -> Tuple[Any, ...]:
+    return tuple(getattr(entry, field) for field in TRACKED_FIELDS)
+
+
+def replace(db: Session, before: Tuple[Any, ...], entry: FinanceEntry) -> None:
+    """
+    更新记录后调用：相关字段有变化时从原序列移出并重新归类
+
+    Args:
+        before: 修改字段前调用snapshot得到的旧值
+        entry: 已修改的记录
+    """
+    if snapshot(entry) == before:
+        return
+    old_series_id = entry.recurring_series_id
+    entry.recurring_series_id = None
+    db.flush()
+    refresh(db, old_series_id)
+    observe(db, entry)
+
+
+def forget(db: Session, entry: FinanceEntry) -> None:
+    """删除记录前调用：排除该记录重新计算所属序列，不提交事务"""
+    refresh(db, entry.recurring_series_id, exclude_id=entry.id)
+
+
+def rebuild(db: Session) -> int:
+    """
+    批量重建全部序列，返回序列数
+
+    先按文本键哈希分组，组内按金额排序后一次扫描切分出金额接近的子组，
+    整体为O(n log n)，不做记录间的两两比较。
+    """
+    # 保留updated_at原值，重建派生字段不算作记录被修改
+    table = FinanceEntry.__table__
+    db.execute(update(table).values(recurring_series_id=None, updated_at=table.c.updated_at))
+    db.execute(delete(RecurringSeries))
+
+    buckets: Dict[str, List[Tuple[float, int, date, float, Optional[str], str, str]]] = {}
+    for entry_id, category, subcategory, description, amount, day in db.execute(
+        select(
+            FinanceEntry.id,
+            FinanceEntry.category,
+            FinanceEntry.subcategory,
+            FinanceEntry.description,
+            FinanceEntry.amount,
+            FinanceEntry.date
+        )
+    ):
+        key = text_key(category, subcategory, description)
+        value = math.log(max(abs(amount), 0.01))
+        buckets.setdefault(key, []).append((value, entry_id, day, amount, description, category, subcategory or ""))
+
+    assignments = []
+    count = 0
+    limit = math.log(BAND_RATIO)
+    for key, items in buckets.items():
+        # 同一文本键下按金额排序，与当前组对数金额均值相差在一个分档内的归为一组
+        items.sort(key=lambda item: item[0])
+        groups: List[List[Tuple]] = []
+        group_sum = 0.0
+        for item in items:
+            if groups and item[0] - group_sum / len(groups[-1]) <= limit:
+                groups[-1].append(item)
+                group_sum += item[0]
+            else:
+                groups.append([item])
+                group_sum = item[0]
+
+        for group in groups:
+            first = group[0]
+            series = RecurringSeries(
+                text_key=key,
+                category=first[5],
+                subcategory=first[6],
+            )
+            _summarize(series, [(item[2], item[3], item[4]) for item in group])
+            db.add(series)
+            db.flush()
+            assignments.extend({"entry_id": item[1], "series_id": series.id} for item in group)
+            count += 1
+
+    if assignments:
+        db.execute(
+            update(table).where(table.c.id == bindparam("entry_id")).values(
+                recurring_series_id=bindparam("series_id"),
+                updated_at=table.c.updated_at
+            ),
+            assignments
+        )
+    db.commit()
+    write_versions.bump(FinanceEntry.__tablename__)
+    return count
+
+
+def _is_active(series: RecurringSeries, today: date) -> bool:
+    """下一次发生日期已过去超过一个周期的序列视为已停止"""
+    if not series.is_recurring or series.next_date is None:
+        return False
+    return (today - series.next_date).days <= (series.period_days or 0)
+
+
+def list_series(db: Session, include_candidates: bool = False, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """列出周期性序列，include_candidates为True时也返回记录数不足或不规律的分组"""
+    today = today or date.today()
+    query = select(RecurringSeries).order_by(RecurringSeries.next_date, RecurringSeries.id)
+    if not include_candidates:
+        query = query.where(RecurringSeries.is_recurring.is_(True))
+    return [
+        {
+            "id": series.id,
+            "category": series.category,
+            "subcategory": series.subcategory,
+            "description": series.description,
+            "typical_amount": round(series.typical_amount, 2),
+            "occurrences": series.occurrences,
+            "first_date": series.first_date.isoformat() if series.first_date else None,
+            "last_date": series.last_date.isoformat() if series.last_date else None,
+            "period": series.period,
+            "period_days": series.period_days,
+            "next_date": series.next_date.isoformat() if series.next_date else None,
+            "confidence": series.confidence,
+            "is_recurring": series.is_recurring,
+            "active": _is_active(series, today),
+        }
+        for series in db.execute(query).scalars()
+    ]
+
+
+def project_cashflow(db: Session, days: int = 30, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    根据仍在进行的周期性序列推算未来days天的现金流
+
+    Returns:
+        按日期排序的预计发生项，以及预计收入、支出和净额
+    """
+    today = today or date.today()
+    horizon = today + timedelta(days=days)
+    series_list = db.execute(
+        select(RecurringSeries).where(
+            RecurringSeries.is_recurring.is_(True),
+            RecurringSeries.next_date <= horizon
+        )
+    ).scalars().all()
+
+    upcoming = []
+    for series in series_list:
+        if not _is_active(series, today):
+            continue
+        occurrence = series.next_date
+        # 已过期但仍在容忍范围内的，从今天之后的第一次开始推算
+        while occurrence < today:
+            occurrence = advance(occurrence, series.period, series.period_days)
+        while occurrence <= horizon:
+            upcoming.append({
+                "date": occurrence.isoformat(),
+                "series_id": series.id,
+                "category": series.category,
+                "subcategory": series.subcategory,
+                "description": series.description,
+                "amount": round(series.typical_amount, 2),
+                "period": series.period,
+                "confidence": series.confidence,
+            })
+            occurrence = advance(occurrence, series.period, series.period_days)
+    upcoming.sort(key=lambda item: (item["date"], item["series_id"]))
+
+    income = sum(abs(item["amount"]) for item in upcoming if item["category"] == "income")
+    expense = sum(abs(item["amount"]) for item in upcoming if item["category"] == "expense")
+    return {
+        "start_date": today.isoformat(),
+        "end_date": horizon.isoformat(),
+        "expected_income": round(income, 2),
+        "expected_expense": round(expense, 2),
+        "expected_net": round(income - expense, 2),
+        "upcoming": upcoming,
+    }
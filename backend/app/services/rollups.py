@@ -0,0 +1,179 @@
+from datetime import date
+from typing import Any, Iterable, List, Tuple
+
+from sqlalchemy import select, delete, func, case, cast, literal, String
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.data import EmotionEntry, FinanceEntry, LearningEntry
+from app.models.rollup import DailyRollup
+
+
+# 单条记录对预聚合的贡献：(指标, 维度, 日期, 值, 记录数)
+Contribution = Tuple[str, str, date, float, int]
+
+METRICS = ("sentiment", "spend", "income", "learning_minutes")
+
+
+def contributions(entry: Any) -> List[Contribution]:
+    """计算一条记录对每日预聚合的贡献，不参与聚合的记录返回空列表"""
+    if isinstance(entry, EmotionEntry):
+        if entry.sentiment_score is None:
+            return []
+        return [("sentiment", "", entry.date, float(entry.sentiment_score), 1)]
+
+    if isinstance(entry, FinanceEntry):
+        if entry.category == "expense":
+            metric = "spend"
+        elif entry.category == "income":
+            metric = "income"
+        else:
+            return []
+        return [(metric, entry.subcategory or "", entry.date, abs(float(entry.amount)), 1)]
+
+    if isinstance(entry, LearningEntry):
+        dimension = str(entry.skill_id) if entry.skill_id is not None else ""
+        return [("learning_minutes", dimension, entry.date, float(entry.duration or 0), 1)]
+
+    return []
+
+
+def apply(db: Session, items: Iterable[Contribution], sign: int = 1) -> None:
+    """
+    把贡献累加（sign=1）或扣除（sign=-1）到预聚合表，不提交事务
+
+    使用SQLite的upsert，每条贡献只需一次写入；扣除到记录数为0的行直接删除。
+    """
+    for metric, dimension, day, value, count in items:
+        stmt = sqlite_insert(DailyRollup).values(
+            metric=metric,
+            dimension=dimension,
+            date=day,
+            total=sign * value,
+            count=sign * count
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["metric", "dimension", "date"],
+            set_={
+                "total": DailyRollup.total + stmt.excluded.total,
+                "count": DailyRollup.count + stmt.excluded.count,
+            }
+        ))
+        if sign < 0:
+            db.execute(delete(DailyRollup).where(
+                DailyRollup.metric == metric,
+                DailyRollup.dimension == dimension,
+                DailyRollup.date == day,
+                DailyRollup.count <= 0
+            ))
+
+
+def add_entry(db: Session, entry: Any) -> None:
+    """新增记录时累加其贡献"""
+    apply(db, contributions(entry), 1)
+
+
+def remove_entry(db: Session, entry: Any) -> None:
+    """删除记录时扣除其贡献"""
+    apply(db, contributions(entry), -1)
+
+
+def replace_entry(db: Session, before: List[Contribution], entry: Any) -> None:
+    """
+    更新记录后用新贡献替换旧贡献
+
+    Args:
+        before: 修改字段前调用contributions得到的旧贡献
+        entry: 已修改的记录
+    """
+    after = contributions(entry)
+    if before == after:
+        return
+    apply(db, before, -1)
+    apply(db, after, 1)
+
+
+def detach_skill(db: Session, skill_id: int) -> None:
+    """
+    删除技能时调用，不提交事务
+
+    技能删除后其学习记录的skill_id被置空，对应的学习时长从该技能的维度并入无技能维度（空串）。
+    """
+    dimension = str(skill_id)
+    rows = db.execute(
+        select(DailyRollup.date, DailyRollup.total, DailyRollup.count).where(
+            DailyRollup.metric == "learning_minutes",
+            DailyRollup.dimension == dimension
+        )
+    ).all()
+    if not rows:
+        return
+    apply(db, [("learning_minutes", "", day, total, count) for day, total, count in rows], 1)
+    db.execute(delete(DailyRollup).where(
+        DailyRollup.metric == "learning_minutes",
+        DailyRollup.dimension == dimension
+    ))
+
+
+def rebuild(db: Session) -> int:
+    """从原始记录全量重建预聚合表，返回写入的行数"""
+    db.execute(delete(DailyRollup))
+
+    # 每条语句的结果列与DailyRollup一致：指标、维度、日期、累计值、记录数
+    queries = [
+        select(
+            literal("sentiment"),
+            literal(""),
+            EmotionEntry.date,
+            func.sum(EmotionEntry.sentiment_score),
+            func.count(EmotionEntry.id)
+        ).where(EmotionEntry.sentiment_score.isnot(None)).group_by(EmotionEntry.date),
+        select(
+            case((FinanceEntry.category == "expense", "spend"), else_="income"),
+            func.coalesce(FinanceEntry.subcategory, ""),
+            FinanceEntry.date,
+            func.sum(func.abs(FinanceEntry.amount)),
+            func.count(FinanceEntry.id)
+        ).where(FinanceEntry.category.in_(["expense", "income"])).group_by(
+            FinanceEntry.category, FinanceEntry.subcategory, FinanceEntry.date
+        ),
+        select(
+            literal("learning_minutes"),
+            func.coalesce(cast(LearningEntry.skill_id, String), ""),
+            LearningEntry.date,
+            func.sum(LearningEntry.duration),
+            func.count(LearningEntry.id)
+        ).group_by(LearningEntry.skill_id, LearningEntry.date),
+    ]
+
+    columns = ("metric", "dimension", "date", "total", "count")
+    rows = [dict(zip(columns, row)) for query in queries for row in db.execute(query)]
+    if rows:
+        db.execute(sqlite_insert(DailyRollup), rows)
+    db.commit()
+    return len(rows)
+
+
+def load(
+    db: Session,
+    metrics: Iterable[str],
+    start: date,
+    end: date
+) -> List[Tuple[str, str, date, float, int]]:
+    """读取日期范围内指定指标的预聚合行"""
+    return [
+        tuple(row)
+        for row in db.execute(
+            select(
+                DailyRollup.metric,
+                DailyRollup.dimension,
+                DailyRollup.date,
+                DailyRollup.total,
+                DailyRollup.count
+            ).where(
+                DailyRollup.metric.in_(list(metrics)),
+                DailyRollup.date >= start,
+                DailyRollup.date <= end
+            ).order_by(DailyRollup.date)
+        )
+    ]
@@ -0,0 +1,306 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.data import EmotionEntry, FinanceEntry, LearningEntry
+
+try:
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+    from chromadb.utils import embedding_functions
+except ImportError:  # chromadb为可选依赖，未安装时语义搜索不可用
+    chromadb = None
+
+
+# 参与语义索引的记录类型
+ENTRY_TYPES = {
+    EmotionEntry: "emotion",
+    FinanceEntry: "finance",
+    LearningEntry: "learning",
+}
+
+
+class SemanticIndexError(Exception):
+    """向量库或嵌入模型调用失败，接口应返回503"""
+
+
+def _entry_document(entry: Any) -> Optional[str]:
+    """提取记录中需要建立向量索引的文本"""
+    if isinstance(entry, EmotionEntry):
+        return entry.content
+    if isinstance(entry, LearningEntry):
+        return "\n".join(part for part in (entry.topic, entry.content) if part)
+    if isinstance(entry, FinanceEntry):
+        return entry.description
+    return None
+
+
+def _date_key(value: date) -> int:
+    """日期转换为YYYYMMDD整数，便于在向量库元数据中做范围过滤"""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+class SemanticIndex:
+    """
+    基于ChromaDB的记录向量索引
+
+    CRUD写入只把变更放入待处理队列，由后台线程按批次计算向量并写入，
+    避免每次写请求都同步调用嵌入模型；查询前会先刷新队列保证读到最新数据。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model_name: str,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        collection_name: str = "entries"
+    ):
+        self.path = path
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.collection_name = collection_name
+
+        self._collection = None
+        self._embed = None
+        self._pending: "OrderedDict[str, Optional[Tuple[str, Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    @property
+    def available(self) -> bool:
+        return chromadb is not None and settings.SEMANTIC_SEARCH_ENABLED
+
+    def _get_collection(self):
+        """延迟初始化ChromaDB客户端和嵌入模型"""
+        if self._collection is None:
+            client = chromadb.PersistentClient(
+                path=self.path,
+                settings=ChromaSettings(anonymized_telemetry=False)
+            )
+            self._embed = embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=self.model_name
+            )
+            self._collection = client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=self._embed,
+                metadata={"hnsw:space": "cosine"}
+            )
+        return self._collection
+
+    # ---------- 增量维护 ----------
+
+    def index_entry(self, entry: Any) -> None:
+        """记录创建或更新后调用，把记录放入待索引队列"""
+        if not self.available or type(entry) not in ENTRY_TYPES:
+            return
+
+        entry_type = ENTRY_TYPES[type(entry)]
+        doc_id = f"{entry_type}:{entry.id}"
+        document = _entry_document(entry)
+
+        if not document:
+            # 文本被清空的记录从索引中移除
+            self._enqueue(doc_id, None)
+            return
+
+        metadata = {
+            "entry_type": entry_type,
+            "entry_id": entry.id,
+            "date": _date_key(entry.date),
+        }
+        self._enqueue(doc_id, (document, metadata))
+
+    def remove_entry(self, entry: Any) -> None:
+        """记录删除后调用，把删除操作放入队列"""
+        if not self.available or type(entry) not in ENTRY_TYPES:
+            return
+        self._enqueue(f"{ENTRY_TYPES[type(entry)]}:{entry.id}", None)
+
+    def _enqueue(self, doc_id: str, item: Optional[Tuple[str, Dict[str, Any]]]) -> None:
+        with self._lock:
+            # 同一记录的多次变更只保留最后一次
+            self._pending.pop(doc_id, None)
+            self._pending[doc_id] = item
+            pending_count = len(self._pending)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="semantic-index", daemon=True)
+                self._worker.start()
+        if pending_count >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        """后台线程：攒够一批或等待超时后写入向量库"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"语义索引写入失败: {str(e)}")
+
+    def flush(self) -> int:
+        """
+        把待处理队列中的变更按批次写入向量库，返回处理的条数
+
+        Raises:
+            SemanticIndexError: 向量库或嵌入模型调用失败，未写入的变更放回队列等待下次重试
+        """
+        if not self.available:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = OrderedDict()
+            if not pending:
+                return 0
+
+            upserts = [(doc_id, item) for doc_id, item in pending.items() if item is not None]
+            deletes = [doc_id for doc_id, item in pending.items() if item is None]
+            written = set()
+            try:
+                collection = self._get_collection()
+                if deletes:
+                    collection.delete(ids=deletes)
+                    written.update(deletes)
+
+                # 批量计算向量，每批调用一次嵌入模型
+                for i in range(0, len(upserts), self.batch_size):
+                    batch = upserts[i:i + self.batch_size]
+                    collection.upsert(
+                        ids=[doc_id for doc_id, _ in batch],
+                        documents=[item[0] for _, item in batch],
+                        metadatas=[item[1] for _, item in batch]
+                    )
+                    written.update(doc_id for doc_id, _ in batch)
+            except Exception as e:
+                self._requeue([(doc_id, item) for doc_id, item in pending.items() if doc_id not in written])
+                raise SemanticIndexError(str(e)) from e
+            return len(pending)
+
+    def _requeue(self, items: List[Tuple[str, Optional[Tuple[str, Dict[str, Any]]]]]) -> None:
+        """写入失败的变更放回队列头部，期间又有新变更的记录以新变更为准"""
+        with self._lock:
+            restored = OrderedDict((doc_id, item) for doc_id, item in items if doc_id not in self._pending)
+            restored.update(self._pending)
+            self._pending = restored
+
+    def rebuild(self, db: Session) -> int:
+        """从数据库全量重建索引，用于首次启用或索引损坏时"""
+        if not self.available:
+            return 0
+
+        try:
+            collection = self._get_collection()
+            existing = collection.get(include=[])["ids"]
+            for i in range(0, len(existing), 5000):
+                collection.delete(ids=existing[i:i + 5000])
+        except Exception as e:
+            raise SemanticIndexError(str(e)) from e
+
+        total = 0
+        for model in ENTRY_TYPES:
+            for entry in db.query(model).yield_per(1000):
+                self.index_entry(entry)
+                total += 1
+            self.flush()
+        return total
+
+    # ---------- 查询 ----------
+
+    def _embed_query(self, query: str) -> List[float]:
+        """计算查询向量，最近的查询结果做LRU缓存；搜索接口在线程池中并发调用，读写缓存时加锁，计算向量时不加锁"""
+        with self._lock:
+            cached = self._query_embeddings.get(query)
+            if cached is not None:
+                self._query_embeddings.move_to_end(query)
+                return cached
+
+        embedding = self._embed([query])[0]
+        with self._lock:
+            self._query_embeddings[query] = embedding
+            self._query_embeddings.move_to_end(query)
+            while len(self._query_embeddings) > 256:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        entry_types: Optional[List[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        语义搜索记录
+
+        Args:
+            query: 查询文本
+            k: 返回结果数量
+            entry_types: 限定记录类型（emotion, finance, learning），可选
+            start_date: 开始日期，可选
+            end_date: 结束日期，可选
+
+        Returns:
+            按相似度排序的结果列表
+
+        Raises:
+            SemanticIndexError: 向量库或嵌入模型调用失败
+        """
+        self.flush()
+
+        conditions = []
+        if entry_types:
+            conditions.append({"entry_type": {"$in": entry_types}})
+        if start_date:
+            conditions.append({"date": {"$gte": _date_key(start_date)}})
+        if end_date:
+            conditions.append({"date": {"$lte": _date_key(end_date)}})
+
+        where = None
+        if len(conditions) == 1:
+            where = conditions[0]
+        elif conditions:
+            where = {"$and": conditions}
+
+        try:
+            result = self._get_collection().query(
+                query_embeddings=[self._embed_query(query)],
+                n_results=k,
+                where=where,
+                include=["documents", "metadatas", "distances"]
+            )
+        except Exception as e:
+            raise SemanticIndexError(str(e)) from e
+
+        hits = []
+        for document, metadata, distance in zip(
+            result["documents"][0], result["metadatas"][0], result["distances"][0]
+        ):
+            date_key = metadata["date"]
+            hits.append({
+                "entry_type": metadata["entry_type"],
+                "entry_id": metadata["entry_id"],
+                "date": date(date_key // 10000, date_key // 100 % 100, date_key % 100).isoformat(),
+                "text": document,
+                "score": round(1 - distance, 4)
+            })
+        return hits
+
+
+# 全局语义索引实例
+semantic_index = SemanticIndex(
+    path=settings.CHROMA_DB_PATH,
+    model_name=settings.EMBEDDING_MODEL,
+    batch_size=settings.SEMANTIC_INDEX_BATCH_SIZE
+)
@@ -0,0 +1,89 @@
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.models.data import EmotionEntry
+from app.services import analysis_cache
+
+
+# 分析结果按(记录, 类型, 模型)缓存，词典或规则变化时修改MODEL，旧结果自然不再命中
+ANALYSIS_TYPE = "sentiment"
+MODEL = "lexicon-v1"
+
+# 正负情绪词典，按词长降序匹配，避免“不开心”先被“开心”命中
+POSITIVE_WORDS = (
+    "开心", "高兴", "快乐", "愉快", "满意", "满足", "兴奋", "幸福", "轻松", "放松",
+    "顺利", "充实", "感恩", "感激", "期待", "自信", "喜欢", "不错", "舒服", "平静",
+    "成功", "进步", "收获", "欣慰", "安心", "踏实",
+)
+NEGATIVE_WORDS = (
+    "难过", "伤心", "焦虑", "紧张", "烦躁", "烦", "生气", "愤怒", "沮丧", "失望",
+    "疲惫", "累", "压力", "担心", "害怕", "孤独", "无聊", "郁闷", "痛苦", "委屈",
+    "后悔", "失眠", "崩溃", "糟糕", "不安", "迷茫",
+)
+# 紧挨在情绪词前的否定词使其极性反转，如“不开心”“没有压力”
+NEGATIONS = ("没有", "不太", "不", "没", "别", "无")
+
+# 得分超过该阈值才判为正面或负面
+POLARITY_THRESHOLD = 0.2
+
+_LEXICON = sorted(
+    [(word, 1) for word in POSITIVE_WORDS] + [(word, -1) for word in NEGATIVE_WORDS],
+    key=lambda item: len(item[0]),
+    reverse=True
+)
+
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """
+    基于词典的情感分析
+
+    Args:
+        text: 情感记录内容
+
+    Returns:
+        包含sentiment（positive、negative、neutral）、score（-1到1）和命中词的字典
+    """
+    text = text or ""
+    positive: List[str] = []
+    negative: List[str] = []
+    i = 0
+    while i < len(text):
+        for word, polarity in _LEXICON:
+            if not text.startswith(word, i):
+                continue
+            negation = next((n for n in NEGATIONS if text.endswith(n, 0, i)), "")
+            if negation:
+                polarity = -polarity
+            (positive if polarity > 0 else negative).append(negation + word)
+            i += len(word)
+            break
+        else:
+            i += 1
+
+    total = len(positive) + len(negative)
+    score = round((len(positive) - len(negative)) / total, 4) if total else 0.0
+    if score > POLARITY_THRESHOLD:
+        sentiment = "positive"
+    elif score < -POLARITY_THRESHOLD:
+        sentiment = "negative"
+    else:
+        sentiment = "neutral"
+    return {
+        "sentiment": sentiment,
+        "score": score,
+        "positive_words": positive,
+        "negative_words": negative,
+    }
+
+
+def analyze_entries(db: Session, entries: List[EmotionEntry]) -> Dict[int, Dict[str, Any]]:
+    """
+    逐条分析情感记录，结果缓存在analysis_results中，只有新增或内容变化的记录会重新分析
+
+    Returns:
+        记录ID到分析结果的字典
+    """
+    return analysis_cache.get_or_compute_many(
+        db, entries, ANALYSIS_TYPE, MODEL, lambda entry: analyze_text(entry.content)
+    )
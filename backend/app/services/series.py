@@ -0,0 +1,179 @@
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from app.models.data import EmotionEntry, FinanceEntry, LearningEntry
+
+
+BUCKETS = ("day", "week", "month")
+
+# 指标 -> (模型, 聚合表达式工厂, 聚合方式)
+# sum类指标没有数据的分桶补0，mean类指标没有数据的分桶为空值
+METRICS = {
+    "spend": (FinanceEntry, lambda: func.sum(case(
+        (FinanceEntry.category == "expense", func.abs(FinanceEntry.amount)), else_=0
+    )), "sum"),
+    "income": (FinanceEntry, lambda: func.sum(case(
+        (FinanceEntry.category == "income", func.abs(FinanceEntry.amount)), else_=0
+    )), "sum"),
+    "learning_minutes": (LearningEntry, lambda: func.sum(LearningEntry.duration), "sum"),
+    "sentiment": (EmotionEntry, lambda: func.avg(EmotionEntry.sentiment_score), "mean"),
+}
+
+
+def bucket_start(value: date, bucket: str) -> date:
+    """返回日期所在分桶的起始日期，周以周一为起点"""
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+
+def _next_bucket(value: date, bucket: str) -> date:
+    if bucket == "week":
+        return value + timedelta(days=7)
+    if bucket == "month":
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+
+def _bucket_expression(column, bucket: str):
+    """SQLite中计算分桶起始日期的表达式"""
+    if bucket == "week":
+        # weekday 0 跳到下一个周日（当天是周日则不变），再回退6天得到周一
+        return func.date(column, "weekday 0", "-6 days")
+    if bucket == "month":
+        return func.strftime("%Y-%m-01", column)
+    return func.date(column)
+
+
+def aggregate_metric(
+    db: Session,
+    metric: str,
+    start: date,
+    end: date,
+    bucket: str = "day"
+) -> List[Tuple[date, Optional[float]]]:
+    """
+    在数据库中按分桶聚合单个指标，并补齐范围内缺失的分桶
+
+    Returns:
+        按时间排序的(分桶起始日期, 值)列表
+    """
+    model, aggregate, kind = METRICS[metric]
+    bucket_col = _bucket_expression(model.date, bucket).label("bucket")
+
+    rows = db.query(bucket_col, aggregate().label("value")).filter(
+        model.date >= start,
+        model.date <= end
+    ).group_by(bucket_col).all()
+    values = {date.fromisoformat(row.bucket): row.value for row in rows}
+
+    series: List[Tuple[date, Optional[float]]] = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        value = values.get(current)
+        if value is None and kind == "sum":
+            value = 0
+        series.append((current, float(value) if value is not None else None))
+        current = _next_bucket(current, bucket)
+    return series
+
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets降采样
+
+    保留首尾点，其余点分成threshold-2个桶，每个桶选出与前一个已选点、
+    下一个桶均值点构成三角形面积最大的点，能较好保留峰谷形状。
+
+    Args:
+        points: (x, y)点列表，x需递增
+        threshold: 目标点数
+
+    Returns:
+        被选中点的下标列表
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # 下一个桶的平均点
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = sum(points[j][0] for j in range(next_start, next_end)) / (next_end - next_start)
+        avg_y = sum(points[j][1] for j in range(next_start, next_end)) / (next_end - next_start)
+
+        # 当前桶中面积最大的点
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def downsample(
+    series: List[Tuple[date, Optional[float]]],
+    max_points: int
+) -> List[Tuple[date, Optional[float]]]:
+    """对分桶序列做LTTB降采样，空值点不参与选择"""
+    if len(series) <= max_points:
+        return series
+
+    present = [(bucket, value) for bucket, value in series if value is not None]
+    if len(present) <= max_points:
+        return present
+
+    points = [(bucket.toordinal(), value) for bucket, value in present]
+    return [present[i] for i in lttb(points, max_points)]
+
+
+def build_series(
+    db: Session,
+    metrics: List[str],
+    start: date,
+    end: date,
+    bucket: str = "day",
+    max_points: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    生成图表用的分桶序列
+
+    Args:
+        metrics: 指标列表，可选spend、income、learning_minutes、sentiment
+        start: 开始日期
+        end: 结束日期
+        bucket: 分桶粒度day、week或month
+        max_points: 每个指标最多返回的点数，超出时做LTTB降采样
+
+    Returns:
+        每个指标的x（分桶起始日期）和y（值）数组
+    """
+    result: Dict[str, Any] = {}
+    for metric in metrics:
+        series = aggregate_metric(db, metric, start, end, bucket)
+        if max_points:
+            series = downsample(series, max_points)
+        result[metric] = {
+            "x": [bucket_date.isoformat() for bucket_date, _ in series],
+            "y": [round(value, 4) if value is not None else None for _, value in series],
+        }
+    return result
@@ -0,0 +1,153 @@
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import Session
+
+from app.core.cache import write_versions
+from app.models.data import SkillEntry
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """技能名称的规范形式：全角转半角、忽略大小写、合并空白"""
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKC", name).casefold()
+    return re.sub(r"\s+", " ", name).strip()
+
+
+def backfill(db: Session) -> int:
+    """为name_key为空的技能补齐规范名称，保留updated_at原值，返回补齐的行数"""
+    rows = [
+        {"skill_id": skill_id, "name_key": normalize_name(name)}
+        for skill_id, name in db.execute(
+            select(SkillEntry.id, SkillEntry.name).where(SkillEntry.name_key.is_(None))
+        )
+    ]
+    if rows:
+        table = SkillEntry.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("skill_id")).values(
+                name_key=bindparam("name_key"),
+                updated_at=table.c.updated_at
+            ),
+            rows
+        )
+        db.commit()
+    return len(rows)
+
+
+class _Node:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.ids: List[int] = []
+
+
+class SkillNameIndex:
+    """
+    技能规范名称的内存前缀树，用于前缀补全和容错匹配
+
+    树按skill_entries的写入版本号缓存，技能增删改后下次查询时重建；
+    技能数量通常只有几百个，重建只需一次查询。
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._names: Dict[int, str] = {}
+        self._version: Optional[Tuple[int, ...]] = None
+        self._lock = threading.Lock()
+
+    def _ensure(self, db: Session) -> Tuple[_Node, Dict[int, str]]:
+        version = write_versions.get([SkillEntry.__tablename__])
+        with self._lock:
+            if version != self._version:
+                root, names = _Node(), {}
+                for skill_id, name, name_key in db.execute(
+                    select(SkillEntry.id, SkillEntry.name, SkillEntry.name_key)
+                ):
+                    names[skill_id] = name
+                    node = root
+                    for char in name_key or normalize_name(name):
+                        node = node.children.setdefault(char, _Node())
+                    node.ids.append(skill_id)
+                self._root, self._names, self._version = root, names, version
+            return self._root, self._names
+
+    def _prefix(self, root: _Node, key: str, limit: int) -> List[Tuple[str, int]]:
+        node = root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        # 广度优先，较短的名称排在前面
+        results: List[Tuple[str, int]] = []
+        level = [(key, node)]
+        while level and len(results) < limit:
+            next_level = []
+            for text, current in level:
+                results.extend((text, skill_id) for skill_id in current.ids)
+                next_level.extend(
+                    (text + char, child) for char, child in sorted(current.children.items())
+                )
+            level = next_level
+        return results[:limit]
+
+    def _fuzzy(self, root: _Node, key: str, max_distance: int) -> List[Tuple[int, str, int]]:
+        """沿前缀树逐行计算编辑距离，某个分支的最小距离超过上限时剪枝"""
+        results: List[Tuple[int, str, int]] = []
+        first_row = list(range(len(key) + 1))
+
+        def walk(node: _Node, text: str, previous: List[int]) -> None:
+            for char, child in node.children.items():
+                row = [previous[0] + 1]
+                for i in range(1, len(key) + 1):
+                    row.append(min(
+                        row[i - 1] + 1,
+                        previous[i] + 1,
+                        previous[i - 1] + (key[i - 1] != char)
+                    ))
+                if row[-1] <= max_distance:
+                    results.extend((row[-1], text + char, skill_id) for skill_id in child.ids)
+                if min(row) <= max_distance:
+                    walk(child, text + char, row)
+
+        walk(root, "", first_row)
+        return results
+
+    def search(self, db: Session, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        按名称查找技能：完全匹配、前缀匹配、编辑距离在容错范围内的匹配依次排列
+
+        Returns:
+            技能ID、名称、匹配方式和编辑距离
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        root, names = self._ensure(db)
+        max_distance = max(1, len(key) // 4)
+
+        found: Dict[int, Dict[str, Any]] = {}
+        for text, skill_id in self._prefix(root, key, limit):
+            found[skill_id] = {
+                "id": skill_id,
+                "name": names[skill_id],
+                "match": "exact" if text == key else "prefix",
+                "distance": 0 if text == key else None,
+            }
+        for distance, text, skill_id in sorted(self._fuzzy(root, key, max_distance)):
+            if skill_id not in found:
+                found[skill_id] = {"id": skill_id, "name": names[skill_id], "match": "fuzzy", "distance": distance}
+
+        order = {"exact": 0, "prefix": 1, "fuzzy": 2}
+        return sorted(
+            found.values(),
+            key=lambda item: (order[item["match"]], item["distance"] or 0, len(item["name"]))
+        )[:limit]
+
+
+name_index = SkillNameIndex()
@@ -0,0 +1,444 @@
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, delete, update, func, bindparam, and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.cache import write_versions
+from app.core.config import settings
+from app.models.data import LearningEntry, SkillEntry
+from app.models.rollup import DailyRollup
+from app.models.skill_graph import SkillClosure
+from app.models.skill_progress import SkillProgress
+
+
+# 单条学习记录对技能累计的贡献：(技能ID, 分钟数, 日期)
+Contribution = Tuple[int, int, date]
+
+# 按技能ID记录的累计值：(自身分钟数, 汇总分钟数, 学习记录数, 最早日期, 最晚日期)
+Totals = Dict[int, Tuple[int, int, int, Optional[date], Optional[date]]]
+
+
+def contributions(entry: LearningEntry) -> List[Contribution]:
+    """未关联技能的学习记录不计入"""
+    if entry.skill_id is None:
+        return []
+    return [(entry.skill_id, int(entry.duration or 0), entry.date)]
+
+
+def effective_minutes(own_minutes: float, subtree_minutes: float) -> float:
+    """自身时长加上按权重折算的后续技能时长"""
+    return own_minutes + settings.SKILL_PROGRESS_PROPAGATION * (subtree_minutes - own_minutes)
+
+
+def derive(own_minutes: float, subtree_minutes: float) -> Tuple[int, int]:
+    """由累计时长推算(进度, 等级)：进度按掌握所需时长线性折算，每25%升一级"""
+    effective = effective_minutes(own_minutes, subtree_minutes)
+    progress = min(int(effective * 100 // max(settings.SKILL_MASTERY_MINUTES, 1)), 100)
+    return progress, min(1 + progress // 25, 5)
+
+
+def _ancestors(db: Session, skill_id: int) -> List[int]:
+    return list(db.execute(
+        select(SkillClosure.ancestor_id).where(SkillClosure.descendant_id == skill_id)
+    ).scalars())
+
+
+def _bump(db: Session, skill_id: int, own: int, subtree: int, count: int, day: Optional[date] = None) -> None:
+    """累加计数；传入day时同时扩展最早、最晚学习日期"""
+    stmt = sqlite_insert(SkillProgress).values(
+        skill_id=skill_id,
+        own_minutes=own,
+        subtree_minutes=subtree,
+        learning_count=count,
+        first_date=day,
+        last_date=day
+    )
+    set_ = {
+        "own_minutes": SkillProgress.own_minutes + stmt.excluded.own_minutes,
+        "subtree_minutes": SkillProgress.subtree_minutes + stmt.excluded.subtree_minutes,
+        "learning_count": SkillProgress.learning_count + stmt.excluded.learning_count,
+        "updated_at": func.now(),
+    }
+    if day is not None:
+        set_["first_date"] = func.min(func.coalesce(SkillProgress.first_date, stmt.excluded.first_date), stmt.excluded.first_date)
+        set_["last_date"] = func.max(func.coalesce(SkillProgress.last_date, stmt.excluded.last_date), stmt.excluded.last_date)
+    db.execute(stmt.on_conflict_do_update(index_elements=["skill_id"], set_=set_))
+
+
+def _reset_dates(db: Session, skill_id: int) -> None:
+    """
+    扣除学习记录后从每日预聚合表重新取最早、最晚日期
+
+    须在rollups扣除同一条记录之后调用；走(metric, dimension, date)唯一索引，只读两端各一行。
+    """
+    first, last = db.execute(
+        select(func.min(DailyRollup.date), func.max(DailyRollup.date)).where(
+            DailyRollup.metric == "learning_minutes",
+            DailyRollup.dimension == str(skill_id)
+        )
+    ).one()
+    db.execute(
+        update(SkillProgress).where(SkillProgress.skill_id == skill_id).values(first_date=first, last_date=last)
+    )
+
+
+def _refresh_skills(db: Session, skill_ids: Iterable[int]) -> None:
+    """按累计时长重新推算技能的进度和等级，只写入有变化的技能"""
+    skill_ids = set(skill_ids)
+    if not settings.SKILL_PROGRESS_AUTO or not skill_ids:
+        return
+    totals = {
+        skill_id: (own, subtree)
+        for skill_id, own, subtree in db.execute(
+            select(SkillProgress.skill_id, SkillProgress.own_minutes, SkillProgress.subtree_minutes)
+            .where(SkillProgress.skill_id.in_(skill_ids))
+        )
+    }
+    changes = []
+    for skill_id, progress, level in db.execute(
+        select(SkillEntry.id, SkillEntry.progress, SkillEntry.level).where(SkillEntry.id.in_(skill_ids))
+    ):
+        derived = derive(*totals.get(skill_id, (0, 0)))
+        if (progress, level) != derived:
+            changes.append({"skill_id": skill_id, "progress": derived[0], "level": derived[1]})
+    if changes:
+        # 用Core批量更新，不把会话中已加载的技能对象标记为已修改（删除技能时它仍要被返回）
+        table = SkillEntry.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("skill_id")).values(
+                progress=bindparam("progress"),
+                level=bindparam("level")
+            ),
+            changes
+        )
+
+
+def apply(db: Session, items: Iterable[Contribution], sign: int = 1) -> None:
+    """
+    把学习时长累加（sign=1）或扣除（sign=-1）到技能及其全部前置技能，不提交事务
+
+    前置技能从闭包表一次查出，写入量只与该技能的前置技能数有关，与学习记录数无关。
+    扣除时依赖每日预聚合表已扣除同一条记录，调用顺序须在rollups之后。
+    """
+    touched = set()
+    for skill_id, minutes, day in items:
+        if db.get(SkillEntry, skill_id) is None:
+            continue
+        if sign > 0:
+            _bump(db, skill_id, minutes, minutes, 1, day)
+        else:
+            _bump(db, skill_id, -minutes, -minutes, -1)
+            _reset_dates(db, skill_id)
+        touched.add(skill_id)
+        for ancestor in _ancestors(db, skill_id):
+            _bump(db, ancestor, 0, sign * minutes, 0)
+            touched.add(ancestor)
+    _refresh_skills(db, touched)
+
+
+def add_entry(db: Session, entry: LearningEntry) -> None:
+    """新增学习记录时累加其时长"""
+    apply(db, contributions(entry), 1)
+
+
+def remove_entry(db: Session, entry: LearningEntry) -> None:
+    """删除学习记录时扣除其时长"""
+    apply(db, contributions(entry), -1)
+
+
+def replace_entry(db: Session, before: List[Contribution], entry: LearningEntry) -> None:
+    """
+    更新学习记录后用新贡献替换旧贡献
+
+    Args:
+        before: 修改字段前调用contributions得到的旧贡献
+        entry: 已修改的记录
+    """
+    after = contributions(entry)
+    if before == after:
+        return
+    apply(db, before, -1)
+    apply(db, after, 1)
+
+
+def on_closure_change(
+    db: Session,
+    added: List[Tuple[int, int]],
+    removed: List[Tuple[int, int]]
+) -> None:
+    """
+    前置关系变化后调整汇总时长，不提交事务
+
+    Args:
+        added: 新出现的(前置技能, 后续技能)闭包对，后续技能的自身时长计入前置技能
+        removed: 消失的闭包对，从前置技能的汇总中扣除
+    """
+    pairs = [(pair, 1) for pair in added] + [(pair, -1) for pair in removed]
+    if not pairs:
+        return
+    own = dict(db.execute(
+        select(SkillProgress.skill_id, SkillProgress.own_minutes)
+        .where(SkillProgress.skill_id.in_({descendant for (_, descendant), _ in pairs}))
+    ).all())
+    touched = set()
+    for (ancestor, descendant), sign in pairs:
+        minutes = own.get(descendant, 0)
+        if minutes:
+            _bump(db, ancestor, 0, sign * minutes, 0)
+            touched.add(ancestor)
+    _refresh_skills(db, touched)
+
+
+def remove_skill(db: Session, skill_id: int) -> None:
+    """删除技能时调用，须在移除其前置关系之后，不提交事务"""
+    db.execute(delete(SkillProgress).where(SkillProgress.skill_id == skill_id))
+
+
+def recount(db: Session) -> Totals:
+    """从学习记录和闭包表全量计算各技能的累计值，用于重建和校验"""
+    own = {
+        skill_id: (int(minutes or 0), count, first, last)
+        for skill_id, minutes, count, first, last in db.execute(
+            select(
+                LearningEntry.skill_id,
+                func.sum(LearningEntry.duration),
+                func.count(LearningEntry.id),
+                func.min(LearningEntry.date),
+                func.max(LearningEntry.date)
+            )
+            .join(SkillEntry, SkillEntry.id == LearningEntry.skill_id)
+            .group_by(LearningEntry.skill_id)
+        )
+    }
+    subtree = {skill_id: values[0] for skill_id, values in own.items()}
+    for ancestor, descendant in db.execute(select(SkillClosure.ancestor_id, SkillClosure.descendant_id)):
+        if descendant in own:
+            subtree[ancestor] = subtree.get(ancestor, 0) + own[descendant][0]
+
+    empty = (0, 0, None, None)
+    totals = {}
+    for skill_id, minutes in subtree.items():
+        own_minutes, count, first, last = own.get(skill_id, empty)
+        totals[skill_id] = (own_minutes, minutes, count, first, last)
+    return totals
+
+
+def _stored(db: Session) -> Totals:
+    return {
+        skill_id: (own, subtree, count, first, last)
+        for skill_id, own, subtree, count, first, last in db.execute(
+            select(
+                SkillProgress.skill_id,
+                SkillProgress.own_minutes,
+                SkillProgress.subtree_minutes,
+                SkillProgress.learning_count,
+                SkillProgress.first_date,
+                SkillProgress.last_date
+            )
+        )
+        if own or subtree or count
+    }
+
+
+def verify(db: Session) -> List[Dict[str, Any]]:
+    """对比增量维护的累计值与全量计算结果，返回不一致的技能"""
+    stored, expected = _stored(db), recount(db)
+    mismatches = []
+    for skill_id in sorted(set(stored) | set(expected)):
+        if stored.get(skill_id) != expected.get(skill_id):
+            mismatches.append({
+                "skill_id": skill_id,
+                "stored": stored.get(skill_id),
+                "expected": expected.get(skill_id),
+            })
+    return mismatches
+
+
+def rebuild(db: Session) -> Dict[str, int]:
+    """全量重建累计表并重新推算有学习记录的技能的进度，返回重建前不一致的技能数和写入行数"""
+    mismatches = len(verify(db))
+    totals = recount(db)
+    db.execute(delete(SkillProgress))
+    if totals:
+        db.execute(sqlite_insert(SkillProgress), [
+            {
+                "skill_id": skill_id,
+                "own_minutes": own,
+                "subtree_minutes": subtree,
+                "learning_count": count,
+                "first_date": first,
+                "last_date": last,
+            }
+            for skill_id, (own, subtree, count, first, last) in totals.items()
+        ])
+    _refresh_skills(db, totals)
+    db.commit()
+    write_versions.bump(SkillEntry.__tablename__)
+    return {"mismatches": mismatches, "rows": len(totals)}
+
+
+def get_progress(db: Session, skill_id: int) -> Dict[str, Any]:
+    """技能当前的累计时长与推算进度"""
+    row = db.get(SkillProgress, skill_id)
+    own, subtree, count = (row.own_minutes, row.subtree_minutes, row.learning_count) if row else (0, 0, 0)
+    progress, level = derive(own, subtree)
+    return {
+        "skill_id": skill_id,
+        "own_minutes": own,
+        "subtree_minutes": subtree,
+        "learning_count": count,
+        "effective_minutes": round(effective_minutes(own, subtree), 2),
+        "derived_progress": progress,
+        "derived_level": level,
+    }
+
+
+def history(db: Session, skill_id: int, start: date, end: date) -> Dict[str, Any]:
+    """
+    技能学习时长和推算进度的每日序列
+
+    从每日预聚合表读取该技能及其全部后续技能的学习时长，起始日之前的时长汇总为初始值，
+    因此只读取日期范围内的预聚合行和一次汇总查询，与学习记录数无关。
+    后续技能按当前的前置关系确定。
+
+    Returns:
+        日期、每日自身/后续技能时长，以及累计时长和当天结束时的推算进度
+    """
+    dimensions = [str(skill_id)] + [
+        str(descendant) for descendant in db.execute(
+            select(SkillClosure.descendant_id).where(SkillClosure.ancestor_id == skill_id)
+        ).scalars()
+    ]
+    own_dimension = str(skill_id)
+    in_scope = (DailyRollup.metric == "learning_minutes", DailyRollup.dimension.in_(dimensions))
+
+    base_own, base_subtree = 0.0, 0.0
+    for dimension, total in db.execute(
+        select(DailyRollup.dimension, func.sum(DailyRollup.total))
+        .where(*in_scope, DailyRollup.date < start)
+        .group_by(DailyRollup.dimension)
+    ):
+        base_subtree += total or 0
+        if dimension == own_dimension:
+            base_own += total or 0
+
+    days = (end - start).days + 1
+    own_daily = [0.0] * days
+    dependent_daily = [0.0] * days
+    for dimension, day, total in db.execute(
+        select(DailyRollup.dimension, DailyRollup.date, DailyRollup.total)
+        .where(*in_scope, DailyRollup.date >= start, DailyRollup.date <= end)
+    ):
+        series = own_daily if dimension == own_dimension else dependent_daily
+        series[(day - start).days] += total
+
+    cumulative_own, cumulative_subtree, progress = [], [], []
+    own, subtree = base_own, base_subtree
+    for i in range(days):
+        own += own_daily[i]
+        subtree += own_daily[i] + dependent_daily[i]
+        cumulative_own.append(own)
+        cumulative_subtree.append(subtree)
+        progress.append(derive(own, subtree)[0])
+
+    return {
+        "x": [(start + timedelta(days=i)).isoformat() for i in range(days)],
+        "own_minutes": own_daily,
+        "dependent_minutes": dependent_daily,
+        "cumulative_own_minutes": cumulative_own,
+        "cumulative_subtree_minutes": cumulative_subtree,
+        "progress": progress,
+    }
+
+
+def _stats_row(skill_id: int, name: str, values: Optional[Tuple[Any, ...]]) -> Dict[str, Any]:
+    minutes, count, first, last = values or (0, 0, None, None)
+    return {
+        "skill_id": skill_id,
+        "skill_name": name,
+        "total_duration": int(minutes or 0),
+        "learning_count": int(count or 0),
+        "first_date": first.isoformat() if first else None,
+        "last_date": last.isoformat() if last else None,
+    }
+
+
+def learning_stats(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    每个技能的学习时长、次数和首末学习日期
+
+    不限日期时直接读取累计表；限定日期时汇总范围内的每日预聚合行。
+    两种情况都不读取学习记录，与历史记录数量无关。
+    """
+    if start is None and end is None:
+        values = {
+            skill_id: (minutes, count, first, last)
+            for skill_id, minutes, count, first, last in db.execute(
+                select(
+                    SkillProgress.skill_id,
+                    SkillProgress.own_minutes,
+                    SkillProgress.learning_count,
+                    SkillProgress.first_date,
+                    SkillProgress.last_date
+                )
+            )
+        }
+    else:
+        conditions = [DailyRollup.metric == "learning_minutes", DailyRollup.dimension != ""]
+        if start is not None:
+            conditions.append(DailyRollup.date >= start)
+        if end is not None:
+            conditions.append(DailyRollup.date <= end)
+        values = {
+            int(dimension): (minutes, count, first, last)
+            for dimension, minutes, count, first, last in db.execute(
+                select(
+                    DailyRollup.dimension,
+                    func.sum(DailyRollup.total),
+                    func.sum(DailyRollup.count),
+                    func.min(DailyRollup.date),
+                    func.max(DailyRollup.date)
+                ).where(*conditions).group_by(DailyRollup.dimension)
+            )
+        }
+    return [
+        _stats_row(skill_id, name, values.get(skill_id))
+        for skill_id, name in db.execute(select(SkillEntry.id, SkillEntry.name).order_by(SkillEntry.id))
+    ]
+
+
+def recount_learning_stats(
+    db: Session,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """直接连接学习记录计算learning_stats的结果，用于校验"""
+    join_on = [LearningEntry.skill_id == SkillEntry.id]
+    if start is not None:
+        join_on.append(LearningEntry.date >= start)
+    if end is not None:
+        join_on.append(LearningEntry.date <= end)
+    rows = db.execute(
+        select(
+            SkillEntry.id,
+            SkillEntry.name,
+            func.sum(LearningEntry.duration),
+            func.count(LearningEntry.id),
+            func.min(LearningEntry.date),
+            func.max(LearningEntry.date)
+        ).outerjoin(LearningEntry, and_(*join_on)).group_by(SkillEntry.id).order_by(SkillEntry.id)
+    )
+    return [_stats_row(skill_id, name, tuple(values)) for skill_id, name, *values in rows]
+
+
+def diff_learning_stats(stored: List[Dict[str, Any]], expected: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """对比两份learning_stats结果，返回不一致的技能"""
+    expected_by_id = {row["skill_id"]: row for row in expected}
+    stored_by_id = {row["skill_id"]: row for row in stored}
+    return [
+        {"skill_id": skill_id, "stored": stored_by_id.get(skill_id), "expected": expected_by_id.get(skill_id)}
+        for skill_id in sorted(set(stored_by_id) | set(expected_by_id))
+        if stored_by_id.get(skill_id) != expected_by_id.get(skill_id)
+    ]
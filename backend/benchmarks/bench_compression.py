@@ -0,0 +1,120 @@
+"""
+响应压缩的基准测试
+
+对比不压缩、gzip、br和zstd下各接口每个请求的耗时、进程CPU时间和传输字节数，
+每种编码分别测量关闭响应缓存（每次请求都压缩）和开启缓存（命中时直接返回预压缩的变体）两种情况；
+另外单独测量各编码在请求压缩级别和缓存压缩级别下的压缩耗时和压缩率。未安装brotli或zstandard时跳过对应编码。
+
+用法（在backend目录下）:
+    python -m benchmarks.bench_compression --years 3 --limit 1000
+    python -m benchmarks.bench_compression --output compression.json
+"""
+import argparse
+import contextlib
+import statistics
+import sys
+import time
+from datetime import date
+
+from benchmarks.common import prepare_environment, measure, build_report, write_json
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="响应压缩基准测试")
+    parser.add_argument("--years", type=float, default=3, help="模拟数据的年数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", default="2025-12-31")
+    parser.add_argument("--limit", type=int, default=1000, help="列表接口每页的记录数")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="结果JSON的写入路径，-表示输出到标准输出")
+    return parser.parse_args()
+
+
+def request_case(client, name: str, path: str, params: dict, encoding: str, repeat: int):
+    """请求耗时、每个请求的进程CPU时间（包括线程池中的压缩）和未解压的响应体大小"""
+    cpu = []
+
+    def call():
+        began = time.process_time()
+        with client.stream("GET", path, params=params, headers={"Accept-Encoding": encoding}) as response:
+            response.raise_for_status()
+            body = b"".join(response.iter_raw())
+        cpu.append(time.process_time() - began)
+        return body
+
+    result = measure(name, call, repeat, memory=False)
+    # 第一次为预热，开启缓存时即写入缓存的那次请求
+    result["cpu_ms"] = round(statistics.median(cpu[1:]) * 1000, 2)
+    result["encoding"] = encoding
+    return result
+
+
+def codec_cases(body: bytes, label: str, repeat: int):
+    """直接压缩响应体，对比请求压缩级别和缓存压缩级别"""
+    from app.core import compression
+    from app.core.config import settings
+
+    results = []
+    for encoding in compression.available():
+        for cached in (False, True):
+            levels = settings.COMPRESSION_CACHED_LEVELS if cached else settings.COMPRESSION_LEVELS
+            name = f"codec_{label}_{encoding}_{levels[encoding]}"
+            result = measure(name, lambda: compression.compress(encoding, body, cached), repeat, memory=False)
+            result["ratio"] = round(len(body) / (result["payload_kb"] * 1024), 1)
+            results.append(result)
+    return results
+
+
+def main():
+    args = parse_args()
+    prepare_environment("bench_compression", cache=True)
+
+    from fastapi.testclient import TestClient
+    with contextlib.redirect_stdout(sys.stderr):
+        from app.main import app
+    from app.core import compression
+    from app.core.cache import response_cache
+    from app.core.config import settings
+    from benchmarks import synthetic
+
+    synthetic.generate(args.years, seed=args.seed, end=date.fromisoformat(args.end))
+    client = TestClient(app)
+
+    endpoints = [
+        ("finances", "/api/finances/", {"limit": args.limit}),
+        ("emotions", "/api/emotions/", {"limit": args.limit}),
+        ("data_by_date", "/api/insights/data-by-date", {"start_date": "2000-01-01", "end_date": args.end}),
+    ]
+    encodings = ("identity",) + compression.available()
+
+    requests = []
+    bodies = {}
+    for label, path, params in endpoints:
+        for cached in (False, True):
+            settings.RESPONSE_CACHE_ENABLED = cached
+            response_cache.clear()
+            for encoding in encodings:
+                mode = "cached" if cached else "uncached"
+                result = request_case(client, f"{label}_{encoding}_{mode}", path, params, encoding, args.repeat)
+                requests.append(result)
+        bodies[label] = client.get(path, params=params, headers={"Accept-Encoding": "identity"}).content
+
+    codecs = []
+    for label, body in bodies.items():
+        codecs += codec_cases(body, label, max(args.repeat // 4, 3))
+
+    params = {"years": args.years, "seed": args.seed, "end": args.end, "limit": args.limit, "repeat": args.repeat}
+    report = build_report("compression", params, requests + codecs)
+    write_json(report, args.output)
+    if args.output != "-":
+        print("每个请求的耗时、进程CPU时间和传输大小")
+        print(f"{'case':<36}{'median_ms':>11}{'cpu_ms':>9}{'payload_kb':>12}")
+        for row in requests:
+            print(f"{row['case']:<36}{row['median_ms']:>11}{row['cpu_ms']:>9}{row['payload_kb']:>12}")
+        print(f"\n{'case':<36}{'median_ms':>11}{'payload_kb':>12}{'ratio':>8}")
+        for row in codecs:
+            print(f"{row['case']:<36}{row['median_ms']:>11}{row['payload_kb']:>12}{row['ratio']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+data-by-date 基准测试
+
+在临时SQLite数据库中用synthetic生成多年的模拟数据，对比原ORM实现与Core投影/统计模式的
+耗时和内存峰值。
+
+用法（在backend目录下）:
+    python -m benchmarks.bench_data_by_date --years 3 --repeat 3
+"""
+import argparse
+import json
+import sys
+import os
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 必须在导入app之前指定数据库
+from benchmarks.common import prepare_environment, measure, build_report, print_table, write_json  # noqa: E402
+prepare_environment("bench_data_by_date")
+
+from sqlalchemy import and_  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.models.data import EmotionEntry, FinanceEntry, LearningEntry  # noqa: E402
+from app.services import daily_data  # noqa: E402
+from benchmarks import synthetic  # noqa: E402
+
+
+def legacy_orm(start: date, end: date) -> bytes:
+    """原实现：加载完整ORM对象并拼装嵌套字典"""
+    db = SessionLocal()
+    try:
+        emotions = db.query(EmotionEntry).filter(and_(EmotionEntry.date >= start, EmotionEntry.date <= end)).all()
+        finances = db.query(FinanceEntry).filter(and_(FinanceEntry.date >= start, FinanceEntry.date <= end)).all()
+        learnings = db.query(LearningEntry).options(joinedload(LearningEntry.skill)).filter(
+            and_(LearningEntry.date >= start, LearningEntry.date <= end)
+        ).all()
+
+        groups = {}
+        for e in emotions:
+            groups.setdefault(e.date.isoformat(), {"emotions": [], "finances": [], "learnings": []})["emotions"].append({
+                "id": e.id, "content": e.content, "sentiment": e.sentiment,
+                "sentiment_score": e.sentiment_score, "tags": e.tags
+            })
+        for f in finances:
+            groups.setdefault(f.date.isoformat(), {"emotions": [], "finances": [], "learnings": []})["finances"].append({
+                "id": f.id, "amount": f.amount, "category": f.category, "subcategory": f.subcategory,
+                "description": f.description, "tags": f.tags
+            })
+        for l in learnings:
+            groups.setdefault(l.date.isoformat(), {"emotions": [], "finances": [], "learnings": []})["learnings"].append({
+                "id": l.id, "topic": l.topic, "duration": l.duration, "content": l.content,
+                "skill_name": l.skill.name if l.skill else None, "tags": l.tags
+            })
+        return json.dumps({"start_date": str(start), "end_date": str(end), "data": groups}, ensure_ascii=False).encode()
+    finally:
+        db.close()
+
+
+def streamed(start: date, end: date, fields=None, summary_only: bool = False) -> int:
+    """新实现：逐块消费流式输出，只统计字节数，模拟发送给客户端"""
+    total = 0
+    for chunk in daily_data.stream_json(str(start), str(end), start, end, fields=fields, summary_only=summary_only):
+        total += len(chunk)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="data-by-date 基准测试")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    parser.add_argument("--output", help="结果JSON的写入路径")
+    args = parser.parse_args()
+
+    dataset = synthetic.generate(args.years, seed=args.seed)
+    start, end = dataset["start"], dataset["end"]
+    projection = daily_data.resolve_fields(["finances.amount", "finances.subcategory", "learnings.duration", "sentiment_score"])
+
+    results = [
+        measure("legacy_orm", lambda: legacy_orm(start, end), args.repeat, warmup=0),
+        measure("core_stream_all_fields", lambda: streamed(start, end), args.repeat, warmup=0),
+        measure("core_stream_projection", lambda: streamed(start, end, fields=projection), args.repeat, warmup=0),
+        measure("core_stream_summary_only", lambda: streamed(start, end, summary_only=True), args.repeat, warmup=0),
+    ]
+
+    report = build_report("data_by_date", {"years": args.years, "seed": args.seed, "repeat": args.repeat}, results)
+    if args.json:
+        write_json(report, "-")
+        return
+    write_json(report, args.output)
+    print_table(f"data-by-date, {args.years}年数据", results)
+
+
+if __name__ == "__main__":
+    main()
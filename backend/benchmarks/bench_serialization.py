@@ -0,0 +1,113 @@
+"""
+列表接口序列化的基准测试
+
+对比FAST_SERIALIZATION_ENABLED开启和关闭时各列表接口的耗时和每秒输出的行数，
+关闭时走FastAPI默认的逐行Pydantic校验加标准库编码；
+并对比JSON、Arrow和列式MessagePack三种响应格式的大小和客户端解析耗时（需安装pyarrow和msgpack）。
+
+用法（在backend目录下）:
+    python -m benchmarks.bench_serialization --years 3 --limit 1000
+    python -m benchmarks.bench_serialization --output serialization.json
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from datetime import date
+
+from benchmarks.common import prepare_environment, measure, build_report, write_json
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="列表接口序列化基准测试")
+    parser.add_argument("--years", type=float, default=3, help="模拟数据的年数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", default="2025-12-31")
+    parser.add_argument("--limit", type=int, default=1000, help="每页的记录数")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="结果JSON的写入路径，-表示输出到标准输出")
+    return parser.parse_args()
+
+
+def format_cases(client, limit: int, repeat: int):
+    """各响应格式的请求耗时、响应大小和客户端解析耗时，缺少依赖的格式跳过"""
+    from app.core import columnar
+
+    parsers = {"json": ("application/json", json.loads)}
+    if columnar.pa is not None:
+        pa = columnar.pa
+        parsers["arrow"] = (columnar.ARROW_MEDIA_TYPE, lambda body: pa.ipc.open_stream(body).read_all())
+    if columnar.msgpack is not None:
+        parsers["msgpack"] = (columnar.MSGPACK_MEDIA_TYPE, columnar.msgpack.unpackb)
+
+    results = []
+    for resource in ("finances", "emotions", "learnings"):
+        for name, (media_type, parse) in parsers.items():
+            def call():
+                response = client.get(f"/api/{resource}/", params={"limit": limit}, headers={"Accept": media_type})
+                response.raise_for_status()
+                return response.content
+
+            result = measure(f"format_{resource}_{name}", call, repeat, memory=False)
+            body = call()
+            timings = []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                parse(body)
+                timings.append(time.perf_counter() - began)
+            result["parse_ms"] = round(sorted(timings)[len(timings) // 2] * 1000, 2)
+            results.append(result)
+    return results
+
+
+def main():
+    args = parse_args()
+    prepare_environment("bench_serialization")
+
+    from fastapi.testclient import TestClient
+    with contextlib.redirect_stdout(sys.stderr):
+        from app.main import app
+    from app.core.config import settings
+    from benchmarks import synthetic
+
+    synthetic.generate(args.years, seed=args.seed, end=date.fromisoformat(args.end))
+    client = TestClient(app)
+
+    listing = []
+    for resource in ("finances", "emotions", "learnings", "skills"):
+        rows = len(client.get(f"/api/{resource}/", params={"limit": args.limit}).json())
+
+        def call():
+            response = client.get(f"/api/{resource}/", params={"limit": args.limit})
+            response.raise_for_status()
+            return len(response.content)
+
+        for fast in (False, True):
+            settings.FAST_SERIALIZATION_ENABLED = fast
+            result = measure(f"list_{resource}_{'fast' if fast else 'validated'}", call, args.repeat, memory=False)
+            result["rows"] = rows
+            result["rows_per_sec"] = round(rows / (result["median_ms"] / 1000)) if result["median_ms"] else None
+            listing.append(result)
+
+    formats = format_cases(client, args.limit, args.repeat)
+    results = listing + formats
+
+    params = {"years": args.years, "seed": args.seed, "end": args.end, "limit": args.limit, "repeat": args.repeat}
+    report = build_report("serialization", params, results)
+    write_json(report, args.output)
+    if args.output != "-":
+        print(f"列表接口序列化，limit={args.limit}")
+        print(f"{'case':<32}{'rows':>7}{'median_ms':>11}{'rows/s':>10}{'speedup':>9}")
+        for validated, fast in zip(listing[::2], listing[1::2]):
+            for row in (validated, fast):
+                speedup = f"{validated['median_ms'] / row['median_ms']:.2f}x" if row is fast else ""
+                print(f"{row['case']:<32}{row['rows']:>7}{row['median_ms']:>11}{row['rows_per_sec']:>10}{speedup:>9}")
+        if formats:
+            print(f"\n{'case':<32}{'median_ms':>11}{'payload_kb':>12}{'parse_ms':>10}")
+            for row in formats:
+                print(f"{row['case']:<32}{row['median_ms']:>11}{row['payload_kb']:>12}{row['parse_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
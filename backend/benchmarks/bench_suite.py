@@ -0,0 +1,209 @@
+"""
+综合基准测试
+
+在临时数据库中生成确定性的模拟数据，通过TestClient测量列表分页、insights接口、
+分析工具和批量写入的耗时，结果可输出为JSON并与上一次的结果对比。
+
+用法（在backend目录下）:
+    python -m benchmarks.bench_suite --years 3 --output results.json
+    python -m benchmarks.bench_suite --years 3 --baseline results.json --threshold 0.2
+    python -m benchmarks.bench_suite --cases insights --repeat 10
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import sys
+from datetime import date, timedelta
+
+from benchmarks.common import prepare_environment, measure, build_report, compare, print_table, print_comparison, write_json
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="个人洞察仪表盘综合基准测试")
+    parser.add_argument("--years", type=float, default=2, help="模拟数据的年数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", default="2025-12-31", help="模拟数据的最后一天，固定后各版本数据一致")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=100, help="批量写入用例每次写入的记录数")
+    parser.add_argument("--cases", nargs="*", help="只运行名称包含这些关键词的用例")
+    parser.add_argument("--cache", action="store_true", help="开启响应缓存（默认关闭以测量实际处理耗时）")
+    parser.add_argument("--output", help="结果JSON的写入路径，-表示输出到标准输出")
+    parser.add_argument("--baseline", help="用于对比的上一次结果JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="中位数耗时变慢超过该比例视为退化")
+    return parser.parse_args()
+
+
+def read_cases(client, start: date, end: date, counts):
+    """只读用例：(名称, 无参函数)，函数返回响应字节数；counts为各资源的记录数，用于定位中间页"""
+    year_ago = max(start, end - timedelta(days=364))
+    month_ago = max(start, end - timedelta(days=29))
+
+    def get(path, **params):
+        def call():
+            response = client.get(path, params=params)
+            response.raise_for_status()
+            return len(response.content)
+        return call
+
+    cases = []
+    for resource in ("emotions", "finances", "learnings", "skills"):
+        cases.append((f"list_{resource}_first_page", get(f"/api/{resource}/", skip=0, limit=100)))
+        cases.append((f"list_{resource}_deep_page", get(f"/api/{resource}/", skip=counts[resource] // 2, limit=100)))
+    cases.append(("list_finances_filtered", get(
+        "/api/finances/", start_date=str(year_ago), end_date=str(end), category="expense", limit=100
+    )))
+
+    cases += [
+        ("insights_data_by_date_month", get("/api/insights/data-by-date", start_date=str(month_ago), end_date=str(end))),
+        ("insights_data_by_date_year_summary", get(
+            "/api/insights/data-by-date", start_date=str(year_ago), end_date=str(end), summary_only=True
+        )),
+        ("insights_learning_skill_stats", get("/api/insights/learning-skill-stats")),
+        ("insights_learning_skill_stats_window", get(
+            "/api/insights/learning-skill-stats", start_date=str(year_ago), end_date=str(end)
+        )),
+        ("insights_series_year_by_day", get(
+            "/api/insights/series", start_date=str(year_ago), end_date=str(end), bucket="day"
+        )),
+        ("insights_series_all_by_week", get(
+            "/api/insights/series", start_date=str(start), end_date=str(end), bucket="week", points=200
+        )),
+        ("insights_correlations_year", get(
+            "/api/insights/correlations", start_date=str(year_ago), end_date=str(end)
+        )),
+        ("insights_skills_with_learnings", get("/api/insights/skills-with-learnings/1")),
+        ("insights_recurring", get("/api/insights/recurring")),
+        ("insights_cashflow_upcoming", get("/api/insights/cashflow/upcoming")),
+        ("search_text", get("/api/search/text", q="工作压力")),
+        ("budgets_status", get("/api/finances/budgets/status")),
+    ]
+    return cases
+
+
+def tool_cases(start: date, end: date):
+    """分析工具用例：直接调用LangChain工具，不经过HTTP"""
+    from app.services.ai.tools.finance_tools import analyze_finance
+    from app.services.ai.tools.learning_tools import analyze_learning
+
+    year_ago = max(start, end - timedelta(days=364))
+    params = {"start_date": str(year_ago), "end_date": str(end)}
+
+    def invoke(tool):
+        def call():
+            result = tool.invoke(params)
+            if not result.get("success"):
+                raise RuntimeError(result.get("message"))
+            return len(json.dumps(result, ensure_ascii=False, default=str))
+        return call
+
+    return [
+        ("tool_analyze_finance_year", invoke(analyze_finance)),
+        ("tool_analyze_learning_year", invoke(analyze_learning)),
+    ]
+
+
+def write_cases(client, end: date, batch: int, skill_ids):
+    """批量写入用例：每次调用逐条POST batch条记录，经过完整的CRUD派生维护"""
+    counter = itertools.count()
+
+    def post_many(path, make):
+        def call():
+            for _ in range(batch):
+                response = client.post(path, json=make(next(counter)))
+                response.raise_for_status()
+        return call
+
+    def finance(i):
+        return {
+            "amount": -round(20 + (i * 37) % 180, 2),
+            "category": "expense",
+            "subcategory": ("food", "transport", "shopping")[i % 3],
+            "description": "基准写入",
+            "date": str(end - timedelta(days=i % 60)),
+            "tags": ["bench"],
+        }
+
+    def learning(i):
+        return {
+            "topic": "基准写入",
+            "duration": 15 + (i * 7) % 90,
+            "content": "基准写入的学习记录",
+            "date": str(end - timedelta(days=i % 60)),
+            "tags": ["bench"],
+            "skill_id": skill_ids[i % len(skill_ids)],
+        }
+
+    def emotion(i):
+        return {
+            "content": "基准写入的情绪记录",
+            "date": str(end - timedelta(days=i % 60)),
+            "tags": ["bench"],
+        }
+
+    return [
+        (f"write_finances_x{batch}", post_many("/api/finances/", finance)),
+        (f"write_learnings_x{batch}", post_many("/api/learnings/", learning)),
+        (f"write_emotions_x{batch}", post_many("/api/emotions/", emotion)),
+    ]
+
+
+def main():
+    args = parse_args()
+    prepare_environment("bench_suite", cache=args.cache)
+
+    from fastapi.testclient import TestClient
+    # 应用启动时的提示输出到标准错误，避免混入JSON结果
+    with contextlib.redirect_stdout(sys.stderr):
+        from app.main import app
+    from benchmarks import synthetic
+
+    end = date.fromisoformat(args.end)
+    dataset = synthetic.generate(args.years, seed=args.seed, end=end)
+    client = TestClient(app)
+    counts = {
+        "emotions": dataset["emotions"],
+        "finances": dataset["finances"],
+        "learnings": dataset["learnings"],
+        "skills": len(dataset["skill_ids"]),
+    }
+
+    groups = [
+        (read_cases(client, dataset["start"], end, counts), args.repeat),
+        (tool_cases(dataset["start"], end), args.repeat),
+        # 写入用例会改变数据，放在最后，且只重复较少次数
+        (write_cases(client, end, args.batch, dataset["skill_ids"]), max(1, args.repeat // 2)),
+    ]
+
+    results = []
+    for cases, repeat in groups:
+        for name, func in cases:
+            if args.cases and not any(keyword in name for keyword in args.cases):
+                continue
+            results.append(measure(name, func, repeat, warmup=0 if name.startswith("write_") else 1, memory=False))
+
+    params = {
+        "years": args.years,
+        "seed": args.seed,
+        "end": args.end,
+        "repeat": args.repeat,
+        "batch": args.batch,
+        "cache": args.cache,
+        "rows": {key: dataset[key] for key in ("emotions", "finances", "learnings")},
+    }
+    report = build_report("suite", params, results)
+    write_json(report, args.output)
+    if args.output != "-":
+        print_table(f"综合基准测试，{args.years}年模拟数据 {params['rows']}", results)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(report, json.load(f), args.threshold)
+        if args.output != "-":
+            print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
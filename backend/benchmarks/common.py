@@ -0,0 +1,156 @@
+"""
+基准测试的公共部分：临时数据库、计时和结果输出
+
+prepare_environment必须在导入app之前调用，否则app会连接默认数据库。
+"""
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def prepare_environment(prefix: str, cache: bool = False) -> str:
+    """
+    使用临时目录中的SQLite数据库，关闭语义索引，默认关闭响应缓存以测量实际的处理耗时
+
+    Returns:
+        临时目录，进程退出时删除
+    """
+    tmp_dir = tempfile.mkdtemp(prefix=f"{prefix}_")
+    atexit.register(shutil.rmtree, tmp_dir, ignore_errors=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    os.environ.setdefault("SEMANTIC_SEARCH_ENABLED", "false")
+    os.environ.setdefault("RESPONSE_CACHE_ENABLED", "true" if cache else "false")
+    os.environ.setdefault("LLM_TELEMETRY_ENABLED", "false")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return tmp_dir
+
+
+def measure(name: str, func: Callable[[], Any], repeat: int, warmup: int = 1, memory: bool = True) -> Dict[str, Any]:
+    """
+    多次执行func并统计耗时；func返回bytes或整数时记录为负载大小
+
+    Returns:
+        最小、均值、中位数耗时（毫秒），内存峰值（MB）和负载大小（KB）
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    result = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - began)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if isinstance(result, (bytes, str)):
+        size = len(result)
+    elif isinstance(result, int):
+        size = result
+    else:
+        size = None
+
+    return {
+        "case": name,
+        "repeat": repeat,
+        "best_ms": round(min(timings) * 1000, 2),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "peak_mem_mb": round(peak / 1024 / 1024, 2) if peak is not None else None,
+        "payload_kb": round(size / 1024, 1) if size is not None else None,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(benchmark: str, params: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """带上版本和运行环境的结果，便于不同版本之间对比"""
+    return {
+        "benchmark": benchmark,
+        "git_revision": _git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    按用例名对比两次结果的中位数耗时
+
+    Args:
+        threshold: 变慢超过该比例（如0.2表示20%）视为退化
+
+    Returns:
+        每个用例的基线耗时、当前耗时、变化比例和是否退化
+    """
+    previous = {row["case"]: row for row in baseline.get("results", [])}
+    rows = []
+    for row in report["results"]:
+        before = previous.get(row["case"])
+        if before is None or not before.get("median_ms"):
+            continue
+        change = row["median_ms"] / before["median_ms"] - 1
+        rows.append({
+            "case": row["case"],
+            "baseline_ms": before["median_ms"],
+            "current_ms": row["median_ms"],
+            "change": round(change, 4),
+            "regression": change > threshold,
+        })
+    return rows
+
+
+def print_table(title: str, results: List[Dict[str, Any]]) -> None:
+    print(title)
+    print(f"{'case':<40}{'best_ms':>10}{'median_ms':>11}{'peak_mb':>10}{'payload_kb':>12}")
+    for row in results:
+        print(
+            f"{row['case']:<40}{row['best_ms']:>10}{row['median_ms']:>11}"
+            f"{str(row['peak_mem_mb']):>10}{str(row['payload_kb']):>12}"
+        )
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'case':<40}{'baseline_ms':>13}{'current_ms':>12}{'change':>9}")
+    for row in rows:
+        flag = "  退化" if row["regression"] else ""
+        print(f"{row['case']:<40}{row['baseline_ms']:>13}{row['current_ms']:>12}{row['change']:>+9.1%}{flag}")
+
+
+def write_json(report: Dict[str, Any], path: Optional[str]) -> None:
+    """写入文件；path为"-"时输出到标准输出"""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if path == "-":
+        print(text)
+    elif path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
@@ -0,0 +1,209 @@
+"""
+OpenAI兼容的本地模拟大模型服务，用于在没有API密钥和网络时压测agent接口
+
+支持配置首token延迟、生成速度、流式分块大小、错误注入和工具调用响应。
+
+用法（在backend目录下）:
+    python -m benchmarks.fake_llm --port 9000 --latency-ms 300 --tokens-per-second 60
+    LLM_BASE_URL=http://127.0.0.1:9000/v1 uvicorn app.main:app --port 8000
+
+单个请求可以用请求头覆盖配置，如X-Fake-Latency-Ms、X-Fake-Error-Rate。
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, fields, replace
+from typing import Any, AsyncGenerator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 生成回复用的字，每个字计为一个token
+VOCABULARY = "根据你的记录最近一周情绪整体平稳支出略高于预算学习时间有所增加建议保持规律作息并适当复盘"
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 200.0  # 首token前的延迟
+    jitter_ms: float = 50.0  # 延迟的随机波动
+    tokens_per_second: float = 50.0  # 生成速度，0表示不限速
+    completion_tokens: int = 80  # 每次回复的token数
+    chunk_tokens: int = 1  # 流式响应每个分块包含的token数
+    error_rate: float = 0.0  # 返回错误的概率
+    error_status: int = 500  # 注入错误的状态码，429时附带Retry-After
+    tool_call_rate: float = 0.0  # 请求带tools时返回工具调用的概率
+    seed: int = 0
+
+    def override(self, headers) -> "FakeConfig":
+        """按X-Fake-*请求头覆盖单个请求的配置"""
+        changes = {}
+        for item in fields(self):
+            value = headers.get("x-fake-" + item.name.replace("_", "-"))
+            if value is not None:
+                changes[item.name] = type(getattr(self, item.name))(value)
+        return replace(self, **changes) if changes else self
+
+
+def _count_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    """粗略估算：中文按字、英文按4个字符计一个token"""
+    total = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        ascii_chars = sum(1 for char in content if ord(char) < 128)
+        total += (len(content) - ascii_chars) + ascii_chars // 4 + 4
+    return total
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    rng = random.Random(config.seed)
+    # active_streams为正在发送的流，aborted_streams为客户端在结束前断开的流
+    stats = {
+        "requests": 0, "errors": 0, "tool_calls": 0, "streams": 0,
+        "active_streams": 0, "max_active_streams": 0, "aborted_streams": 0,
+    }
+
+    def completion_text(n: int) -> List[str]:
+        return [VOCABULARY[(rng.randrange(len(VOCABULARY)))] for _ in range(n)]
+
+    async def first_token_delay(cfg: FakeConfig) -> None:
+        delay = max(cfg.latency_ms + rng.uniform(-cfg.jitter_ms, cfg.jitter_ms), 0) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+    def error_response(cfg: FakeConfig) -> JSONResponse:
+        stats["errors"] += 1
+        headers = {"Retry-After": "1"} if cfg.error_status == 429 else None
+        return JSONResponse(
+            status_code=cfg.error_status,
+            content={"error": {"message": "injected error", "type": "fake_error", "code": cfg.error_status}},
+            headers=headers
+        )
+
+    def tool_call(body: Dict[str, Any]) -> Dict[str, Any]:
+        tool = rng.choice(body["tools"])["function"]
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": tool["name"], "arguments": "{}"},
+        }
+
+    @app.get("/v1/models")
+    def list_models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "fake"}]}
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        cfg = config.override(request.headers)
+        stats["requests"] += 1
+        model = body.get("model", "fake-model")
+        prompt_tokens = _count_prompt_tokens(body.get("messages", []))
+
+        if rng.random() < cfg.error_rate:
+            await first_token_delay(cfg)
+            return error_response(cfg)
+
+        call = tool_call(body) if body.get("tools") and rng.random() < cfg.tool_call_rate else None
+        if call:
+            stats["tool_calls"] += 1
+        tokens = [] if call else completion_text(cfg.completion_tokens)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await first_token_delay(cfg)
+            if cfg.tokens_per_second > 0:
+                await asyncio.sleep(len(tokens) / cfg.tokens_per_second)
+            message: Dict[str, Any] = {"role": "assistant", "content": None if call else "".join(tokens)}
+            if call:
+                message["tool_calls"] = [call]
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if call else "stop"}],
+                "usage": usage,
+            }
+
+        stats["streams"] += 1
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events() -> AsyncGenerator[str, None]:
+            stats["active_streams"] += 1
+            stats["max_active_streams"] = max(stats["max_active_streams"], stats["active_streams"])
+            completed = False
+            try:
+                await first_token_delay(cfg)
+                yield chunk({"role": "assistant", "content": ""})
+                if call:
+                    yield chunk({"tool_calls": [{"index": 0, **call}]})
+                    yield chunk({}, "tool_calls")
+                else:
+                    size = max(cfg.chunk_tokens, 1)
+                    for i in range(0, len(tokens), size):
+                        if i and cfg.tokens_per_second > 0:
+                            await asyncio.sleep(size / cfg.tokens_per_second)
+                        yield chunk({"content": "".join(tokens[i:i + size])})
+                    yield chunk({}, "stop")
+                if include_usage:
+                    payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                               "model": model, "choices": [], "usage": usage}
+                    yield f"data: {json.dumps(payload)}\n\n"
+                yield "data: [DONE]\n\n"
+                completed = True
+            finally:
+                stats["active_streams"] -= 1
+                if not completed:
+                    stats["aborted_streams"] += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI兼容的模拟大模型服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    defaults = FakeConfig()
+    for item in fields(FakeConfig):
+        parser.add_argument(
+            "--" + item.name.replace("_", "-"),
+            type=type(getattr(defaults, item.name)),
+            default=getattr(defaults, item.name)
+        )
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeConfig(**{item.name: getattr(args, item.name) for item in fields(FakeConfig)})
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+agent对话接口的压测
+
+模拟多个并发会话，每个会话连续进行多轮对话（带上之前的聊天历史），
+统计/api/agent/chat和/api/agent/chat/stream的吞吐量、延迟分位数，
+以及流式接口的首字节时间（TTFB）和首个数据块时间。
+
+需要先启动模拟大模型服务和后端（在backend目录下）:
+    python -m benchmarks.fake_llm --port 9000
+    LLM_BASE_URL=http://127.0.0.1:9000/v1 uvicorn app.main:app --port 8000
+    python -m benchmarks.load_agent --concurrency 20 --sessions 100 --fake-url http://127.0.0.1:9000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import build_report, write_json
+
+QUESTIONS = [
+    "帮我看看最近一周的情绪变化",
+    "这个月的支出超预算了吗",
+    "我最近在学什么，进度怎么样",
+    "给我一些改善作息的建议",
+]
+# 模拟服务统计中的瞬时值
+FAKE_GAUGES = ("active_streams", "max_active_streams")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="agent对话接口压测")
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="后端地址")
+    parser.add_argument("--endpoint", choices=["chat", "stream", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=10, help="同时进行的会话数")
+    parser.add_argument("--sessions", type=int, default=50, help="每个接口的会话总数")
+    parser.add_argument("--turns", type=int, default=3, help="每个会话的对话轮数")
+    parser.add_argument("--model-name", default="gpt-fake")
+    parser.add_argument("--api-key", default="fake-key", help="为空时后端走不调用模型的简化响应")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--fake-url", help="模拟大模型服务地址，用于汇总其收到的请求和注入的错误")
+    parser.add_argument("--output", help="结果JSON的写入路径，-表示输出到标准输出")
+    return parser.parse_args()
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(round(q * (len(values) - 1))), len(values) - 1)] * 1000, 2)
+
+
+async def _chat_turn(client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+    began = time.perf_counter()
+    response = await client.post("/api/agent/chat", json=payload)
+    elapsed = time.perf_counter() - began
+    if response.status_code != 200:
+        return {"ok": False, "status": response.status_code, "latency": elapsed}
+    body = response.json()
+    return {"ok": True, "status": 200, "latency": elapsed, "history": body["chat_history"]}
+
+
+async def _stream_turn(client: httpx.AsyncClient, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """首字节时间按收到的第一段响应体计，首块时间按第一个带chunk的SSE事件计"""
+    began = time.perf_counter()
+    ttfb = first_chunk = None
+    history = None
+    chunks = 0
+    buffer = ""
+    async with client.stream("POST", "/api/agent/chat/stream", json=payload) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return {"ok": False, "status": response.status_code, "latency": time.perf_counter() - began}
+        async for text in response.aiter_text():
+            if ttfb is None:
+                ttfb = time.perf_counter() - began
+            buffer += text
+            while "\n\n" in buffer:
+                event, buffer = buffer.split("\n\n", 1)
+                if not event.startswith("data: "):
+                    continue
+                data = json.loads(event[len("data: "):])
+                if data.get("error"):
+                    return {"ok": False, "status": "stream_error", "latency": time.perf_counter() - began}
+                if data.get("chunk"):
+                    chunks += 1
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - began
+                if data.get("done"):
+                    history = data.get("chat_history")
+    return {
+        "ok": history is not None,
+        "status": 200 if history is not None else "incomplete",
+        "latency": time.perf_counter() - began,
+        "ttfb": ttfb,
+        "first_chunk": first_chunk,
+        "chunks": chunks,
+        "history": history,
+    }
+
+
+async def _run(args, endpoint: str) -> Dict[str, Any]:
+    turn = _chat_turn if endpoint == "chat" else _stream_turn
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results: List[Dict[str, Any]] = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        async def session(index: int):
+            async with semaphore:
+                history: List[Dict[str, Any]] = []
+                for number in range(args.turns):
+                    payload = {
+                        "input": QUESTIONS[(index + number) % len(QUESTIONS)],
+                        "chat_history": history,
+                        "model": "openai",
+                        "model_name": args.model_name,
+                        "api_key": args.api_key or None,
+                    }
+                    try:
+                        result = await turn(client, payload)
+                    except httpx.HTTPError as e:
+                        result = {"ok": False, "status": type(e).__name__, "latency": 0.0}
+                    results.append(result)
+                    if not result["ok"]:
+                        break
+                    history = result["history"]
+
+        began = time.perf_counter()
+        await asyncio.gather(*(session(index) for index in range(args.sessions)))
+        wall = time.perf_counter() - began
+
+    ok = [result for result in results if result["ok"]]
+    latency = [result["latency"] for result in ok]
+    errors: Dict[str, int] = {}
+    for result in results:
+        if not result["ok"]:
+            errors[str(result["status"])] = errors.get(str(result["status"]), 0) + 1
+
+    summary = {
+        "case": f"agent_{endpoint}",
+        "requests": len(results),
+        "succeeded": len(ok),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 2) if wall else None,
+        "latency_ms_mean": round(statistics.fmean(latency) * 1000, 2) if latency else None,
+        "latency_ms_p50": _percentile(latency, 0.5),
+        "latency_ms_p99": _percentile(latency, 0.99),
+    }
+    if endpoint == "stream":
+        ttfb = [result["ttfb"] for result in ok if result.get("ttfb") is not None]
+        first_chunk = [result["first_chunk"] for result in ok if result.get("first_chunk") is not None]
+        summary.update({
+            "ttfb_ms_p50": _percentile(ttfb, 0.5),
+            "ttfb_ms_p99": _percentile(ttfb, 0.99),
+            "first_chunk_ms_p50": _percentile(first_chunk, 0.5),
+            "first_chunk_ms_p99": _percentile(first_chunk, 0.99),
+            "chunks_mean": round(statistics.fmean(result["chunks"] for result in ok), 1) if ok else None,
+        })
+    return summary
+
+
+def print_summary(results: List[Dict[str, Any]]) -> None:
+    print(f"{'case':<14}{'ok/total':>12}{'rps':>9}{'p50_ms':>10}{'p99_ms':>10}{'ttfb_p50':>10}{'ttfb_p99':>10}")
+    for row in results:
+        print(
+            f"{row['case']:<14}{str(row['succeeded']) + '/' + str(row['requests']):>12}{str(row['throughput_rps']):>9}"
+            f"{str(row['latency_ms_p50']):>10}{str(row['latency_ms_p99']):>10}"
+            f"{str(row.get('ttfb_ms_p50', '-')):>10}{str(row.get('ttfb_ms_p99', '-')):>10}"
+        )
+        if row["errors"]:
+            print(f"  errors: {row['errors']}")
+
+
+async def _fake_stats(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=5) as client:
+            response = await client.get("/stats")
+            return response.json()
+    except httpx.HTTPError:
+        return None
+
+
+async def main_async(args) -> Dict[str, Any]:
+    endpoints = ["chat", "stream"] if args.endpoint == "both" else [args.endpoint]
+    before = await _fake_stats(args.fake_url) if args.fake_url else None
+    results = [await _run(args, endpoint) for endpoint in endpoints]
+
+    params = {
+        "target": args.target,
+        "concurrency": args.concurrency,
+        "sessions": args.sessions,
+        "turns": args.turns,
+        "model_name": args.model_name,
+    }
+    if before is not None:
+        after = await _fake_stats(args.fake_url)
+        # 后端在模型调用失败时会回退到简化响应且仍返回200，注入的错误只能从模拟服务一侧统计
+        # 并发流数是瞬时值和模拟服务启动以来的峰值，不做差
+        params["fake_llm"] = {
+            key: after[key] if key in FAKE_GAUGES else after[key] - before.get(key, 0) for key in after
+        } if after else None
+    return build_report("agent_load", params, results)
+
+
+def main():
+    args = parse_args()
+    report = asyncio.run(main_async(args))
+    write_json(report, args.output)
+    if args.output != "-":
+        print_summary(report["results"])
+        if report["params"].get("fake_llm"):
+            print(f"fake_llm: {report['params']['fake_llm']}")
+
+
+if __name__ == "__main__":
+    main()
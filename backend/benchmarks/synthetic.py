@@ -0,0 +1,206 @@
+"""
+确定性的模拟数据生成器
+
+同样的参数和种子总是生成完全相同的数据，不同版本之间的基准结果才可比较。
+分布尽量贴近真实使用：
+- 情绪：按天的AR(1)情绪基线加周末偏移和噪声，每天0-3条
+- 财务：每月工资和房租、固定订阅，餐饮/交通等日常支出为对数正态分布，偶有大额消费
+- 技能：带前置关系的几组技能
+- 学习：周末概率更高，技能按Zipf分布选择，时长为对数正态分布
+
+必须先调用common.prepare_environment再导入本模块。
+"""
+import math
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app import crud
+from app.core.database import Base, SessionLocal, engine
+from app.models.data import EmotionEntry, FinanceEntry, LearningEntry, SkillEntry
+from app.models.skill_graph import SkillEdge
+from app.services import rollups, finance_anomaly, budgets, recurring, skill_progress
+from app.services.skill_names import normalize_name
+
+# 技能组：每组内按顺序依次为后一个技能的前置
+SKILL_CHAINS = [
+    ("编程", ["Python", "Django", "FastAPI", "异步编程"]),
+    ("编程", ["JavaScript", "TypeScript", "React", "Next.js"]),
+    ("数据", ["统计学", "机器学习", "深度学习"]),
+    ("数据", ["SQL", "数据建模"]),
+    ("语言", ["英语阅读", "英语写作"]),
+    ("生活", ["烹饪"]),
+]
+
+EMOTION_PHRASES = {
+    "positive": ["今天完成了计划的工作", "和朋友吃了顿好饭", "运动后感觉很轻松", "学到了新东西很有成就感"],
+    "neutral": ["平平常常的一天", "按部就班地工作", "在家休息", "整理了房间"],
+    "negative": ["工作压力有点大", "没睡好很疲惫", "计划被打乱了", "和家人有些争执"],
+}
+EMOTION_TAGS = ["工作", "家庭", "健康", "社交", "学习"]
+
+# 日常支出：(子类别, 每天期望笔数, 对数正态的mu, sigma)
+DAILY_EXPENSES = [
+    ("food", 2.0, math.log(30), 0.5),
+    ("transport", 0.8, math.log(12), 0.6),
+    ("shopping", 0.2, math.log(150), 0.9),
+    ("entertainment", 0.15, math.log(80), 0.7),
+]
+# 固定支出和收入：(类别, 子类别, 描述, 每月几号, 金额)
+MONTHLY_ITEMS = [
+    ("income", "salary", "工资", 10, 15000.0),
+    ("expense", "rent", "房租", 1, 4500.0),
+    ("expense", "subscription", "视频会员", 15, 25.0),
+    ("expense", "subscription", "云存储", 20, 21.0),
+]
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    """Knuth算法，lam较小时足够快"""
+    threshold, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= threshold:
+            return k
+        k += 1
+
+
+def _sentiment(score: float) -> str:
+    if score > 0.2:
+        return "positive"
+    if score < -0.2:
+        return "negative"
+    return "neutral"
+
+
+def build_rows(years: float, seed: int = 42, end: Optional[date] = None, skills: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    生成各表的行（字典），不写数据库
+
+    Args:
+        years: 生成的年数，可以是小数
+        seed: 随机种子
+        end: 最后一天，默认为今天；需要完全可复现时应固定
+        skills: 学习记录可关联的技能ID，按SKILL_CHAINS展开后的顺序
+
+    Returns:
+        开始日期、结束日期和emotions/finances/learnings三组行
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    days = max(int(365 * years), 1)
+    start = end - timedelta(days=days - 1)
+    skills = skills or []
+    # Zipf权重：排在前面的技能学得更多
+    weights = [1 / (rank + 1) for rank in range(len(skills))]
+
+    emotions, finances, learnings = [], [], []
+    mood = 0.0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        weekend = day.weekday() >= 5
+
+        mood = 0.8 * mood + rng.gauss(0, 0.25)
+        for _ in range(rng.choice((0, 1, 1, 1, 2, 2, 3))):
+            score = max(-1.0, min(1.0, mood + (0.15 if weekend else 0.0) + rng.gauss(0, 0.2)))
+            label = _sentiment(score)
+            emotions.append({
+                "content": "，".join(rng.sample(EMOTION_PHRASES[label], 2)) + "。",
+                "date": day,
+                "tags": rng.sample(EMOTION_TAGS, rng.randint(0, 2)),
+                "sentiment": label,
+                "sentiment_score": round(score, 4),
+            })
+
+        for category, subcategory, description, day_of_month, amount in MONTHLY_ITEMS:
+            if day.day == day_of_month:
+                finances.append({
+                    "amount": amount if category == "income" else -amount,
+                    "category": category,
+                    "subcategory": subcategory,
+                    "description": description,
+                    "date": day,
+                    "tags": ["固定"],
+                })
+        for subcategory, rate, mu, sigma in DAILY_EXPENSES:
+            for _ in range(_poisson(rng, rate * (1.3 if weekend else 1.0))):
+                amount = rng.lognormvariate(mu, sigma)
+                # 少量异常大额
+                if rng.random() < 0.005:
+                    amount *= rng.uniform(8, 20)
+                finances.append({
+                    "amount": -round(amount, 2),
+                    "category": "expense",
+                    "subcategory": subcategory,
+                    "description": f"{subcategory}消费",
+                    "date": day,
+                    "tags": [],
+                })
+
+        if skills and rng.random() < (0.75 if weekend else 0.5):
+            for _ in range(rng.randint(1, 2)):
+                skill_id = rng.choices(skills, weights)[0]
+                learnings.append({
+                    "topic": "学习笔记",
+                    "duration": int(max(10, min(240, rng.lognormvariate(math.log(45), 0.5)))),
+                    "content": "今天学习的要点：" + "、".join(rng.sample(["概念", "练习", "项目", "复习", "阅读"], 3)),
+                    "date": day,
+                    "tags": ["study"],
+                    "skill_id": skill_id,
+                })
+
+    return {"start": start, "end": end, "emotions": emotions, "finances": finances, "learnings": learnings}
+
+
+def generate(years: float, seed: int = 42, end: Optional[date] = None) -> Dict[str, Any]:
+    """
+    在当前数据库中生成模拟数据并重建所有派生表
+
+    批量写入绕过CRUD的逐条维护，写完后统一重建标签索引、预聚合、财务统计和技能进度，
+    结果与逐条写入一致。
+
+    Returns:
+        开始日期、结束日期、各表行数和技能ID
+    """
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        skill_ids = []
+        for category, chain in SKILL_CHAINS:
+            previous = None
+            for name in chain:
+                skill = SkillEntry(name=name, name_key=normalize_name(name), category=category, description=f"{name}相关的技能")
+                db.add(skill)
+                db.flush()
+                skill_ids.append(skill.id)
+                if previous is not None:
+                    db.add(SkillEdge(source_id=previous, target_id=skill.id, kind="prerequisite"))
+                previous = skill.id
+        db.commit()
+
+        rows = build_rows(years, seed=seed, end=end, skills=skill_ids)
+        for model, key in ((EmotionEntry, "emotions"), (FinanceEntry, "finances"), (LearningEntry, "learnings")):
+            if rows[key]:
+                db.execute(insert(model), rows[key])
+        db.commit()
+
+        crud.tag.rebuild_index(db)
+        rollups.rebuild(db)
+        finance_anomaly.rebuild(db)
+        budgets.rebuild(db)
+        recurring.rebuild(db)
+        crud.skill_graph.rebuild(db)
+        skill_progress.rebuild(db)
+    finally:
+        db.close()
+
+    return {
+        "start": rows["start"],
+        "end": rows["end"],
+        "emotions": len(rows["emotions"]),
+        "finances": len(rows["finances"]),
+        "learnings": len(rows["learnings"]),
+        "skill_ids": skill_ids,
+    }
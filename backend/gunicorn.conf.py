@@ -0,0 +1,43 @@
+"""
+生产环境的多进程启动配置
+
+用法（在backend目录下）:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+- worker数默认等于CPU核数，可用环境变量WEB_CONCURRENCY覆盖
+- preload_app：主进程导入应用，建表、回填和建索引只执行一次，worker由主进程fork得到
+- 平滑重启：kill -HUP <主进程PID>会在graceful_timeout内逐个替换worker；preload时HUP不会重新加载代码，
+  升级代码时先kill -USR2 <主进程PID>启动新的主进程，再向旧主进程发送QUIT
+- 各worker通过SHARED_STATE_DIR共享写入版本号和预算通知，任一worker写入后其他worker不会返回旧的缓存；
+  内存响应缓存、/metrics指标和性能剖析结果仍按worker各自保存
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import settings
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 0)) or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = 30
+keepalive = 5
+
+# 未配置时使用按主进程PID命名的临时目录；HUP重新读取本文件时settings已设置，目录保持不变
+if not settings.SHARED_STATE_DIR:
+    settings.SHARED_STATE_DIR = os.path.join(tempfile.gettempdir(), f"insight-dashboard-{os.getpid()}")
+
+
+def post_fork(server, worker):
+    # preload时主进程的连接池里已有连接，SQLite连接不能跨进程使用，子进程丢弃后重新建立
+    from app.core.database import engine
+    engine.dispose(close=False)
+
+    # 线程不会随fork复制，主进程中启动的持续采样器需要在worker里重新启动
+    from app.core.profiling import profiler
+    if profiler.sampling:
+        profiler.start()
@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+import pytest
+
+# 测试使用独立的临时数据库，必须在导入app之前设置
+_db_dir = tempfile.mkdtemp(prefix="insight-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["SEMANTIC_SEARCH_ENABLED"] = "false"
+os.environ["PROFILING_ENABLED"] = "false"
+
+from app.main import app  # noqa: E402  创建数据表、FTS索引和触发器
+from app.core.cache import write_versions  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """每个测试使用新的会话，结束后清空所有表，并使缓存的响应失效"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+        write_versions.bump(*Base.metadata.tables)
@@ -0,0 +1,163 @@
+import asyncio
+import json
+
+import httpx
+import openai
+import pytest
+from sqlalchemy import select
+
+from app.ai.limits import StreamLimiter, StreamRejected, stream_limiter
+from app.main import app
+from app.models.llm_call import LLMCall
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def completion_chunk(content: str) -> bytes:
+    chunk = {
+        "id": "chatcmpl-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": None}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode()
+
+
+class SlowUpstream(httpx.AsyncByteStream):
+    """先返回一个片段，之后迟迟不再生成，模拟还在输出的上游流"""
+
+    def __init__(self):
+        self.closed = False
+
+    async def __aiter__(self):
+        yield completion_chunk("你好")
+        await asyncio.sleep(30)
+        yield b"data: [DONE]\n\n"
+
+    async def aclose(self):
+        self.closed = True
+
+
+class UpstreamTransport(httpx.AsyncBaseTransport):
+    """每个请求都返回慢速的流，关闭时像连接池一样断开仍未读完的响应"""
+
+    def __init__(self):
+        self.streams = []
+
+    async def handle_async_request(self, request):
+        stream = SlowUpstream()
+        self.streams.append(stream)
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream)
+
+    async def aclose(self):
+        for stream in self.streams:
+            await stream.aclose()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """让agent创建的客户端连到慢速的上游，返回上游的连接"""
+    transport = UpstreamTransport()
+    real_client = openai.AsyncOpenAI
+
+    def fake_client(**kwargs):
+        return real_client(**kwargs, http_client=httpx.AsyncClient(transport=transport))
+
+    monkeypatch.setattr(openai, "AsyncOpenAI", fake_client)
+    return transport
+
+
+@pytest.mark.anyio
+async def test_disconnect_mid_stream_releases_slot_and_upstream(upstream, db):
+    body = json.dumps({"input": "你好", "chat_history": [], "model_name": "gpt-3.5-turbo", "api_key": "test"}).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/agent/chat/stream",
+        "raw_path": b"/api/agent/chat/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("test", 80),
+    }
+    first_chunk = asyncio.Event()
+    request_sent = False
+    sent = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # 收到第一个片段后客户端断开
+        await first_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and b'"chunk"' in message.get("body", b""):
+            first_chunk.set()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    assert sent[0]["status"] == 200
+    assert first_chunk.is_set()
+    assert stream_limiter.status().get("openai", {}).get("active", 0) == 0
+    assert len(upstream.streams) == 1 and upstream.streams[0].closed
+    assert db.execute(select(LLMCall.status, LLMCall.fallback)).all() == [("cancelled", False)]
+
+
+@pytest.mark.anyio
+async def test_limiter_queues_then_rejects_when_full():
+    limiter = StreamLimiter(max_concurrency=2, provider_concurrency=1, queue_size=1, queue_timeout=0.2)
+    first = await limiter.acquire("openai")
+    # 另一个服务商不受openai已满影响
+    other = await limiter.acquire("deepseek")
+
+    waiter = asyncio.ensure_future(limiter.acquire("openai"))
+    await asyncio.sleep(0)
+    assert limiter.status()["openai"] == {"active": 1, "queued": 1, "limit": 1}
+    with pytest.raises(StreamRejected) as rejected:
+        await limiter.acquire("openai")
+    assert rejected.value.reason == "queue_full"
+    assert rejected.value.retry_after >= 1
+
+    first.release()
+    first.release()  # 重复释放不会多还名额
+    second = await waiter
+    assert limiter.status()["openai"] == {"active": 1, "queued": 0, "limit": 1}
+
+    with pytest.raises(StreamRejected) as rejected:
+        await limiter.acquire("openai")
+    assert rejected.value.reason == "timeout"
+    assert limiter.status()["openai"]["queued"] == 0
+
+    second.release()
+    other.release()
+    assert limiter.status() == {
+        "deepseek": {"active": 0, "queued": 0, "limit": 1},
+        "openai": {"active": 0, "queued": 0, "limit": 1},
+    }
+
+
+@pytest.mark.anyio
+async def test_limiter_releases_queue_entry_when_waiter_is_cancelled():
+    limiter = StreamLimiter(max_concurrency=1, provider_concurrency=1, queue_size=4, queue_timeout=5)
+    slot = await limiter.acquire("openai")
+    waiter = asyncio.ensure_future(limiter.acquire("openai"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.status()["openai"]["queued"] == 0
+
+    slot.release()
+    assert limiter.status()["openai"]["active"] == 0
@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from app import crud
+from app.models.analysis import AnalysisResult
+from app.schemas.emotion import EmotionCreate, EmotionUpdate
+from app.services import sentiment
+from app.services.ai.tools import analyze_emotions
+
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """记录实际调用分析器的文本"""
+    texts = []
+    analyze_text = sentiment.analyze_text
+
+    def counting(text):
+        texts.append(text)
+        return analyze_text(text)
+
+    monkeypatch.setattr(sentiment, "analyze_text", counting)
+    return texts
+
+
+def create(db, content, day=1):
+    return crud.emotion.create(db, obj_in=EmotionCreate(content=content, date=date(2024, 3, day), tags=[]))
+
+
+def run():
+    result = analyze_emotions.invoke({"start_date": "2024-03-01", "end_date": "2024-03-31"})
+    assert result["success"], result
+    return result
+
+
+def cached_rows(db):
+    return db.execute(select(func.count()).select_from(AnalysisResult)).scalar()
+
+
+def test_analyze_text():
+    assert sentiment.analyze_text("今天很开心，工作也顺利")["sentiment"] == "positive"
+    assert sentiment.analyze_text("压力很大，有点焦虑")["sentiment"] == "negative"
+    negated = sentiment.analyze_text("今天不开心")
+    assert (negated["sentiment"], negated["negative_words"]) == ("negative", ["不开心"])
+    assert sentiment.analyze_text("吃了午饭")["sentiment"] == "neutral"
+
+
+def test_unchanged_entries_are_not_analyzed_again(db, analyzed):
+    happy, tired = create(db, "今天很开心", 1), create(db, "加班好累", 2)
+    first = run()
+    assert sorted(analyzed) == ["今天很开心", "加班好累"]
+    assert first["summary"]["sentiment_counts"] == {"positive": 1, "negative": 1, "neutral": 0}
+    assert cached_rows(db) == 2
+
+    analyzed.clear()
+    assert run() == first
+    assert analyzed == []
+
+    # 只改标签不影响内容哈希，缓存继续有效
+    crud.emotion.update(db, db_obj=happy, obj_in=EmotionUpdate(tags=["周末"]))
+    run()
+    assert analyzed == []
+
+    # 改了内容只重新分析这一条，旧结果被替换
+    crud.emotion.update(db, db_obj=tired, obj_in=EmotionUpdate(content="休息后很放松"))
+    result = run()
+    assert analyzed == ["休息后很放松"]
+    assert result["summary"]["sentiment_counts"] == {"positive": 2, "negative": 0, "neutral": 0}
+    assert cached_rows(db) == 2
+
+
+def test_update_and_remove_invalidate_cached_results(db, analyzed):
+    entry = create(db, "有点焦虑")
+    run()
+    assert cached_rows(db) == 1
+
+    # 更新时删除与新内容不一致的结果，不必等到下次分析
+    crud.emotion.update(db, db_obj=entry, obj_in=EmotionUpdate(content="平静下来了"))
+    assert cached_rows(db) == 0
+
+    run()
+    assert cached_rows(db) == 1
+    crud.emotion.remove(db, id=entry.id)
+    assert cached_rows(db) == 0
+
+
+def test_results_are_cached_per_model(db, analyzed, monkeypatch):
+    create(db, "很满足")
+    run()
+    monkeypatch.setattr(sentiment, "MODEL", "lexicon-v2")
+    analyzed.clear()
+    run()
+    assert analyzed == ["很满足"]
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import crud, schemas
+from app.models.finance import FinanceMonthlyTotal
+from app.services import budgets
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """收集CRUD提交后发送的预算通知"""
+    sent = []
+    monkeypatch.setattr(budgets, "notify", sent.extend)
+    return sent
+
+
+def expense(amount, day=date(2024, 5, 10), subcategory="food"):
+    return schemas.FinanceCreate(amount=amount, category="expense", subcategory=subcategory, date=day)
+
+
+def thresholds(sent):
+    return [(event["month"], event["threshold"]) for event in sent]
+
+
+def test_editing_entry_over_threshold_does_not_notify_again(db, events):
+    crud.budget.create(db, schemas.BudgetCreate(subcategory="food", monthly_limit=100, thresholds=[0.8, 1.0]))
+    entry = crud.finance.create(db, expense(120))
+    assert thresholds(events) == [("2024-05", 0.8), ("2024-05", 1.0)]
+
+    events.clear()
+    crud.finance.update(db, entry, schemas.FinanceUpdate(amount=125, description="聚餐"))
+    crud.finance.update(db, entry, schemas.FinanceUpdate(tags=["外出"]))
+    assert events == []
+
+
+def test_only_thresholds_newly_crossed_by_final_total_are_reported(db, events):
+    crud.budget.create(db, schemas.BudgetCreate(subcategory="food", monthly_limit=100, thresholds=[0.5, 0.8, 1.0]))
+    crud.finance.create(db, expense(40))
+    entry = crud.finance.create(db, expense(20))
+    assert thresholds(events) == [("2024-05", 0.5)]
+
+    events.clear()
+    crud.finance.update(db, entry, schemas.FinanceUpdate(amount=45))
+    assert thresholds(events) == [("2024-05", 0.8)]
+
+    events.clear()
+    crud.finance.update(db, entry, schemas.FinanceUpdate(amount=10))
+    assert events == []
+
+    # 改到另一个子类别：原子类别扣除，新子类别从0开始累计
+    crud.budget.create(db, schemas.BudgetCreate(subcategory="transport", monthly_limit=100, thresholds=[0.5, 0.8]))
+    events.clear()
+    crud.finance.update(db, entry, schemas.FinanceUpdate(amount=90, subcategory="transport"))
+    assert [(event["subcategory"], event["threshold"]) for event in events] == [("transport", 0.5), ("transport", 0.8)]
+
+    spent = dict(db.execute(select(FinanceMonthlyTotal.subcategory, FinanceMonthlyTotal.spent)).all())
+    assert spent == {"food": 40.0, "transport": 90.0}
@@ -0,0 +1,100 @@
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud
+from app.core.cache import response_cache, write_versions
+from app.main import app
+
+URL = "/api/emotions/"
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+def create_emotion(client, content="今天不错"):
+    response = client.post(URL, json={"content": content, "date": "2024-03-01", "tags": ["工作"]})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_hit_and_not_modified(client):
+    create_emotion(client)
+    first = client.get(URL)
+    assert first.headers["x-cache"] == "MISS"
+    etag = first.headers["etag"]
+
+    second = client.get(URL)
+    assert second.headers["x-cache"] == "HIT"
+    assert second.headers["etag"] == etag
+    assert second.json() == first.json()
+
+    not_modified = client.get(URL, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+
+def test_writes_invalidate_cached_responses(client):
+    created = create_emotion(client)
+    etag = client.get(URL).headers["etag"]
+
+    updated = client.put(f"{URL}{created['id']}", json={"content": "有点累"})
+    assert updated.status_code == 200
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "MISS"
+    assert response.headers["etag"] != etag
+    assert [item["content"] for item in response.json()] == ["有点累"]
+
+    etag = response.headers["etag"]
+    create_emotion(client, "又是新的一天")
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    etag = response.headers["etag"]
+    assert client.delete(f"{URL}{created['id']}").status_code == 200
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["content"] for item in response.json()] == ["又是新的一天"]
+
+
+def test_response_is_not_stored_when_a_write_lands_during_the_request(client, monkeypatch):
+    create_emotion(client)
+    get_multi = crud.emotion.get_multi
+
+    def get_multi_with_concurrent_write(*args, **kwargs):
+        rows = get_multi(*args, **kwargs)
+        # 查询完成、响应写入缓存之前有其他请求写入了依赖的表
+        write_versions.bump("emotion_entries")
+        return rows
+
+    monkeypatch.setattr(crud.emotion, "get_multi", get_multi_with_concurrent_write)
+    stored = len(response_cache._memory)
+    assert client.get(URL).headers["x-cache"] == "MISS"
+    # 处理期间版本变了，结果不存到请求开始时的键下
+    assert len(response_cache._memory) == stored
+
+    monkeypatch.setattr(crud.emotion, "get_multi", get_multi)
+    assert client.get(URL).headers["x-cache"] == "MISS"
+    assert len(response_cache._memory) == stored + 1
+    assert client.get(URL).headers["x-cache"] == "HIT"
+
+
+def test_cache_key_varies_with_accept(client):
+    create_emotion(client)
+    as_json = client.get(URL)
+    as_msgpack = client.get(URL, headers={"Accept": "application/vnd.msgpack"})
+    assert as_msgpack.headers["x-cache"] == "MISS"
+    assert as_msgpack.headers["content-type"].startswith("application/vnd.msgpack")
+    assert as_msgpack.headers["etag"] != as_json.headers["etag"]
+    assert "Accept" in as_msgpack.headers["vary"]
+    assert msgpack.unpackb(as_msgpack.content)
+
+    assert client.get(URL).headers["x-cache"] == "HIT"
+    again = client.get(URL, headers={"Accept": "application/vnd.msgpack"})
+    assert again.headers["x-cache"] == "HIT"
+    assert again.content == as_msgpack.content
@@ -0,0 +1,35 @@
+from starlette.applications import Starlette
+from starlette.datastructures import MutableHeaders
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, set_encoding_headers
+
+
+def test_encoding_headers_do_not_repeat_accept_encoding_in_vary():
+    headers = MutableHeaders({"Vary": "Accept, Accept-Encoding"})
+    set_encoding_headers(headers, "gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept, Accept-Encoding"
+
+
+def test_encoding_headers_add_accept_encoding_to_vary():
+    headers = MutableHeaders({"Vary": "Accept"})
+    set_encoding_headers(headers, "br")
+    assert headers["vary"] == "Accept, Accept-Encoding"
+
+    headers = MutableHeaders()
+    set_encoding_headers(headers, "br")
+    assert headers["vary"] == "Accept-Encoding"
+
+
+def test_event_streams_pass_through_uncompressed():
+    async def events():
+        for index in range(3):
+            yield f"data: {index}\n\n" + " " * 2048
+
+    inner = Starlette(routes=[Route("/events", lambda request: StreamingResponse(events(), media_type="text/event-stream"))])
+    response = TestClient(CompressionMiddleware(inner)).get("/events", headers={"Accept-Encoding": "gzip, br, zstd"})
+    assert "content-encoding" not in response.headers
+    assert response.text.startswith("data: 0\n\n")
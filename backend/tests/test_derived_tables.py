@@ -0,0 +1,155 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app import crud, schemas
+from app.models.data import FinanceEntry
+from app.models.finance import FinanceCategoryStats, FinanceMonthlyTotal
+from app.models.skill_graph import SkillEdge
+from app.services import budgets, finance_anomaly, skill_progress
+from tests.test_rollups import assert_matches_rebuild
+
+
+def monthly_totals(db):
+    """月度累计的全部非空行；增量删除可能留下count为0的行，重建时不会生成"""
+    return sorted(
+        (subcategory, month, round(spent, 6), count)
+        for subcategory, month, spent, count in db.execute(
+            select(FinanceMonthlyTotal.subcategory, FinanceMonthlyTotal.month, FinanceMonthlyTotal.spent, FinanceMonthlyTotal.count)
+        )
+        if count
+    )
+
+
+def category_stats(db):
+    """子类别统计的全部非空行，均值和平方和取6位小数避免逆向更新的浮点误差"""
+    return sorted(
+        (category, subcategory, count, round(mean, 6), round(m2, 6))
+        for category, subcategory, count, mean, m2 in db.execute(
+            select(
+                FinanceCategoryStats.category,
+                FinanceCategoryStats.subcategory,
+                FinanceCategoryStats.count,
+                FinanceCategoryStats.mean,
+                FinanceCategoryStats.m2
+            )
+        )
+        if count
+    )
+
+
+def anomaly_flags(db):
+    return db.execute(
+        select(FinanceEntry.id, FinanceEntry.is_anomaly, FinanceEntry.anomaly_score).order_by(FinanceEntry.id)
+    ).all()
+
+
+def assert_derived_tables_consistent(db):
+    """每张增量维护的派生表都与从源记录全量计算的结果一致"""
+    assert crud.skill_graph.verify(db)
+    assert skill_progress.verify(db) == []
+    assert_matches_rebuild(db)
+
+    totals = monthly_totals(db)
+    budgets.rebuild(db)
+    assert totals == monthly_totals(db)
+
+    stats = category_stats(db)
+    finance_anomaly.rebuild(db)
+    assert stats == category_stats(db)
+
+
+def test_derived_tables_match_rebuild_after_create_update_delete(db):
+    # 菱形前置关系：base → left/right → top，base到top有两条路径
+    base, left, right, top = (
+        crud.skill.create(db, schemas.SkillCreate(name=name, category="编程"))
+        for name in ("Python", "Web", "数据", "全栈")
+    )
+    crud.skill_graph.add_prerequisite(db, left.id, base.id)
+    crud.skill_graph.add_prerequisite(db, right.id, base.id)
+    crud.skill_graph.add_prerequisite(db, top.id, left.id)
+    crud.skill_graph.add_prerequisite(db, top.id, right.id)
+
+    learnings = [
+        crud.learning.create(db, schemas.LearningCreate(topic="练习", duration=duration, date=day, skill_id=skill_id))
+        for day, duration, skill_id in [
+            (date(2024, 3, 1), 30, base.id),
+            (date(2024, 3, 2), 40, left.id),
+            (date(2024, 3, 3), 50, top.id),
+            (date(2024, 3, 4), 20, None),
+        ]
+    ]
+    # 按日期顺序写入，此时写入时的异常标记也应与重放结果一致
+    expenses = [
+        crud.finance.create(db, schemas.FinanceCreate(amount=amount, category=category, subcategory=subcategory, date=day))
+        for day, amount, category, subcategory in [
+            *((date(2024, 3, day), -30.0 - day % 3, "expense", "food") for day in range(1, 10)),
+            (date(2024, 3, 20), -300.0, "expense", "food"),
+            (date(2024, 3, 25), -120.0, "expense", "transportation"),
+            (date(2024, 3, 31), 5000.0, "income", "salary"),
+        ]
+    ]
+    food, transportation, salary = expenses[1], expenses[-2], expenses[-1]
+    emotion = crud.emotion.create(db, schemas.EmotionCreate(content="还不错", date=date(2024, 3, 2)))
+    crud.emotion.update(db, emotion, schemas.EmotionUpdate(sentiment="positive", sentiment_score=0.6))
+
+    flags = anomaly_flags(db)
+    assert any(is_anomaly for _, is_anomaly, _ in flags)
+    assert_derived_tables_consistent(db)
+    assert anomaly_flags(db) == flags
+    assert crud.skill_graph.compute_closure(db)[(base.id, top.id)] == 2
+
+    # 更新：改时长、改日期、换技能、改金额、跨子类别和跨月
+    crud.learning.update(db, learnings[0], schemas.LearningUpdate(duration=60, date=date(2024, 4, 1)))
+    crud.learning.update(db, learnings[1], schemas.LearningUpdate(skill_id=right.id))
+    crud.learning.update(db, learnings[3], schemas.LearningUpdate(skill_id=top.id))
+    crud.finance.update(db, food, schemas.FinanceUpdate(amount=-45.0))
+    crud.finance.update(db, expenses[2], schemas.FinanceUpdate(subcategory="transportation", date=date(2024, 4, 2)))
+    crud.finance.update(db, salary, schemas.FinanceUpdate(category="expense", subcategory="rent", amount=-2000.0))
+    crud.emotion.update(db, emotion, schemas.EmotionUpdate(date=date(2024, 3, 3), sentiment_score=-0.2))
+    assert_derived_tables_consistent(db)
+
+    # 删除：去掉菱形的一条边、删除记录、删除带学习记录和前置关系的技能
+    crud.skill_graph.remove_prerequisite(db, top.id, right.id)
+    assert crud.skill_graph.compute_closure(db)[(base.id, top.id)] == 1
+    assert_derived_tables_consistent(db)
+
+    crud.learning.remove(db, learnings[2].id)
+    crud.finance.remove(db, transportation.id)
+    crud.finance.remove(db, expenses[2].id)
+    crud.emotion.remove(db, emotion.id)
+    crud.skill.remove(db, left.id)
+    assert_derived_tables_consistent(db)
+
+
+def related_edges(db):
+    return sorted(
+        db.execute(select(SkillEdge.source_id, SkillEdge.target_id).where(SkillEdge.kind == "related")).all()
+    )
+
+
+def test_related_edges_follow_targets_created_renamed_and_deleted_later(db):
+    web = crud.skill.create(db, schemas.SkillCreate(name="Web", category="编程", related_skills=["Python", "ＳＱＬ"]))
+    assert related_edges(db) == []
+
+    # 目标技能后建，名称大小写和全角半角不同也能对应
+    python = crud.skill.create(db, schemas.SkillCreate(name="python", category="编程"))
+    assert related_edges(db) == [(web.id, python.id)]
+    assert crud.skill_graph.verify(db)
+
+    sql = crud.skill.create(db, schemas.SkillCreate(name="数据库", category="编程"))
+    crud.skill.update(db, sql, schemas.SkillUpdate(name="sql"))
+    crud.skill.update(db, python, schemas.SkillUpdate(name="Python 3"))
+    assert related_edges(db) == [(web.id, sql.id)]
+    assert crud.skill_graph.verify(db)
+
+    # 同名技能删除一个后，边仍连到剩下的那个
+    other_sql = crud.skill.create(db, schemas.SkillCreate(name="SQL", category="数据"))
+    assert related_edges(db) == [(web.id, sql.id), (web.id, other_sql.id)]
+    crud.skill.remove(db, sql.id)
+    assert related_edges(db) == [(web.id, other_sql.id)]
+    assert crud.skill_graph.verify(db)
+
+    edges = related_edges(db)
+    crud.skill_graph.rebuild(db)
+    assert related_edges(db) == edges
@@ -0,0 +1,22 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import engine
+from app.main import app
+
+
+def test_failed_statements_do_not_leak_query_start():
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
+
+
+def test_metrics_content_type_has_single_charset():
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
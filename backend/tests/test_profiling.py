@@ -0,0 +1,13 @@
+from types import SimpleNamespace
+
+from app.core.profiling import _frame_name
+
+
+def test_frame_name_falls_back_to_co_name_without_qualname():
+    # Python 3.10的code对象没有co_qualname
+    code = SimpleNamespace(co_name="handler", co_filename="app/api/endpoints/emotion.py", co_firstlineno=12)
+    assert _frame_name(code) == "handler (app/api/endpoints/emotion.py:12)"
+
+
+def test_frame_name_prefers_qualname():
+    assert _frame_name(_frame_name.__code__).startswith("_frame_name (")
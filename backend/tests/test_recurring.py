@@ -0,0 +1,26 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app import crud, schemas
+from app.models.data import FinanceEntry
+from app.models.finance import RecurringSeries
+from app.services.recurring import amount_band
+
+
+def test_series_band_follows_drifting_median(db):
+    # 每次涨价都在上一次典型金额的15%以内，累计涨幅超过两个分档
+    for month, amount in enumerate([100, 110, 120, 125, 130, 135, 140, 143], start=1):
+        crud.finance.create(db, schemas.FinanceCreate(
+            amount=amount,
+            category="expense",
+            subcategory="subscription",
+            description="云服务月费",
+            date=date(2024, month, 5)
+        ))
+
+    series = db.execute(select(RecurringSeries)).scalars().all()
+    assert len(series) == 1
+    assert series[0].amount_band == amount_band(series[0].typical_amount)
+    assert series[0].occurrences == 8
+    assert db.execute(select(FinanceEntry.recurring_series_id).distinct()).scalars().all() == [series[0].id]
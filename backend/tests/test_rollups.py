@@ -0,0 +1,45 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from app import crud, schemas
+from app.models.data import LearningEntry
+from app.models.rollup import DailyRollup
+from app.services import rollups
+
+
+def rollup_rows(db):
+    """预聚合表的全部行，累计值取6位小数避免浮点误差"""
+    return sorted(
+        (metric, dimension, day, round(total, 6), count)
+        for metric, dimension, day, total, count in db.execute(
+            select(DailyRollup.metric, DailyRollup.dimension, DailyRollup.date, DailyRollup.total, DailyRollup.count)
+        )
+    )
+
+
+def assert_matches_rebuild(db):
+    incremental = rollup_rows(db)
+    rollups.rebuild(db)
+    assert incremental == rollup_rows(db)
+
+
+def test_skill_delete_folds_learning_minutes_into_no_skill_dimension(db):
+    skill = crud.skill.create(db, schemas.SkillCreate(name="Rust", category="编程"))
+    other = crud.skill.create(db, schemas.SkillCreate(name="Go", category="编程"))
+    for day, duration, skill_id in [
+        (date(2024, 3, 1), 30, skill.id),
+        (date(2024, 3, 1), 20, None),
+        (date(2024, 3, 2), 45, skill.id),
+        (date(2024, 3, 2), 15, other.id),
+    ]:
+        crud.learning.create(db, schemas.LearningCreate(topic="练习", duration=duration, date=day, skill_id=skill_id))
+
+    crud.skill.remove(db, skill.id)
+
+    assert db.execute(select(LearningEntry.id).where(LearningEntry.skill_id == skill.id)).first() is None
+    rows = rollup_rows(db)
+    assert ("learning_minutes", "", date(2024, 3, 1), 50.0, 2) in rows
+    assert ("learning_minutes", "", date(2024, 3, 2), 45.0, 1) in rows
+    assert not [row for row in rows if row[1] == str(skill.id)]
+    assert_matches_rebuild(db)
@@ -0,0 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.semantic_search import SemanticIndex
+
+
+def test_query_embedding_cache_is_safe_under_concurrent_searches(tmp_path):
+    index = SemanticIndex(path=str(tmp_path), model_name="test")
+    calls = []
+
+    def embed(texts):
+        calls.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+    index._embed = embed
+    queries = [f"查询{i % 300}" for i in range(3000)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(index._embed_query, queries))
+
+    assert results == [[float(len(query))] for query in queries]
+    assert len(index._query_embeddings) <= 256
+    # 缓存命中的查询不再计算向量
+    before = len(calls)
+    recent = next(reversed(index._query_embeddings))
+    assert index._embed_query(recent) == [float(len(recent))]
+    assert len(calls) == before
@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+
+from app.core.cache import SharedWriteVersions
+
+
+def _bump_many(path, table, times):
+    versions = SharedWriteVersions(path)
+    for _ in range(times):
+        versions.bump(table)
+
+
+def test_workers_share_epoch_and_versions(tmp_path):
+    path = str(tmp_path / "versions")
+    first, second = SharedWriteVersions(path), SharedWriteVersions(path)
+    assert first.epoch == second.epoch
+
+    before = second.get(["finance_entries", "emotion_entries"])
+    first.bump("finance_entries")
+    after = second.get(["finance_entries", "emotion_entries"])
+    assert after[0] == before[0] + 1
+    assert after[1] == before[1]
+
+
+def test_concurrent_bumps_from_processes_are_not_lost(tmp_path):
+    path = str(tmp_path / "versions")
+    versions = SharedWriteVersions(path)
+    start = versions.get(["learning_entries"])[0]
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_bump_many, args=(path, "learning_entries", 200)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert versions.get(["learning_entries"])[0] == start + 800
+    # 后打开的进程沿用已有文件，不会重置启动标识
+    assert SharedWriteVersions(path).epoch == versions.epoch
+    assert os.path.getsize(path) == SharedWriteVersions._HEADER + SharedWriteVersions.SLOTS * 8
@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.main import app
+
+
+def test_prerequisite_changes_outside_endpoints_refresh_cached_responses(db):
+    client = TestClient(app)
+    base, web = (crud.skill.create(db, schemas.SkillCreate(name=name, category="编程")) for name in ("Python", "Web"))
+    url = f"/api/skills/{web.id}/prerequisites"
+    assert client.get(url).json() == []
+
+    crud.skill_graph.add_prerequisite(db, web.id, base.id)
+    assert [skill["id"] for skill in client.get(url).json()] == [base.id]
+    assert [skill["id"] for skill in client.get(f"/api/skills/{base.id}/dependents").json()] == [web.id]
+
+    crud.skill_graph.remove_prerequisite(db, web.id, base.id)
+    assert client.get(url).json() == []
@@ -0,0 +1,60 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app import crud, schemas
+from app.core.config import settings
+from app.main import app
+from app.services import skill_progress
+
+
+def add_learning(db, skill_id, duration, day=date(2024, 4, 1)):
+    return crud.learning.create(db, schemas.LearningCreate(topic="练习", duration=duration, date=day, skill_id=skill_id))
+
+
+def test_manual_progress_is_kept_by_default(db):
+    assert settings.SKILL_PROGRESS_AUTO is False
+    skill = crud.skill.create(db, schemas.SkillCreate(name="摄影", category="爱好", level=2, progress=35))
+    add_learning(db, skill.id, settings.SKILL_MASTERY_MINUTES)
+    skill_progress.rebuild(db)
+
+    db.refresh(skill)
+    assert (skill.progress, skill.level) == (35, 2)
+    derived = skill_progress.get_progress(db, skill.id)
+    assert derived["derived_progress"] == 100
+
+
+def test_auto_progress_overwrites_when_enabled(db, monkeypatch):
+    monkeypatch.setattr(settings, "SKILL_PROGRESS_AUTO", True)
+    skill = crud.skill.create(db, schemas.SkillCreate(name="摄影", category="爱好", level=2, progress=35))
+    add_learning(db, skill.id, settings.SKILL_MASTERY_MINUTES)
+
+    db.refresh(skill)
+    assert (skill.progress, skill.level) == skill_progress.derive(settings.SKILL_MASTERY_MINUTES, settings.SKILL_MASTERY_MINUTES)
+
+
+class FakeDate(date):
+    current = date(2024, 4, 1)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+def test_progress_without_dates_is_not_served_from_yesterdays_cache(db, monkeypatch):
+    from app.api.endpoints import skill as skill_endpoints
+    from app.core import cache
+
+    monkeypatch.setattr(cache, "date", FakeDate)
+    monkeypatch.setattr(skill_endpoints, "date", FakeDate)
+    skill = crud.skill.create(db, schemas.SkillCreate(name="摄影", category="爱好"))
+    client = TestClient(app)
+    url = f"/api/skills/{skill.id}/progress"
+
+    assert client.get(url).json()["history"]["x"][-1] == "2024-04-01"
+    assert client.get(url).headers["x-cache"] == "HIT"
+    # 过了零点，没有任何写入
+    monkeypatch.setattr(FakeDate, "current", date(2024, 4, 2))
+    response = client.get(url)
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()["history"]["x"][-1] == "2024-04-02"
@@ -0,0 +1,68 @@
+import json
+
+import httpx
+import openai
+import pytest
+from sqlalchemy import select
+
+from app.ai.agent import process_streaming_request
+from app.core.config import settings
+from app.models.llm_call import LLMCall
+from tests.test_agent_stream import completion_chunk
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    """让agent创建的客户端连到模拟的上游，请求了用量时在最后一个数据块返回用量"""
+    bodies = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        bodies.append(body)
+        chunks = [completion_chunk("你好"), completion_chunk("！")]
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {"prompt_tokens": 21, "completion_tokens": 2, "total_tokens": 23}
+            chunks.append(f"data: {json.dumps({'id': 'chatcmpl-test', 'object': 'chat.completion.chunk', 'created': 0, 'model': 'gpt-3.5-turbo', 'choices': [], 'usage': usage})}\n\n".encode())
+        chunks.append(b"data: [DONE]\n\n")
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=b"".join(chunks))
+
+    real_client = openai.AsyncOpenAI
+
+    def fake_client(**kwargs):
+        return real_client(**kwargs, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    monkeypatch.setattr(openai, "AsyncOpenAI", fake_client)
+    return bodies
+
+
+async def stream_reply():
+    return [json.loads(chunk) async for chunk in process_streaming_request("你好", [], model_name="gpt-3.5-turbo", api_key="test")]
+
+
+@pytest.mark.anyio
+async def test_streamed_call_records_token_usage(requests, db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PRICING", {"gpt-3.5-turbo": [0.5, 1.5]})
+    chunks = await stream_reply()
+
+    assert chunks[-1]["full_response"] == "你好！"
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    call = db.execute(select(LLMCall)).scalar_one()
+    assert (call.mode, call.status) == ("stream", "ok")
+    assert (call.prompt_tokens, call.completion_tokens, call.total_tokens) == (21, 2, 23)
+    assert call.cost == round((21 * 0.5 + 2 * 1.5) / 1_000_000, 6)
+
+
+@pytest.mark.anyio
+async def test_stream_usage_can_be_disabled_for_incompatible_providers(requests, db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_STREAM_USAGE", False)
+    chunks = await stream_reply()
+
+    assert chunks[-1]["full_response"] == "你好！"
+    assert "stream_options" not in requests[0]
+    call = db.execute(select(LLMCall)).scalar_one()
+    assert (call.status, call.prompt_tokens, call.completion_tokens) == ("ok", None, None)
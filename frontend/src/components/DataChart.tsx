@@ -1,23 +1,101 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import ReactECharts from 'echarts-for-react';
+import { getSeries, SeriesBucket, SeriesMetric, SeriesResponse } from '../services/insightsService';
+
+// 未指定时每个指标最多请求的点数，超出时由后端用LTTB降采样
+const DEFAULT_SERIES_POINTS = 300;
+
+// 折线图和柱状图的数据源：由后端按日期分桶聚合并降采样，不在前端处理原始记录
+export interface SeriesSource {
+  metrics: SeriesMetric[];
+  start_date: string;
+  end_date: string;
+  bucket?: SeriesBucket;
+  points?: number;
+  names?: Partial<Record<SeriesMetric, string>>;
+}
 
 interface DataChartProps {
   type: 'line' | 'bar' | 'pie' | 'scatter' | 'radar';
-  data: any;
+  data?: any;
+  source?: SeriesSource;
+  reloadKey?: number;
   title?: string;
   width?: number | string;
   height?: number | string;
   options?: any;
 }
 
+// 各指标降采样后的x不一定相同，使用时间轴并以[x, y]点对作为数据
+const toChartData = (response: SeriesResponse, source: SeriesSource) => {
+  const series = source.metrics
+    .filter(metric => response.series[metric])
+    .map(metric => {
+      const values = response.series[metric]!;
+      return {
+        name: source.names?.[metric] || metric,
+        data: values.x.map((x, i) => [x, values.y[i]])
+      };
+    });
+  return {
+    xAxisType: 'time',
+    legend: series.map(s => s.name),
+    series
+  };
+};
+
 const DataChart: React.FC<DataChartProps> = ({ 
   type, 
-  data, 
+  data: rawData = {}, 
+  source,
+  reloadKey = 0,
   title = '', 
   width = '100%', 
   height = 400, 
   options = {} 
 }) => {
+  const [seriesData, setSeriesData] = useState<any>(null);
+  const [loading, setLoading] = useState<boolean>(false);
+  const sourceKey = source ? JSON.stringify(source) : '';
+
+  // 指定source时从/insights/series获取分桶聚合后的序列
+  useEffect(() => {
+    if (!source) {
+      setSeriesData(null);
+      return;
+    }
+    let cancelled = false;
+    setLoading(true);
+    getSeries(
+      source.start_date,
+      source.end_date,
+      source.metrics,
+      source.bucket || 'day',
+      source.points || DEFAULT_SERIES_POINTS
+    )
+      .then(response => {
+        if (!cancelled) setSeriesData(toChartData(response, source));
+      })
+      .catch(error => {
+        console.error('Failed to load series:', error);
+      })
+      .finally(() => {
+        if (!cancelled) setLoading(false);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [sourceKey, reloadKey]);
+
+  const data = source ? seriesData || {} : rawData;
+
+  // 分类轴使用传入的xAxis，时间轴的x包含在每个点中
+  const getXAxis = (extra: any = {}) => (
+    data.xAxisType === 'time'
+      ? { type: 'time' }
+      : { type: 'category', data: data.xAxis || [], ...extra }
+  );
+
   // 生成基础配置
   const getBaseOptions = () => {
     const baseOptions = {
@@ -58,11 +136,7 @@ const DataChart: React.FC<DataChartProps> = ({
       case 'line':
         return {
           ...baseOptions,
-          xAxis: {
-            type: 'category',
-            boundaryGap: false,
-            data: data.xAxis || []
-          },
+          xAxis: getXAxis({ boundaryGap: false }),
           yAxis: {
             type: 'value'
           },
@@ -77,10 +151,7 @@ const DataChart: React.FC<DataChartProps> = ({
       case 'bar':
         return {
           ...baseOptions,
-          xAxis: {
-            type: 'category',
-            data: data.xAxis || []
-          },
+          xAxis: getXAxis(),
           yAxis: {
             type: 'value'
           },
@@ -165,7 +236,7 @@ const DataChart: React.FC<DataChartProps> = ({
 
   return (
     <div style={{ width, height }}>
-      <ReactECharts option={chartOptions} style={{ width: '100%', height: '100%' }} />
+      <ReactECharts option={chartOptions} showLoading={loading} style={{ width: '100%', height: '100%' }} />
     </div>
   );
 };
@@ -18,7 +18,7 @@ import {
 import { PlusOutlined, EditOutlined, DeleteOutlined, SearchOutlined } from '@ant-design/icons';
 import dayjs from 'dayjs';
 import { getEmotions, createEmotion, updateEmotion, deleteEmotion, Emotion, EmotionCreate, EmotionUpdate } from '../services/emotionService';
-import DataChart from '../components/DataChart';
+import DataChart, { SeriesSource } from '../components/DataChart';
 
 const { RangePicker } = DatePicker;
 const { TextArea } = Input;
@@ -34,6 +34,8 @@ const EmotionManagementPage: React.FC = () => {
   const [dateRange, setDateRange] = useState<[dayjs.Dayjs | null, dayjs.Dayjs | null]>([null, null]);
   const [searchText, setSearchText] = useState<string>('');
   const [chartData, setChartData] = useState<any>({});
+  // 记录增删改后递增，触发趋势图重新获取序列
+  const [chartVersion, setChartVersion] = useState<number>(0);
 
   // 生成图表数据
   const generateChartData = (emotionList: Emotion[]) => {
@@ -49,24 +51,22 @@ const EmotionManagementPage: React.FC = () => {
       value
     }));
     
-    // 情感分数趋势图数据
-    const sortedEmotions = [...emotionList].sort((a, b) => 
-      new Date(a.date).getTime() - new Date(b.date).getTime()
-    );
-    
-    const lineData = {
-      xAxis: sortedEmotions.map(e => e.date),
-      series: [{
-        name: '情感分数',
-        data: sortedEmotions.map(e => e.sentiment_score || 0)
-      }]
-    };
-    
     setChartData({
-      pie: pieData,
-      line: lineData
+      pie: pieData
     });
   };
+
+  // 情感分数趋势由后端按日期分桶聚合，未选择日期范围时显示最近一年
+  const trendEnd = dateRange[1] || dayjs();
+  const trendStart = dateRange[0] || trendEnd.subtract(1, 'year');
+  const trendDays = trendEnd.diff(trendStart, 'day');
+  const trendSource: SeriesSource = {
+    metrics: ['sentiment'],
+    start_date: trendStart.format('YYYY-MM-DD'),
+    end_date: trendEnd.format('YYYY-MM-DD'),
+    bucket: trendDays > 730 ? 'month' : trendDays > 180 ? 'week' : 'day',
+    names: { sentiment: '情感分数' }
+  };
   
   // 加载情感记录
   const loadEmotions = async () => {
@@ -124,6 +124,7 @@ const EmotionManagementPage: React.FC = () => {
           await deleteEmotion(id);
           message.success('删除成功');
           loadEmotions();
+          setChartVersion(version => version + 1);
         } catch (error) {
           message.error('删除失败');
           console.error('Failed to delete emotion:', error);
@@ -155,6 +156,7 @@ const EmotionManagementPage: React.FC = () => {
 
       setModalVisible(false);
       loadEmotions();
+      setChartVersion(version => version + 1);
     } catch (error) {
       message.error('操作失败');
       console.error('Failed to submit emotion:', error);
@@ -263,14 +265,13 @@ const EmotionManagementPage: React.FC = () => {
           </Col>
           <Col xs={24} lg={12}>
             <Card title="情感分数趋势" size="small">
-              {chartData.line && (
-                <DataChart
-                  type="line"
-                  data={chartData.line}
-                  title="情感分数趋势"
-                  height={300}
-                />
-              )}
+              <DataChart
+                type="line"
+                source={trendSource}
+                reloadKey={chartVersion}
+                title="情感分数趋势"
+                height={300}
+              />
             </Card>
           </Col>
         </Row>
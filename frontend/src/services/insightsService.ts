@@ -0,0 +1,38 @@
+import axios from 'axios';
+
+const API_BASE_URL = '/api/insights';
+
+// 序列指标类型定义
+export type SeriesMetric = 'spend' | 'income' | 'learning_minutes' | 'sentiment';
+export type SeriesBucket = 'day' | 'week' | 'month';
+
+export interface SeriesData {
+  x: string[];
+  y: (number | null)[];
+}
+
+export interface SeriesResponse {
+  start_date: string;
+  end_date: string;
+  bucket: SeriesBucket;
+  series: Partial<Record<SeriesMetric, SeriesData>>;
+}
+
+// 获取图表用的分桶聚合序列
+export const getSeries = async (
+  start_date: string,
+  end_date: string,
+  metrics: SeriesMetric[] = ['spend', 'income', 'learning_minutes', 'sentiment'],
+  bucket: SeriesBucket = 'day',
+  points?: number
+) => {
+  const params = new URLSearchParams();
+  params.append('start_date', start_date);
+  params.append('end_date', end_date);
+  metrics.forEach(metric => params.append('metrics', metric));
+  params.append('bucket', bucket);
+  if (points) params.append('points', points.toString());
+
+  const response = await axios.get<SeriesResponse>(`${API_BASE_URL}/series?${params.toString()}`);
+  return response.data;
+};
@@ -103,3 +103,31 @@ export const deleteSkill = async (id: number) => {
   const response = await axios.delete<Skill>(`${API_BASE_URL}/${id}`);
   return response.data;
 };
+
+// 技能树图结构
+export interface SkillGraphNode {
+  id: number;
+  name: string;
+  category: string;
+  level: number;
+  progress: number;
+  depth: number;
+}
+
+export interface SkillGraphEdge {
+  source: number;
+  target: number;
+  kind: 'prerequisite' | 'related';
+}
+
+export interface SkillTreeGraph {
+  tree: { id: number; name: string; category: string; description?: string };
+  nodes: SkillGraphNode[];
+  edges: SkillGraphEdge[];
+}
+
+// 获取技能树的节点和边
+export const getSkillTreeGraph = async (treeId: number) => {
+  const response = await axios.get<SkillTreeGraph>(`/api/skill-trees/${treeId}/graph`);
+  return response.data;
+};